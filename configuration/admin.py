@@ -1,9 +1,16 @@
 from django.contrib import admin
 
-from .models import GlobalLLMConfig
+from .models import GlobalLLMConfig, LLMJob
 
 
 @admin.register(GlobalLLMConfig)
 class GlobalLLMConfigAdmin(admin.ModelAdmin):
     list_display = ("name", "value")
     search_fields = ("name",)
+
+
+@admin.register(LLMJob)
+class LLMJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "model_name", "status", "created_at", "updated_at")
+    search_fields = ("model_name",)
+    list_filter = ("status",)
@@ -1,6 +1,19 @@
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from ninja import Router, ModelSchema, Schema
+from ninja.errors import HttpError
+from ninja.responses import NinjaJSONEncoder
+from django.utils.http import parse_etags
 from typing import List
-from .models import GlobalLLMConfig
+from rizoner import instrumentation
+from rizoner.instrumentation import query_budget
+from .jobs import job_events, submit_llm_job
+from .llm import send_user_message
+from .models import GlobalLLMConfig, LLMJob
+from .resolver import llm_config
 
 router = Router()
 
@@ -17,11 +30,20 @@ class GlobalLLMConfigInSchema(Schema):
 
 
 @router.get("/llm-config", response=List[GlobalLLMConfigSchema])
-def list_llm_configs(request):
-    return GlobalLLMConfig.objects.all()
+@query_budget(1)
+def list_llm_configs(request, response: HttpResponse):
+    # One snapshot, so the body always matches its ETag
+    config = llm_config.snapshot()
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if config.etag in if_none_match or "*" in if_none_match:
+        return HttpResponseNotModified(headers={"ETag": config.etag})
+
+    response["ETag"] = config.etag
+    return [{"name": name, "value": value} for name, value in config.items]
 
 
 @router.post("/llm-config", response=GlobalLLMConfigSchema)
+@query_budget(6)
 def set_llm_config(request, payload: GlobalLLMConfigInSchema):
     config, created = GlobalLLMConfig.objects.update_or_create(
         name=payload.name, defaults={"value": payload.value}
@@ -35,26 +57,130 @@ class TestLLMAuthResponseSchema(Schema):
     answer: str = None
 
 
+TEST_LLM_AUTH_PROMPT = "Hi, how are you?"
+
+
 @router.post("/test-llm-auth", response=TestLLMAuthResponseSchema)
+# Includes the queries django_llm_chat makes to store the chat and messages
+@query_budget(10)
 def test_llm_auth(request):
     try:
-        from django_llm_chat.chat import Chat
-        from .models import GlobalLLMConfig
-
         # Fetch the model configuration
-        try:
-            config = GlobalLLMConfig.objects.get(
-                name=GlobalLLMConfig.NameChoices.REASONING_LLM_MODEL
-            )
-            model_name = config.value
-        except GlobalLLMConfig.DoesNotExist:
+        model_name = llm_config.get(GlobalLLMConfig.NameChoices.REASONING_LLM_MODEL)
+        if model_name is None:
             return {
                 "error": "REASONING_LLM_MODEL is not configured. Please run /test-llm-auth again after configuring."
             }
 
-        chat = Chat.create()
         # Create a basic message to test the auth
-        answer = chat.send_user_msg_to_llm(model_name, "Hi, how are you?")
-        return {"message": "Success", "answer": str(answer)}
+        answer = send_user_message(model_name, TEST_LLM_AUTH_PROMPT)
+        return {"message": "Success", "answer": answer}
     except Exception as e:
         return {"error": str(e)}
+
+
+class LLMJobInSchema(Schema):
+    prompt: str = TEST_LLM_AUTH_PROMPT
+    config_name: GlobalLLMConfig.NameChoices = (
+        GlobalLLMConfig.NameChoices.REASONING_LLM_MODEL
+    )
+
+
+class LLMJobSchema(ModelSchema):
+    class Meta:
+        model = LLMJob
+        fields = [
+            "id",
+            "model_name",
+            "prompt",
+            "status",
+            "answer",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, cls=NinjaJSONEncoder)}\n\n"
+
+
+@router.post("/llm-jobs", response=LLMJobSchema)
+# Six when LLM_JOBS_EAGER runs the job inline, otherwise two
+@query_budget(6)
+def create_llm_job(request, payload: LLMJobInSchema):
+    """Queue an LLM call and return immediately; poll or stream it by ID."""
+    model_name = llm_config.get(payload.config_name)
+    if model_name is None:
+        raise HttpError(400, f"{payload.config_name.value} is not configured.")
+    return submit_llm_job(model_name, payload.prompt)
+
+
+@router.get("/llm-jobs/{job_id}", response=LLMJobSchema)
+@query_budget(1)
+def get_llm_job(request, job_id: int):
+    return get_object_or_404(LLMJob, id=job_id)
+
+
+LLM_JOB_EVENTS_POLL_INTERVAL = 0.25
+
+
+@router.get("/llm-jobs/{job_id}/events")
+@query_budget(1)
+async def llm_job_events(request, job_id: int):
+    """Server-Sent Events stream of the job's answer and status until it finishes.
+
+    Every change of status is sent as an event named after the status, with
+    the job as data. While the job runs, each piece of the answer is sent as
+    a ``token`` event with ``{"text": ...}`` as soon as the model produces
+    it; pieces generated before the stream was opened are only in the final
+    ``succeeded`` event's ``answer``. Needs an ASGI server, like thread events.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would buffer the stream until the job finishes
+        raise HttpError(501, "Event streams need the app to be served over ASGI")
+    await aget_object_or_404(LLMJob, id=job_id)
+
+    async def events():
+        subscription = job_events.subscribe(job_id)
+        try:
+            last_status = None
+            while True:
+                job = await LLMJob.objects.aget(id=job_id)
+                if job.status != last_status:
+                    last_status = job.status
+                    yield sse_event(job.status, LLMJobSchema.from_orm(job).model_dump())
+                if job.is_finished:
+                    return
+                # Jobs run by another process publish nothing here, so the
+                # status is re-read at least every poll interval
+                event = await subscription.get(LLM_JOB_EVENTS_POLL_INTERVAL)
+                while event is not None and event.kind == "token":
+                    yield sse_event("token", event.data)
+                    event = await subscription.get(LLM_JOB_EVENTS_POLL_INTERVAL)
+        finally:
+            job_events.unsubscribe(subscription)
+
+    return StreamingHttpResponse(
+        events(),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class RequestMetricsSchema(Schema):
+    enabled: bool
+
+
+@router.get("/request-metrics", response=RequestMetricsSchema)
+@query_budget(0)
+def get_request_metrics(request):
+    return {"enabled": instrumentation.is_enabled()}
+
+
+@router.put("/request-metrics", response=RequestMetricsSchema)
+@query_budget(0)
+def set_request_metrics(request, payload: RequestMetricsSchema):
+    """Switch request instrumentation on or off in this server process."""
+    instrumentation.set_enabled(payload.enabled)
+    return {"enabled": instrumentation.is_enabled()}
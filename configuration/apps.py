@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ConfigurationConfig(AppConfig):
     name = "configuration"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,112 @@
+"""Run LLM calls in a background thread pool instead of the request thread.
+
+Submitting a job only writes an ``LLMJob`` row and returns; a pool of
+``LLM_JOB_WORKERS`` threads sends the prompts. LLM calls spend nearly all
+their time waiting on the network, so one process can keep many of them in
+flight. Set ``LLM_JOBS_EAGER = True`` to run jobs inline (e.g. in tests).
+
+Answers are streamed: every piece is published on ``job_events`` as a
+``token`` event as soon as the model produces it, and ``/llm-jobs/{id}/events``
+relays them. Once the answer is complete it is stored on the job and, for
+real models, recorded as a django_llm_chat chat. Like thread events, token
+events only reach subscribers in the process that runs the job.
+
+Jobs are only queued in the memory of the process that submitted them, so
+a restart loses the pending and running ones. Running jobs touch their
+``updated_at`` every ``HEARTBEAT_INTERVAL`` seconds; jobs left unfinished
+and untouched for ``LLM_JOB_STALE_AFTER`` seconds are failed by
+``fail_stale_jobs``, which every process runs when it starts its pool.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from statement.events import EventBus
+
+from .llm import is_fake_model, record_exchange, stream_user_message
+from .models import LLMJob
+
+DEFAULT_WORKERS = 32
+DEFAULT_STALE_AFTER = 600
+HEARTBEAT_INTERVAL = 30
+STALE_JOB_ERROR = "The job was interrupted: the process running it stopped"
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Keyed by job ID: ``token`` events, then ``finished`` once the job is saved
+job_events = EventBus()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        fail_stale_jobs()
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "LLM_JOB_WORKERS", DEFAULT_WORKERS),
+            thread_name_prefix="llm-job",
+        )
+    return _executor
+
+
+def submit_llm_job(model_name: str, prompt: str) -> LLMJob:
+    job = LLMJob.objects.create(model_name=model_name, prompt=prompt)
+    if getattr(settings, "LLM_JOBS_EAGER", False):
+        run_llm_job(job.pk)
+        job.refresh_from_db()
+    else:
+        # The worker must not look for the row before it is committed
+        transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.pk))
+    return job
+
+
+def fail_stale_jobs() -> int:
+    """Fail the jobs that no live process will finish; return how many."""
+    now = timezone.now()
+    stale_after = getattr(settings, "LLM_JOB_STALE_AFTER", DEFAULT_STALE_AFTER)
+    return LLMJob.objects.filter(
+        status__in=[LLMJob.Status.PENDING, LLMJob.Status.RUNNING],
+        updated_at__lt=now - timedelta(seconds=stale_after),
+    ).update(status=LLMJob.Status.FAILED, error=STALE_JOB_ERROR, updated_at=now)
+
+
+def run_llm_job(job_id: int) -> None:
+    # Claimed only while still pending: it may have been failed as stale
+    claimed = LLMJob.objects.filter(pk=job_id, status=LLMJob.Status.PENDING).update(
+        status=LLMJob.Status.RUNNING, updated_at=timezone.now()
+    )
+    if not claimed:
+        return
+    job = LLMJob.objects.get(pk=job_id)
+
+    try:
+        answer, usage = [], {}
+        beat = time.monotonic()
+        for text in stream_user_message(job.model_name, job.prompt, usage):
+            answer.append(text)
+            job_events.publish(job.pk, "token", {"text": text})
+            if time.monotonic() - beat >= HEARTBEAT_INTERVAL:
+                LLMJob.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+                beat = time.monotonic()
+        job.answer = "".join(answer)
+        if not is_fake_model(job.model_name):
+            record_exchange(job.model_name, job.prompt, job.answer, usage)
+        job.status = LLMJob.Status.SUCCEEDED
+    except Exception as e:
+        job.error = str(e)
+        job.status = LLMJob.Status.FAILED
+    job.save(update_fields=["status", "answer", "error", "updated_at"])
+    job_events.publish(job.pk, "finished", {})
+
+
+def _run_in_worker(job_id: int) -> None:
+    close_old_connections()
+    try:
+        run_llm_job(job_id)
+    finally:
+        close_old_connections()
@@ -0,0 +1,113 @@
+"""Single entry point for sending a message to an LLM.
+
+Model names starting with ``fake/`` are answered locally without any network
+call, which makes LLM-backed endpoints usable offline and in tests.
+"""
+
+import re
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from rizoner.instrumentation import track_llm
+
+FAKE_MODEL_PREFIX = "fake/"
+
+# The users django_llm_chat stores as the authors of prompts and of answers
+CHAT_SENDER_USERNAME = "djllmchat"
+CHAT_LLM_USERNAME = "litellm"
+
+
+def is_fake_model(model_name: str) -> bool:
+    return model_name.startswith(FAKE_MODEL_PREFIX)
+
+
+def fake_answer(message: str) -> str:
+    return f"Fake answer to: {message}"
+
+
+def send_user_message(model_name: str, message: str) -> str:
+    with track_llm():
+        if is_fake_model(model_name):
+            time.sleep(getattr(settings, "FAKE_LLM_LATENCY", 0))
+            return fake_answer(message)
+
+        from django_llm_chat.chat import Chat
+
+        chat = Chat.create()
+        return str(chat.send_user_msg_to_llm(model_name, message))
+
+
+def stream_user_message(
+    model_name: str, message: str, usage: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """Yield the answer piece by piece as the model generates it.
+
+    django_llm_chat only returns whole answers, so the stream comes from
+    litellm directly; pass the result to ``record_exchange`` to store it as a
+    chat. The provider's token counts are copied into ``usage`` once the
+    stream ends.
+    """
+    if is_fake_model(model_name):
+        # Spread the configured latency over the words, like a real stream
+        words = re.findall(r"\S+\s*", fake_answer(message))
+        for word in words:
+            time.sleep(getattr(settings, "FAKE_LLM_LATENCY", 0) / len(words))
+            yield word
+        return
+
+    import litellm
+
+    chunks = litellm.completion(
+        model=model_name,
+        messages=[{"role": "user", "content": message}],
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in chunks:
+        if getattr(chunk, "usage", None) and usage is not None:
+            usage.update(chunk.usage.model_dump())
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def record_exchange(
+    model_name: str, message: str, answer: str, usage: Optional[Dict[str, Any]] = None
+) -> None:
+    """Store a streamed prompt and answer the way django_llm_chat stores its own.
+
+    That is one chat holding the user message and the assistant message, and
+    the LLM call that links them with its token counts.
+    """
+    from django_llm_chat.chat import Chat
+    from django_llm_chat.models import LLMCall, Message
+
+    usage = usage or {}
+    input_tokens = usage.get("prompt_tokens") or 0
+    output_tokens = usage.get("completion_tokens") or 0
+    users = get_user_model().objects
+    with transaction.atomic():
+        sender, _ = users.get_or_create(username=CHAT_SENDER_USERNAME)
+        llm, _ = users.get_or_create(username=CHAT_LLM_USERNAME)
+        chat = Chat.create().chat_db_model
+        prompt = Message.objects.create(
+            chat=chat, type="user", text=message, user=sender
+        )
+        reply = Message.objects.create(
+            chat=chat, type="assistant", text=answer, user=llm
+        )
+        call = LLMCall.objects.create(
+            input_tokens_count=input_tokens,
+            output_tokens_count=output_tokens,
+            status="generation_completed",
+            response_data={"model": model_name, "usage": usage, "stream": True},
+        )
+        call.messages.add(prompt, reply)
+        type(chat).objects.filter(pk=chat.pk).update(
+            input_tokens_count=F("input_tokens_count") + input_tokens,
+            output_tokens_count=F("output_tokens_count") + output_tokens,
+        )
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("configuration", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model_name",
+                    models.CharField(
+                        help_text="The LLM model the prompt is sent to", max_length=255
+                    ),
+                ),
+                (
+                    "prompt",
+                    models.TextField(help_text="The user message sent to the LLM"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        help_text="Where the job is in its lifecycle",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "answer",
+                    models.TextField(
+                        blank=True, help_text="The LLM answer, once succeeded"
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True, help_text="The failure reason, once failed"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "LLM Job",
+                "verbose_name_plural": "LLM Jobs",
+            },
+        ),
+    ]
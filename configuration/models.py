@@ -21,3 +21,37 @@ class GlobalLLMConfig(models.Model):
 
     def __str__(self) -> str:
         return str(self.get_name_display())
+
+
+class LLMJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    model_name = models.CharField(
+        max_length=255, help_text="The LLM model the prompt is sent to"
+    )
+    prompt = models.TextField(help_text="The user message sent to the LLM")
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        help_text="Where the job is in its lifecycle",
+    )
+    answer = models.TextField(blank=True, help_text="The LLM answer, once succeeded")
+    error = models.TextField(blank=True, help_text="The failure reason, once failed")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "LLM Job"
+        verbose_name_plural = "LLM Jobs"
+
+    def __str__(self) -> str:
+        return f"LLM Job {self.pk} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
@@ -0,0 +1,92 @@
+"""Process-wide, in-memory view of ``GlobalLLMConfig``.
+
+All rows are loaded with one query and served from memory afterwards. The
+cache is dropped by the signal handlers in ``configuration.signals`` whenever
+a row is saved or deleted in this process; ``LLM_CONFIG_CACHE_TTL`` bounds
+how long changes made by other processes can go unnoticed.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import GlobalLLMConfig
+
+DEFAULT_TTL = 60
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """The configuration as loaded by one query; never changes afterwards."""
+
+    items: Tuple[Tuple[str, str], ...]
+    values: Mapping[str, str]
+    etag: str
+    loaded_at: float
+
+
+class LLMConfigResolver:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+        # Bumped by invalidate(), so rows read before it are not cached
+        self._generation = 0
+
+    def _load(self) -> ConfigSnapshot:
+        ttl = getattr(settings, "LLM_CONFIG_CACHE_TTL", DEFAULT_TTL)
+        with self._lock:
+            snapshot, generation = self._snapshot, self._generation
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < ttl:
+            return snapshot
+
+        items = tuple(
+            GlobalLLMConfig.objects.order_by("id").values_list("name", "value")
+        )
+        digest = hashlib.sha1(json.dumps(items).encode()).hexdigest()
+        snapshot = ConfigSnapshot(
+            items=items,
+            values=MappingProxyType(dict(items)),
+            etag=f'"{digest}"',
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Items, values and ETag that belong together; read them from one call."""
+        return self._load()
+
+    def items(self) -> List[Tuple[str, str]]:
+        """All ``(name, value)`` pairs in creation order."""
+        return list(self._load().items)
+
+    def get(self, name: str) -> Optional[str]:
+        return self._load().values.get(name)
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag of the current configuration, quoted for HTTP headers."""
+        return self._load().etag
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def invalidate_on_commit(self) -> None:
+        # Drop now so the writing transaction reads its own writes, and again
+        # on commit in case another request reloaded the old rows meanwhile.
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
+
+llm_config = LLMConfigResolver()
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import GlobalLLMConfig
+from .resolver import llm_config
+
+
+@receiver([post_save, post_delete], sender=GlobalLLMConfig)
+def invalidate_llm_config(sender, instance: GlobalLLMConfig, **kwargs) -> None:
+    llm_config.invalidate_on_commit()
@@ -62,3 +62,350 @@ def test_test_llm_auth_failure(mock_chat_create, client):
         "error": "API Key not valid",
         "answer": None,
     }
+
+
+@pytest.fixture
+def fake_llm_config(db):
+    from configuration.models import GlobalLLMConfig
+
+    return GlobalLLMConfig.objects.create(
+        name=GlobalLLMConfig.NameChoices.REASONING_LLM_MODEL, value="fake/echo"
+    )
+
+
+@pytest.mark.django_db
+def test_create_llm_job_returns_before_llm_call(
+    client, fake_llm_config, django_capture_on_commit_callbacks
+):
+    with patch("configuration.jobs.stream_user_message") as send:
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = client.post("/llm-jobs", json={"prompt": "Hello"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "pending"
+    assert data["model_name"] == "fake/echo"
+    # The LLM call is handed to the worker pool once the job row is committed
+    assert len(callbacks) == 1
+    send.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_llm_job_runs_with_fake_backend(client, fake_llm_config, settings):
+    settings.LLM_JOBS_EAGER = True
+
+    response = client.post("/llm-jobs", json={"prompt": "Hello"})
+    job_id = response.json()["id"]
+
+    response = client.get(f"/llm-jobs/{job_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "succeeded"
+    assert data["answer"] == "Fake answer to: Hello"
+    assert data["error"] == ""
+
+
+@pytest.mark.django_db
+def test_llm_job_records_failure(client, fake_llm_config, settings):
+    settings.LLM_JOBS_EAGER = True
+
+    with patch(
+        "configuration.jobs.stream_user_message",
+        side_effect=Exception("API Key not valid"),
+    ):
+        response = client.post("/llm-jobs", json={})
+
+    data = response.json()
+    assert data["status"] == "failed"
+    assert data["error"] == "API Key not valid"
+    assert data["prompt"] == "Hi, how are you?"
+
+
+@pytest.mark.django_db
+def test_create_llm_job_without_config(client):
+    response = client.post("/llm-jobs", json={"prompt": "Hello"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_get_llm_job_not_found(client):
+    assert client.get("/llm-jobs/999").status_code == 404
+
+
+@pytest.mark.django_db
+def test_llm_job_events(fake_llm_config, settings):
+    import asyncio
+
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncRequestFactory, RequestFactory
+    from ninja.errors import HttpError
+
+    from configuration.api import llm_job_events
+    from configuration.jobs import submit_llm_job
+
+    settings.LLM_JOBS_EAGER = True
+    job = submit_llm_job("fake/echo", "Hello")
+    request = AsyncRequestFactory().get(f"/llm-jobs/{job.id}/events")
+
+    async def main():
+        response = await llm_job_events(request, job.id)
+        return response, b"".join([chunk async for chunk in response.streaming_content])
+
+    # The view's queries then run on this thread, inside the test's transaction
+    response, body = async_to_sync(main)()
+    assert response["Content-Type"] == "text/event-stream"
+    body = body.decode()
+    assert body.startswith("event: succeeded\ndata: ")
+    assert '"answer": "Fake answer to: Hello"' in body
+
+    # A WSGI server would hold the whole stream back
+    with pytest.raises(HttpError) as error:
+        asyncio.run(llm_job_events(RequestFactory().get("/"), job.id))
+    assert error.value.status_code == 501
+
+
+@pytest.mark.django_db
+def test_stale_llm_jobs_are_failed(settings):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from configuration import jobs
+    from configuration.models import LLMJob
+
+    settings.LLM_JOB_STALE_AFTER = 60
+    long_ago = timezone.now() - timedelta(minutes=5)
+    Status = LLMJob.Status
+    pending, running, fresh, done = [
+        LLMJob.objects.create(model_name="fake/echo", prompt="Hello", status=status)
+        for status in [Status.PENDING, Status.RUNNING, Status.RUNNING, Status.SUCCEEDED]
+    ]
+    LLMJob.objects.exclude(pk=fresh.pk).update(updated_at=long_ago)
+
+    # As after a restart: the first pool of the process reclaims them
+    with patch.object(jobs, "_executor", None):
+        executor = jobs.get_executor()
+    executor.shutdown()
+
+    statuses = dict(LLMJob.objects.values_list("pk", "status"))
+    assert statuses == {
+        pending.pk: Status.FAILED,
+        running.pk: Status.FAILED,
+        fresh.pk: Status.RUNNING,
+        done.pk: Status.SUCCEEDED,
+    }
+    assert LLMJob.objects.get(pk=pending.pk).error == jobs.STALE_JOB_ERROR
+    assert jobs.fail_stale_jobs() == 0
+
+    # A worker that gets to a failed job late leaves it alone
+    with patch("configuration.jobs.stream_user_message") as stream:
+        jobs.run_llm_job(pending.pk)
+    stream.assert_not_called()
+    assert LLMJob.objects.get(pk=pending.pk).status == Status.FAILED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_llm_job_events_stream_tokens_before_the_job_finishes(fake_llm_config):
+    import asyncio
+    import json
+    import threading
+
+    from django.test import AsyncRequestFactory
+
+    from configuration.api import llm_job_events
+    from configuration.jobs import _run_in_worker
+    from configuration.models import LLMJob
+
+    release = threading.Event()
+
+    def stream(model_name, message, usage):
+        yield "Hello "
+        release.wait(5)
+        yield "world"
+
+    job = LLMJob.objects.create(model_name="fake/echo", prompt="Hello")
+    worker = threading.Thread(target=_run_in_worker, args=(job.id,))
+    request = AsyncRequestFactory().get(f"/llm-jobs/{job.id}/events")
+
+    def parse(chunk):
+        kind, data = chunk.decode().strip().split("\n")
+        return kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+    async def main():
+        response = await llm_job_events(request, job.id)
+        events = aiter(response.streaming_content)
+        seen = [parse(await anext(events))]
+        # Subscribed: start the job only now so that no token is missed
+        worker.start()
+        while seen[-1][0] != "token":
+            seen.append(parse(await anext(events)))
+        status = (await LLMJob.objects.aget(id=job.id)).status
+        release.set()
+        seen.extend([parse(chunk) async for chunk in events])
+        return seen, status
+
+    with patch("configuration.jobs.stream_user_message", stream):
+        seen, status_at_first_token = asyncio.run(main())
+        worker.join(5)
+
+    assert status_at_first_token == LLMJob.Status.RUNNING
+    assert seen[0][0] == "pending"
+    tokens = [data["text"] for kind, data in seen if kind == "token"]
+    assert tokens == ["Hello ", "world"]
+    assert seen[-1][0] == "succeeded"
+    assert seen[-1][1]["answer"] == "Hello world"
+
+
+@pytest.mark.django_db
+def test_llm_job_records_real_model_exchanges_as_chats(settings):
+    from django_llm_chat.models import Chat, LLMCall, Message
+
+    from configuration.jobs import submit_llm_job
+
+    settings.LLM_JOBS_EAGER = True
+
+    def stream(model_name, message, usage):
+        yield "I am "
+        yield "an AI."
+        usage.update(prompt_tokens=5, completion_tokens=4)
+
+    with patch("configuration.jobs.stream_user_message", stream):
+        job = submit_llm_job("gpt-4", "Hi, how are you?")
+
+    assert job.answer == "I am an AI."
+    chat = Chat.objects.get()
+    assert (chat.input_tokens_count, chat.output_tokens_count) == (5, 4)
+    messages = Message.objects.filter(chat=chat).order_by("id")
+    assert [(m.type, m.text) for m in messages] == [
+        ("user", "Hi, how are you?"),
+        ("assistant", "I am an AI."),
+    ]
+    call = LLMCall.objects.get()
+    assert call.status == "generation_completed"
+    assert set(call.messages.all()) == set(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_llm_jobs_run_concurrently(fake_llm_config, settings):
+    import time
+
+    from configuration.jobs import submit_llm_job
+    from configuration.models import LLMJob
+
+    settings.FAKE_LLM_LATENCY = 0.2
+    started = time.monotonic()
+    jobs = [submit_llm_job("fake/echo", f"Hello {i}") for i in range(20)]
+
+    pending = {job.id for job in jobs}
+    while pending and time.monotonic() - started < 10:
+        pending -= set(
+            LLMJob.objects.filter(
+                id__in=pending, status=LLMJob.Status.SUCCEEDED
+            ).values_list("id", flat=True)
+        )
+        time.sleep(0.05)
+
+    assert not pending
+    # Twenty 0.2s calls run in parallel rather than back to back
+    assert time.monotonic() - started < 20 * 0.2
+
+
+@pytest.mark.django_db
+def test_llm_config_is_served_from_memory(django_assert_num_queries):
+    from configuration.models import GlobalLLMConfig
+    from configuration.resolver import llm_config
+
+    config = GlobalLLMConfig.objects.create(
+        name=GlobalLLMConfig.NameChoices.REASONING_LLM_MODEL, value="gpt-4"
+    )
+    assert llm_config.get("reasoning_llm_model") == "gpt-4"
+
+    with django_assert_num_queries(0):
+        assert llm_config.get("reasoning_llm_model") == "gpt-4"
+        assert llm_config.get("research_llm_model") is None
+
+    config.value = "gpt-5"
+    config.save()
+    assert llm_config.get("reasoning_llm_model") == "gpt-5"
+
+    config.delete()
+    assert llm_config.get("reasoning_llm_model") is None
+
+
+@pytest.mark.django_db
+def test_llm_config_snapshots_survive_invalidation(
+    monkeypatch, django_assert_num_queries
+):
+    from configuration import resolver
+    from configuration.models import GlobalLLMConfig
+    from configuration.resolver import llm_config
+
+    GlobalLLMConfig.objects.create(
+        name=GlobalLLMConfig.NameChoices.REASONING_LLM_MODEL, value="gpt-4"
+    )
+    snapshot = llm_config.snapshot()
+    llm_config.invalidate()
+    assert snapshot.values["reasoning_llm_model"] == "gpt-4"
+    assert snapshot.items == (("reasoning_llm_model", "gpt-4"),)
+
+    # A save invalidating the cache while rows are being read
+    load_rows = resolver.GlobalLLMConfig.objects.order_by
+
+    def racing_save(*args):
+        llm_config.invalidate()
+        return load_rows(*args)
+
+    with monkeypatch.context() as patched:
+        patched.setattr(resolver.GlobalLLMConfig.objects, "order_by", racing_save)
+        assert llm_config.snapshot().etag == snapshot.etag
+    with django_assert_num_queries(1):
+        assert llm_config.get("reasoning_llm_model") == "gpt-4"
+
+
+@pytest.mark.django_db
+def test_list_llm_configs_etag(client):
+    client.post("/llm-config", json={"name": "reasoning_llm_model", "value": "gpt-4"})
+
+    response = client.get("/llm-config")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "reasoning_llm_model", "value": "gpt-4"}]
+    etag = response["ETag"]
+
+    response = client.get("/llm-config", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    client.post("/llm-config", json={"name": "reasoning_llm_model", "value": "gpt-5"})
+    response = client.get("/llm-config", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 3])
+def test_routes_stay_within_query_budgets(
+    client, test_client, settings, monkeypatch, size
+):
+    from configuration.models import GlobalLLMConfig
+    from rizoner import instrumentation
+
+    # Every route is decorated with query_budget, which the tests enforce
+    settings.LLM_JOBS_EAGER = True
+    monkeypatch.setattr(instrumentation, "_enabled", None)
+    names = GlobalLLMConfig.NameChoices
+    for name in [
+        names.REASONING_LLM_MODEL,
+        names.RESEARCH_LLM_MODEL,
+        names.TOOL_CALLING_LLM_MODEL,
+    ][:size]:
+        client.post("/llm-config", json={"name": name, "value": "fake/echo"})
+
+    assert len(client.get("/llm-config").json()) == size
+    assert client.post("/test-llm-auth").json()["message"] == "Success"
+    for _ in range(size):
+        job = client.post("/llm-jobs", json={}).json()
+    assert client.get(f"/llm-jobs/{job['id']}").json()["status"] == "succeeded"
+    response = test_client.put(
+        "/configuration/request-metrics", json={"enabled": False}
+    )
+    assert response.json() == {"enabled": False}
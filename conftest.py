@@ -10,3 +10,32 @@ from ninja.testing import TestClient  # noqa: E402
 @pytest.fixture(scope="session")
 def test_client():
     return TestClient(api)
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    settings.QUERY_BUDGETS_ENFORCED = True
+
+
+@pytest.fixture(autouse=True)
+def eager_logs(settings):
+    # Buffered entries are only queued on commit, which most tests never reach
+    settings.LOG_WRITES_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def eager_embeddings(settings):
+    # Background embeddings also wait for a commit. In tests that do commit,
+    # a worker writing to the shared in-memory database would make the
+    # test's own writes fail with "database table is locked"
+    settings.EMBEDDINGS_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_config():
+    # Rolled-back test data sends no signals, so drop the cached config
+    from configuration.resolver import llm_config
+
+    llm_config.invalidate()
+    yield
+    llm_config.invalidate()
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class RizonerConfig(AppConfig):
+    name = "rizoner"
+
+    def ready(self) -> None:
+        from .db import configure_sqlite
+        from .instrumentation import install_query_recorder
+
+        connection_created.connect(configure_sqlite, dispatch_uid="configure_sqlite")
+        connection_created.connect(
+            install_query_recorder, dispatch_uid="install_query_recorder"
+        )
@@ -0,0 +1,355 @@
+"""Latency benchmarks and load tests for the Ninja API.
+
+``bench_api`` times endpoints in-process, one request after another, through
+the full Django stack against generated data in a scratch database: the
+numbers isolate the cost of the view and its SQL. ``load_api`` drives a
+running server with concurrent simulated users, so they also include the
+server, its worker model and database lock contention.
+
+Both report p50/p95/p99 latency and throughput per endpoint; ``bench_api``
+also counts SQL queries per request. Results can be saved as a JSON baseline
+and later runs compared against it: more queries than the baseline, or a p95
+more than ``tolerance`` slower, count as regressions.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import requests
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django_llm_chat.models import Chat
+from model_bakery import baker
+
+from statement.counters import reconcile_threads
+from statement.models import Statement, StatementRelationship, Thread
+from user_interface.api_client import AsyncBackendClient
+
+STATEMENTS_PER_THREAD = 100
+INSERT_BATCH_SIZE = 5000
+DEFAULT_TOLERANCE = 0.25
+
+_WORDS = (
+    "the a cats dogs markets energy policy prices rise fall because evidence "
+    "shows studies suggest more less people cities growth climate taxes "
+    "cause reduce increase never always often better worse than"
+).split()
+_RELATIONSHIP_TYPES = ["supports", "contradicts", "refines"]
+
+Results = Dict[str, Dict[str, float]]
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(_WORDS, k=rng.randint(6, 14))).capitalize()
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    # Formatted with the ``thread_id`` of a random generated thread
+    path: str
+    body: Optional[Callable[[random.Random], Dict[str, Any]]] = None
+    # Has a RAW_LIST_RESPONSES path worth timing separately
+    raw_values: bool = False
+
+    def url(self, thread_id: int) -> str:
+        return self.path.format(thread_id=thread_id)
+
+
+ENDPOINTS = {
+    endpoint.name: endpoint
+    for endpoint in [
+        Endpoint("list_threads", "GET", "/api/statement/threads", raw_values=True),
+        Endpoint(
+            "list_threads_by_activity",
+            "GET",
+            "/api/statement/threads?order=activity",
+            raw_values=True,
+        ),
+        Endpoint(
+            "list_statements",
+            "GET",
+            "/api/statement/threads/{thread_id}/statements",
+            raw_values=True,
+        ),
+        Endpoint("thread_detail", "GET", "/api/statement/threads/{thread_id}/detail"),
+        Endpoint(
+            "create_statement",
+            "POST",
+            "/api/statement/threads/{thread_id}/statements",
+            body=lambda rng: {"content": sentence(rng)},
+        ),
+    ]
+}
+
+
+def generate_dataset(
+    statements: int, per_thread: int = STATEMENTS_PER_THREAD, seed: int = 0
+) -> List[int]:
+    """Create ``statements`` statements in threads of ``per_thread``.
+
+    The first statement of each thread is its main one, and consecutive
+    statements are linked by a relationship. Rows are bulk inserted, so no
+    signals run: embeddings, signatures and logs are not generated, and the
+    thread counters are reconciled at the end. Returns the thread IDs.
+    """
+    rng = random.Random(seed)
+    chat = baker.make(Chat)
+    threads = Thread.objects.bulk_create(
+        baker.prepare(Thread, chat=chat, _quantity=max(1, -(-statements // per_thread)))
+    )
+    thread_ids = [thread.id for thread in threads]
+
+    # Whole threads per batch, so every relationship stays inside a batch
+    batch_size = per_thread * max(1, INSERT_BATCH_SIZE // per_thread)
+    for start in range(0, statements, batch_size):
+        positions = range(start, min(start + batch_size, statements))
+        with transaction.atomic():
+            batch = Statement.objects.bulk_create(
+                baker.prepare(
+                    Statement,
+                    _quantity=len(positions),
+                    thread_id=iter(thread_ids[i // per_thread] for i in positions),
+                    is_main=iter(i % per_thread == 0 for i in positions),
+                    content=iter(sentence(rng) for _ in positions),
+                )
+            )
+            edges = [(a, b) for a, b in pairwise(batch) if a.thread_id == b.thread_id]
+            if edges:
+                StatementRelationship.objects.bulk_create(
+                    baker.prepare(
+                        StatementRelationship,
+                        _quantity=len(edges),
+                        source_id=iter(a.id for a, _ in edges),
+                        target_id=iter(b.id for _, b in edges),
+                        relationship_type=iter(
+                            rng.choice(_RELATIONSHIP_TYPES) for _ in edges
+                        ),
+                    )
+                )
+    reconcile_threads()
+    return thread_ids
+
+
+@contextmanager
+def scratch_databases() -> Iterator[None]:
+    """Run the block against freshly created test databases."""
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """Percentiles in milliseconds and requests per second."""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        cuts = list(latencies) * 99 or [0.0] * 99
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+def benchmark_endpoint(
+    endpoint: Endpoint,
+    thread_ids: Sequence[int],
+    rounds: int,
+    warmup: int = 3,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """Time ``rounds`` sequential requests after ``warmup`` untimed ones.
+
+    ``queries`` is the most SQL queries any timed request made, on the
+    primary and the read replicas together.
+    """
+    aliases = [DEFAULT_DB_ALIAS, *getattr(settings, "DATABASE_READ_REPLICAS", [])]
+    client = Client()
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    queries = 0
+    elapsed = 0.0
+    for round_number in range(warmup + rounds):
+        body = endpoint.body(rng) if endpoint.body else None
+        url = endpoint.url(rng.choice(thread_ids))
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in aliases
+            ]
+            started = time.perf_counter()
+            response = client.generic(
+                endpoint.method,
+                url,
+                json.dumps(body) if body is not None else "",
+                content_type="application/json",
+            )
+            latency = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f"{endpoint.name}: HTTP {response.status_code}")
+        if round_number >= warmup:
+            latencies.append(latency)
+            elapsed += latency
+            queries = max(queries, sum(len(c) for c in captured))
+    return {**summarize(latencies, elapsed), "queries": queries}
+
+
+def run_benchmarks(
+    rows: int,
+    endpoints: Sequence[Endpoint],
+    rounds: int,
+    warmup: int = 3,
+    seed: int = 0,
+    raw: bool = False,
+) -> Results:
+    """Generate ``rows`` statements and benchmark ``endpoints`` against them.
+
+    Results are keyed ``<endpoint>@<rows>``, the format of baseline files.
+    With ``raw``, endpoints with a ``RAW_LIST_RESPONSES`` path are timed
+    again with it, keyed ``raw:<endpoint>@<rows>``.
+    """
+    thread_ids = generate_dataset(rows, seed=seed)
+    results = {
+        f"{endpoint.name}@{rows}": benchmark_endpoint(
+            endpoint, thread_ids, rounds, warmup, seed
+        )
+        for endpoint in endpoints
+    }
+    if raw:
+        with override_settings(RAW_LIST_RESPONSES=True):
+            for endpoint in endpoints:
+                if endpoint.raw_values:
+                    results[f"raw:{endpoint.name}@{rows}"] = benchmark_endpoint(
+                        endpoint, thread_ids, rounds, warmup, seed
+                    )
+    return results
+
+
+async def load_test(
+    api_url: str,
+    endpoints: Sequence[Endpoint],
+    thread_ids: Sequence[int],
+    users: int,
+    duration: float,
+    seed: int = 0,
+) -> Results:
+    """Have ``users`` concurrent users call random endpoints for ``duration``.
+
+    Each user sends its next request as soon as the previous one is answered.
+    Failed requests are counted in ``errors`` and left out of the latencies.
+    """
+    # Every user needs its own worker thread and pooled connection
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(users))
+    latencies: Dict[str, List[float]] = {endpoint.name: [] for endpoint in endpoints}
+    errors = dict.fromkeys(latencies, 0)
+    deadline = time.monotonic() + duration
+
+    async with AsyncBackendClient(api_url, pool_size=users, retries=0) as client:
+
+        async def user(number: int) -> None:
+            rng = random.Random(seed + number)
+            while time.monotonic() < deadline:
+                endpoint = rng.choice(endpoints)
+                kwargs = {"json": endpoint.body(rng)} if endpoint.body else {}
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        endpoint.method,
+                        endpoint.url(rng.choice(thread_ids)),
+                        **kwargs,
+                    )
+                except requests.RequestException:
+                    errors[endpoint.name] += 1
+                    continue
+                if response.status_code >= 400:
+                    errors[endpoint.name] += 1
+                else:
+                    latencies[endpoint.name].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(number) for number in range(users)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        name: {**summarize(latencies[name], elapsed), "errors": errors[name]}
+        for name in latencies
+    }
+
+
+def load_baseline(path: Path) -> Results:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_baseline(path: Path, results: Results) -> None:
+    """Merge ``results`` into the baseline file at ``path``."""
+    baseline = {**load_baseline(path), **results}
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def find_regressions(
+    results: Results, baseline: Results, tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Describe every result that is worse than its baseline."""
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if result.get("queries", 0) > expected.get("queries", 0):
+            regressions.append(
+                f"{key}: {result['queries']} queries, baseline {expected['queries']}"
+            )
+        if result["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: p95 {result['p95_ms']:.1f} ms, "
+                f"baseline {expected['p95_ms']:.1f} ms"
+            )
+    return regressions
+
+
+def check_baseline(
+    path: Path, results: Results, save: bool, tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Store ``results`` in the baseline if ``save``, else compare with it."""
+    if save:
+        save_baseline(path, results)
+        return []
+    return find_regressions(results, load_baseline(path), tolerance)
+
+
+def format_result(key: str, result: Dict[str, float]) -> str:
+    line = (
+        f"{key:>32}: p50 {result['p50_ms']:7.1f} ms, p95 {result['p95_ms']:7.1f} ms, "
+        f"p99 {result['p99_ms']:7.1f} ms, {result['rps']:7.0f} req/s"
+    )
+    if "queries" in result:
+        line += f", {result['queries']} queries"
+    if "errors" in result:
+        line += f", {result['errors']} errors"
+    return line
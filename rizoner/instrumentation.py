@@ -0,0 +1,424 @@
+"""Per-request timing of SQL, serialization and LLM calls.
+
+``RequestMetricsMiddleware`` measures every request while instrumentation is
+enabled: the number and total time of SQL queries, the time Ninja spends
+turning the handler's return value into a response, and the time spent
+waiting on LLM calls (wrapped in ``track_llm``). Each response gets a
+``Server-Timing`` header with these numbers, which browser dev tools show
+per request; totals are kept per route and served in the Prometheus text
+format at ``/metrics``; requests slower than ``SLOW_REQUEST_SECONDS`` are
+logged with their slowest queries.
+
+Queries are seen through an execute wrapper installed on every database
+connection, which returns straight away when no request is being measured,
+so disabled instrumentation costs one context variable lookup per query.
+The ``REQUEST_METRICS`` setting is the default; ``set_enabled`` switches
+this process at runtime. Metrics are per process.
+
+``query_budget`` caps the number of queries of a single route, so that
+tests catch queries that grow with the size of the result (N+1 queries).
+"""
+
+import heapq
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from ninja.decorators import decorate_view
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_REQUEST_SECONDS = 1.0
+TOP_QUERIES = 5
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class RequestMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    sql_seconds: float = 0.0
+    llm_seconds: float = 0.0
+    handler_done: Optional[float] = None
+    # Min-heap of the slowest ``(seconds, sql)`` pairs
+    slowest: List[Tuple[float, str]] = field(default_factory=list)
+
+    def add_query(self, seconds: float, sql: str) -> None:
+        self.queries += 1
+        self.sql_seconds += seconds
+        if len(self.slowest) < TOP_QUERIES:
+            heapq.heappush(self.slowest, (seconds, sql))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, sql))
+
+    def serialization_seconds(self, finished: float) -> float:
+        return finished - self.handler_done if self.handler_done else 0.0
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "request_metrics", default=None
+)
+_enabled: Optional[bool] = None
+
+
+def is_enabled() -> bool:
+    if _enabled is None:
+        return bool(getattr(settings, "REQUEST_METRICS", False))
+    return _enabled
+
+
+def set_enabled(enabled: Optional[bool]) -> None:
+    """Switch instrumentation in this process; ``None`` restores the setting."""
+    global _enabled
+    _enabled = enabled
+
+
+def record_query(execute: Callable, sql: str, params: Any, many: bool, context: Any):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(time.perf_counter() - started, sql)
+
+
+def install_query_recorder(sender: Any, connection: Any, **kwargs: Any) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def track_llm() -> Iterator[None]:
+    """Count the block as time spent waiting on an LLM."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.llm_seconds += time.perf_counter() - started
+
+
+def mark_handler_done(func: Callable) -> Callable:
+    """Ninja operation decorator: what follows the handler is serialization."""
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            result = await func(*args, **kwargs)
+            _mark_handler_done()
+            return result
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        result = func(*args, **kwargs)
+        _mark_handler_done()
+        return result
+
+    return wrapper
+
+
+def _mark_handler_done() -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.handler_done = time.perf_counter()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A route ran more SQL queries than its ``query_budget``."""
+
+
+def query_budget(queries: int) -> Callable[[Callable], Callable]:
+    """Cap the SQL queries of a Ninja route, serialization included.
+
+    Put it right below the ``@router.<method>`` decorator. Routes that write
+    in batches add the queries of each further batch with
+    ``allow_batched_queries``. With the ``QUERY_BUDGETS_ENFORCED`` setting
+    on (every test turns it on) a request over budget raises
+    ``QueryBudgetExceeded``; in DEBUG it is logged as a warning; otherwise
+    nothing is counted. Budgets are checked after the handler has returned,
+    and so after its transactions have committed, which is why they only
+    raise under tests. Queries made while a streamed response is read are
+    not counted.
+    """
+
+    def check(request: HttpRequest, used: int, allowed: int) -> None:
+        if used <= allowed:
+            return
+        message = (
+            f"{request.method} {request.path} ran {used} SQL queries, "
+            f"over its budget of {allowed}"
+        )
+        if _budgets_enforced():
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    def enforce(run: Callable) -> Callable:
+        if iscoroutinefunction(run):
+
+            @wraps(run)
+            async def async_wrapper(request: HttpRequest, *args: Any, **kwargs: Any):
+                if not _budgets_checked():
+                    return await run(request, *args, **kwargs)
+                with _counting_queries(queries) as (used, allowed):
+                    response = await run(request, *args, **kwargs)
+                check(request, used(), allowed())
+                return response
+
+            return async_wrapper
+
+        @wraps(run)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+            if not _budgets_checked():
+                return run(request, *args, **kwargs)
+            with _counting_queries(queries) as (used, allowed):
+                response = run(request, *args, **kwargs)
+            check(request, used(), allowed())
+            return response
+
+        return wrapper
+
+    return decorate_view(enforce)
+
+
+def allow_batched_queries(items: int, *batch_sizes: int) -> None:
+    """Add one query to the current route's budget per batch after the first.
+
+    Call it with the number of items a route writes in batches and each of
+    the batch sizes it writes them with.
+    """
+    allowance = _allowance.get()
+    if allowance is not None:
+        allowance[0] += sum(max(0, -(-items // size) - 1) for size in batch_sizes)
+
+
+def _budgets_enforced() -> bool:
+    return bool(getattr(settings, "QUERY_BUDGETS_ENFORCED", False))
+
+
+def _budgets_checked() -> bool:
+    return _budgets_enforced() or settings.DEBUG
+
+
+_allowance: ContextVar[Optional[List[int]]] = ContextVar(
+    "query_allowance", default=None
+)
+
+
+@contextmanager
+def _counting_queries(
+    budget: int,
+) -> Iterator[Tuple[Callable[[], int], Callable[[], int]]]:
+    # Share the metrics of a measured request, so both see every query
+    metrics = _current.get()
+    token = None
+    if metrics is None:
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+    allowance = [budget]
+    allowance_token = _allowance.set(allowance)
+    before = metrics.queries
+    try:
+        yield (lambda: metrics.queries - before), (lambda: allowance[0])
+    finally:
+        _allowance.reset(allowance_token)
+        if token is not None:
+            _current.reset(token)
+
+
+class MetricsRegistry:
+    """Request counters and duration histograms per route, in memory."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._requests: Dict[Tuple[str, str, int], int] = {}
+            self._counts: Dict[str, int] = {}
+            self._buckets: Dict[str, List[int]] = {}
+            self._sums: Dict[Tuple[str, str], float] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        metrics: RequestMetrics,
+        serialization: float,
+    ) -> None:
+        with self._lock:
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._counts[route] = self._counts.get(route, 0) + 1
+            buckets = self._buckets.setdefault(route, [0] * len(DURATION_BUCKETS))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+            for name, value in [
+                ("duration_seconds", duration),
+                ("sql_queries", metrics.queries),
+                ("sql_seconds", metrics.sql_seconds),
+                ("serialization_seconds", serialization),
+                ("llm_seconds", metrics.llm_seconds),
+            ]:
+                self._sums[(route, name)] = self._sums.get((route, name), 0) + value
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE rizoner_request_metrics_enabled gauge",
+            f"rizoner_request_metrics_enabled {int(is_enabled())}",
+            "# TYPE rizoner_requests_total counter",
+        ]
+        with self._lock:
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'rizoner_requests_total{{method="{method}",route="{route}",'
+                    f'status="{status}"}} {count}'
+                )
+            lines.append("# TYPE rizoner_request_duration_seconds histogram")
+            for route, buckets in sorted(self._buckets.items()):
+                count = self._counts[route]
+                for bound, observed in zip(DURATION_BUCKETS, buckets):
+                    lines.append(
+                        f"rizoner_request_duration_seconds_bucket"
+                        f'{{route="{route}",le="{bound}"}} {observed}'
+                    )
+                lines += [
+                    f'rizoner_request_duration_seconds_bucket{{route="{route}",'
+                    f'le="+Inf"}} {count}',
+                    f'rizoner_request_duration_seconds_sum{{route="{route}"}} '
+                    f"{self._sums[(route, 'duration_seconds')]}",
+                    f'rizoner_request_duration_seconds_count{{route="{route}"}} '
+                    f"{count}",
+                ]
+            for name in [
+                "sql_queries",
+                "sql_seconds",
+                "serialization_seconds",
+                "llm_seconds",
+            ]:
+                lines.append(f"# TYPE rizoner_request_{name}_total counter")
+                for route in sorted(self._buckets):
+                    lines.append(
+                        f'rizoner_request_{name}_total{{route="{route}"}} '
+                        f"{self._sums[(route, name)]}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def server_timing(
+    metrics: RequestMetrics, duration: float, serialization: float
+) -> str:
+    entries = [
+        f'db;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+        f"serialize;dur={serialization * 1000:.1f}",
+    ]
+    if metrics.llm_seconds:
+        entries.append(f"llm;dur={metrics.llm_seconds * 1000:.1f}")
+    entries.append(f"total;dur={duration * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class RequestMetricsMiddleware:
+    """Measure requests while instrumentation is enabled; see the module docs.
+
+    Put it last in ``MIDDLEWARE``, so the serialization time is not mixed
+    with the work of other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self.__acall__(request)
+        if not is_enabled():
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request: HttpRequest) -> Any:
+        if not is_enabled():
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(
+        self, request: HttpRequest, response: Any, metrics: RequestMetrics
+    ) -> Any:
+        finished = time.perf_counter()
+        duration = finished - metrics.started
+        serialization = metrics.serialization_seconds(finished)
+        response["Server-Timing"] = server_timing(metrics, duration, serialization)
+
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        registry.observe(
+            request.method or "",
+            route,
+            response.status_code,
+            duration,
+            metrics,
+            serialization,
+        )
+        threshold = getattr(
+            settings, "SLOW_REQUEST_SECONDS", DEFAULT_SLOW_REQUEST_SECONDS
+        )
+        if duration >= threshold:
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries in %.0f ms, "
+                "serialization %.0f ms, LLM %.0f ms. Slowest queries:\n%s",
+                request.method,
+                request.get_full_path(),
+                duration * 1000,
+                metrics.queries,
+                metrics.sql_seconds * 1000,
+                serialization * 1000,
+                metrics.llm_seconds * 1000,
+                "\n".join(
+                    f"  {seconds * 1000:.1f} ms: {sql}"
+                    for seconds, sql in sorted(metrics.slowest, reverse=True)
+                ),
+            )
+        return response
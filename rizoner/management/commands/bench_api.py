@@ -0,0 +1,87 @@
+"""Latency benchmark of the API endpoints at several data sizes.
+
+For each ``--rows`` size a scratch database is created and filled with
+generated threads, statements and relationships, then every endpoint is
+called ``--rounds`` times in-process. The configured databases are not
+touched. See ``rizoner.benchmark`` for the details.
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import djclick as click
+
+from rizoner.benchmark import (
+    DEFAULT_TOLERANCE,
+    ENDPOINTS,
+    check_baseline,
+    format_result,
+    run_benchmarks,
+    scratch_databases,
+)
+
+
+@click.command()
+@click.option(
+    "--rows",
+    type=int,
+    multiple=True,
+    default=[10_000],
+    help="Statements to generate; repeat for several sizes.",
+)
+@click.option(
+    "--endpoint",
+    "names",
+    type=click.Choice(list(ENDPOINTS)),
+    multiple=True,
+    help="Endpoints to time; repeat for several. Default: all.",
+)
+@click.option("--rounds", type=int, default=50, help="Timed requests per endpoint.")
+@click.option("--warmup", type=int, default=3, help="Untimed requests first.")
+@click.option(
+    "--raw",
+    is_flag=True,
+    help="Also time the list endpoints with RAW_LIST_RESPONSES.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="JSON baseline to compare with; fails on regressions.",
+)
+@click.option("--save", is_flag=True, help="Store the results in --baseline.")
+@click.option(
+    "--tolerance",
+    type=float,
+    default=DEFAULT_TOLERANCE,
+    help="Allowed p95 slowdown over the baseline, as a fraction.",
+)
+def command(
+    rows: Tuple[int, ...],
+    names: Tuple[str, ...],
+    rounds: int,
+    warmup: int,
+    raw: bool,
+    baseline: Optional[Path],
+    save: bool,
+    tolerance: float,
+) -> None:
+    """Time API endpoints against generated data in a scratch database."""
+    if save and baseline is None:
+        raise click.UsageError("--save needs --baseline.")
+    endpoints = [ENDPOINTS[name] for name in names or ENDPOINTS]
+    results = {}
+    for size in rows:
+        click.echo(f"Generating {size} statements...")
+        with scratch_databases():
+            size_results = run_benchmarks(size, endpoints, rounds, warmup, raw=raw)
+        for key, result in size_results.items():
+            click.echo(format_result(key, result))
+        results.update(size_results)
+
+    if baseline is not None:
+        regressions = check_baseline(baseline, results, save, tolerance)
+        if regressions:
+            raise click.ClickException(
+                "Worse than the baseline:\n" + "\n".join(regressions)
+            )
+        click.echo(f"{'Saved' if save else 'Compared'} the baseline {baseline}")
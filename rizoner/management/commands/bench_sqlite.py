@@ -0,0 +1,151 @@
+"""Concurrency benchmark for the SQLite database profiles.
+
+Runs parallel reader and writer threads against a scratch database file, once
+with SQLite's defaults and once with the production pragmas, and reports
+throughput and lock errors for each. The workload mimics the API: writers
+insert one statement per transaction, readers fetch a thread's statements.
+"""
+
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping
+
+import djclick as click
+
+from rizoner.db import PRODUCTION_PRAGMAS, apply_pragmas
+
+PROFILES: Dict[str, Mapping[str, Any]] = {
+    "default": {},
+    "production": PRODUCTION_PRAGMAS,
+}
+THREADS = 100
+SEED_ROWS = 10_000
+
+_SCHEMA = [
+    """
+    CREATE TABLE statement (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        thread_id INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX statement_thread_idx ON statement (thread_id, created_at)",
+]
+
+
+def _connect(path: Path, pragmas: Mapping[str, Any]) -> sqlite3.Connection:
+    # Autocommit mode, so transactions are exactly the BEGINs issued below
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    apply_pragmas(connection, pragmas)
+    return connection
+
+
+def _seed(path: Path, pragmas: Mapping[str, Any]) -> None:
+    connection = _connect(path, pragmas)
+    for sql in _SCHEMA:
+        connection.execute(sql)
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO statement (thread_id, content, created_at) "
+        "VALUES (?, ?, datetime('now'))",
+        ((i % THREADS, f"Statement {i}") for i in range(SEED_ROWS)),
+    )
+    connection.execute("COMMIT")
+    connection.close()
+
+
+def run_benchmark(
+    path: Path,
+    pragmas: Mapping[str, Any],
+    readers: int,
+    writers: int,
+    duration: float,
+) -> Dict[str, float]:
+    """Run the workload on a fresh database at ``path`` and summarize it."""
+    _seed(path, pragmas)
+    deadline = time.monotonic() + duration
+    lock = threading.Lock()
+    reads: List[float] = []
+    writes: List[float] = []
+    errors = 0
+
+    def work(write: bool) -> None:
+        nonlocal errors
+        connection = _connect(path, pragmas)
+        latencies = []
+        failed = 0
+        while time.monotonic() < deadline:
+            thread_id = random.randrange(THREADS)
+            start = time.perf_counter()
+            try:
+                if write:
+                    connection.execute("BEGIN IMMEDIATE")
+                    connection.execute(
+                        "INSERT INTO statement (thread_id, content, created_at) "
+                        "VALUES (?, 'benchmark', datetime('now'))",
+                        (thread_id,),
+                    )
+                    connection.execute("COMMIT")
+                else:
+                    connection.execute(
+                        "SELECT id, content FROM statement WHERE thread_id = ? "
+                        "ORDER BY created_at LIMIT 50",
+                        (thread_id,),
+                    ).fetchall()
+            except sqlite3.OperationalError:
+                failed += 1
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                continue
+            latencies.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            (writes if write else reads).extend(latencies)
+            errors += failed
+
+    workers = [threading.Thread(target=work, args=(False,)) for _ in range(readers)]
+    workers += [threading.Thread(target=work, args=(True,)) for _ in range(writers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    def p95(latencies: List[float]) -> float:
+        if len(latencies) < 2:
+            return sum(latencies) * 1000
+        return statistics.quantiles(latencies, n=20)[-1] * 1000
+
+    return {
+        "reads_per_s": len(reads) / duration,
+        "writes_per_s": len(writes) / duration,
+        "read_p95_ms": p95(reads),
+        "write_p95_ms": p95(writes),
+        "errors": errors,
+    }
+
+
+@click.command()
+@click.option("--readers", type=int, default=8, help="Parallel reader threads.")
+@click.option("--writers", type=int, default=4, help="Parallel writer threads.")
+@click.option("--duration", type=float, default=5.0, help="Seconds per profile.")
+def command(readers: int, writers: int, duration: float) -> None:
+    """Compare SQLite throughput with and without the production pragmas."""
+    click.echo(f"{readers} readers, {writers} writers, {duration}s per profile")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, pragmas in PROFILES.items():
+            result = run_benchmark(
+                Path(directory) / f"{name}.sqlite3", pragmas, readers, writers, duration
+            )
+            click.echo(
+                f"{name:>10}: {result['reads_per_s']:9.0f} reads/s "
+                f"(p95 {result['read_p95_ms']:.1f} ms), "
+                f"{result['writes_per_s']:7.0f} writes/s "
+                f"(p95 {result['write_p95_ms']:.1f} ms), "
+                f"{result['errors']} lock errors"
+            )
@@ -0,0 +1,91 @@
+"""Load test of a running API server with concurrent simulated users.
+
+Requests go to the threads the server already has; ``--seed`` first fills
+the configured database with generated data, which the server must share.
+See ``rizoner.benchmark`` for the details.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Optional, Tuple
+
+import djclick as click
+
+from rizoner.benchmark import (
+    DEFAULT_TOLERANCE,
+    ENDPOINTS,
+    check_baseline,
+    format_result,
+    generate_dataset,
+    load_test,
+)
+from user_interface.backend_logic import fetch_threads_page
+
+
+@click.command()
+@click.option(
+    "--api-url", default="http://localhost:8000", help="Base URL of the server."
+)
+@click.option("--users", type=int, default=20, help="Concurrent simulated users.")
+@click.option("--duration", type=float, default=30.0, help="Seconds to run.")
+@click.option(
+    "--endpoint",
+    "names",
+    type=click.Choice(list(ENDPOINTS)),
+    multiple=True,
+    help="Endpoints to call; repeat for several. Default: all.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=0,
+    help="Generate this many statements in the configured database first.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="JSON baseline to compare with; fails on regressions.",
+)
+@click.option("--save", is_flag=True, help="Store the results in --baseline.")
+@click.option(
+    "--tolerance",
+    type=float,
+    default=DEFAULT_TOLERANCE,
+    help="Allowed p95 slowdown over the baseline, as a fraction.",
+)
+def command(
+    api_url: str,
+    users: int,
+    duration: float,
+    names: Tuple[str, ...],
+    seed: int,
+    baseline: Optional[Path],
+    save: bool,
+    tolerance: float,
+) -> None:
+    """Measure latency and throughput of a running server under load."""
+    if save and baseline is None:
+        raise click.UsageError("--save needs --baseline.")
+    if seed:
+        click.echo(f"Generating {seed} statements...")
+        generate_dataset(seed)
+    threads, _ = fetch_threads_page(api_url)
+    if not threads:
+        raise click.ClickException("The server has no threads; use --seed.")
+
+    endpoints = [ENDPOINTS[name] for name in names or ENDPOINTS]
+    click.echo(f"{users} users for {duration}s against {api_url}")
+    results = asyncio.run(
+        load_test(api_url, endpoints, [t["id"] for t in threads], users, duration)
+    )
+    results = {f"load:{key}@{users}": result for key, result in results.items()}
+    for key, result in results.items():
+        click.echo(format_result(key, result))
+
+    if baseline is not None:
+        regressions = check_baseline(baseline, results, save, tolerance)
+        if regressions:
+            raise click.ClickException(
+                "Worse than the baseline:\n" + "\n".join(regressions)
+            )
+        click.echo(f"{'Saved' if save else 'Compared'} the baseline {baseline}")
@@ -0,0 +1,57 @@
+"""Send selected reads to read replicas and everything else to the primary.
+
+Reads only go to a replica inside ``replica_reads()``, which list endpoints
+use as a decorator: replicas lag behind the primary, so endpoints that must
+see a write they just made keep reading from it. Reads inside a transaction
+on the primary also stay there. ``DATABASE_READ_REPLICAS`` lists the replica
+aliases; when it is empty every query goes to ``default``.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Let reads in this block (or decorated view) use a replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def _replicas(self) -> List[str]:
+        return list(getattr(settings, "DATABASE_READ_REPLICAS", []))
+
+    def db_for_read(self, model: Any, **hints: Any) -> Optional[str]:
+        replicas = self._replicas()
+        if (
+            replicas
+            and _replica_reads.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model: Any, **hints: Any) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> Optional[bool]:
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *self._replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool:
+        # Replicas get their schema from the primary
+        return db == DEFAULT_DB_ALIAS
@@ -21,13 +21,17 @@ from ninja import NinjaAPI
 
 from statement.api import router as statement_router
 from configuration.api import router as configuration_router
+from rizoner.instrumentation import mark_handler_done, metrics_view
+from rizoner.renderers import FastJSONRenderer
 
 
-api = NinjaAPI()
+api = NinjaAPI(renderer=FastJSONRenderer())
 api.add_router("/statement/", statement_router)
 api.add_router("/configuration/", configuration_router)
+api.add_decorator(mark_handler_done)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", api.urls),
+    path("metrics", metrics_view),
 ]
@@ -0,0 +1,275 @@
+"""In-process cache of per-thread relationship graphs.
+
+Each thread's graph is stored in compressed sparse row (CSR) form: statement
+IDs are mapped to dense indices and the neighbours of index ``i`` live in
+``targets[offsets[i]:offsets[i + 1]]``. Relationship types are interned into
+small integer codes. Graphs are kept in an LRU bounded by an approximate
+memory budget and invalidated by the signal handlers in ``statement.signals``.
+
+A graph also holds the statements of other threads that its relationships
+point to or come from, but not those statements' own relationships. Walks
+that reach one of them cannot be answered from the cache.
+"""
+
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .graph import MAX_NODES, Direction
+from .models import Statement, StatementRelationship
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+Edge = Tuple[int, int, str]
+
+
+def _csr(
+    size: int, pairs: Sequence[Tuple[int, int, int]]
+) -> Tuple[array, array, array]:
+    offsets = array("q", bytes(8 * (size + 1)))
+    for row, _, _ in pairs:
+        offsets[row + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    targets = array("q", bytes(8 * len(pairs)))
+    codes = array("H", bytes(2 * len(pairs)))
+    cursor = array("q", offsets[:-1])
+    for row, column, code in pairs:
+        targets[cursor[row]] = column
+        codes[cursor[row]] = code
+        cursor[row] += 1
+    return offsets, targets, codes
+
+
+class ThreadGraph:
+    """Immutable CSR adjacency of one thread's statements and relationships."""
+
+    def __init__(self, statement_ids: Iterable[int], edges: Iterable[Edge]):
+        edges = list(edges)
+        members = set(statement_ids)
+        node_ids = set(members)
+        for source, target, _ in edges:
+            node_ids.update((source, target))
+
+        self.ids = array("q", sorted(node_ids))
+        self.index: Dict[int, int] = {pk: i for i, pk in enumerate(self.ids)}
+        # 1 for statements of other threads, whose other edges are not loaded
+        self.foreign = array("B", (pk not in members for pk in self.ids))
+        self.type_names: List[str] = []
+        type_codes: Dict[str, int] = {}
+
+        forward = []
+        for source, target, relationship_type in edges:
+            code = type_codes.setdefault(relationship_type, len(type_codes))
+            if code == len(self.type_names):
+                self.type_names.append(relationship_type)
+            forward.append((self.index[source], self.index[target], code))
+        backward = [(target, source, code) for source, target, code in forward]
+
+        self._out = _csr(len(self.ids), forward)
+        self._in = _csr(len(self.ids), backward)
+        self.nbytes = (
+            sum(
+                sys.getsizeof(a)
+                for a in (self.ids, self.foreign, *self._out, *self._in)
+            )
+            + sys.getsizeof(self.index)
+            + 2 * sys.getsizeof(0) * len(self.index)
+            + sum(sys.getsizeof(name) for name in self.type_names)
+        )
+
+    @classmethod
+    def load(cls, thread_id: int) -> "ThreadGraph":
+        statement_ids = Statement.objects.filter(thread_id=thread_id).values_list(
+            "id", flat=True
+        )
+        edges = StatementRelationship.objects.values_list(
+            "source_id", "target_id", "relationship_type"
+        )
+        # Two indexed lookups instead of one OR across joins, which can't use
+        # an index; the union also keeps edges that cross into other threads.
+        return cls(
+            statement_ids,
+            edges.filter(source__thread_id=thread_id).union(
+                edges.filter(target__thread_id=thread_id)
+            ),
+        )
+
+    def __contains__(self, statement_id: int) -> bool:
+        return statement_id in self.index
+
+    def _type_codes(self, types: Optional[Sequence[str]]) -> Optional[Set[int]]:
+        if not types:
+            return None
+        return {i for i, name in enumerate(self.type_names) if name in types}
+
+    def _steps(
+        self, node: int, direction: Direction, codes: Optional[Set[int]]
+    ) -> Iterable[Tuple[int, int]]:
+        sides = {"out": (self._out,), "in": (self._in,), "both": (self._out, self._in)}
+        for offsets, targets, type_codes in sides[direction]:
+            for j in range(offsets[node], offsets[node + 1]):
+                if codes is None or type_codes[j] in codes:
+                    yield targets[j], type_codes[j]
+
+    def neighbors(
+        self,
+        statement_id: int,
+        direction: Direction = "out",
+        types: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[int, str]]:
+        node = self.index.get(statement_id)
+        if node is None:
+            return []
+        return [
+            (self.ids[other], self.type_names[code])
+            for other, code in self._steps(node, direction, self._type_codes(types))
+        ]
+
+    def reachable(
+        self,
+        statement_id: int,
+        depth: int,
+        types: Optional[Sequence[str]] = None,
+        direction: Direction = "out",
+        limit: int = MAX_NODES,
+    ) -> Optional[List[Tuple[int, int]]]:
+        """Breadth-first equivalent of ``statement.graph.reachable``.
+
+        Returns ``None`` when the walk starts outside the thread or reaches a
+        statement of another thread: its edges are not in this graph, so the
+        result could miss statements that the recursive CTE finds.
+        """
+        start = self.index.get(statement_id)
+        if start is None or self.foreign[start]:
+            return None
+
+        codes = self._type_codes(types)
+        distances = {start: 0}
+        frontier = [start]
+        for distance in range(1, depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for other, _ in self._steps(node, direction, codes):
+                    if other not in distances:
+                        if self.foreign[other]:
+                            return None
+                        distances[other] = distance
+                        next_frontier.append(other)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        reached = sorted((d, self.ids[node]) for node, d in distances.items())
+        return [(pk, d) for d, pk in reached[:limit]]
+
+    def edges_between(
+        self, statement_ids: Iterable[int], types: Optional[Sequence[str]] = None
+    ) -> List[Edge]:
+        nodes = {self.index[pk] for pk in statement_ids if pk in self.index}
+        codes = self._type_codes(types)
+        return [
+            (self.ids[node], self.ids[other], self.type_names[code])
+            for node in sorted(nodes)
+            for other, code in self._steps(node, "out", codes)
+            if other in nodes
+        ]
+
+
+class AdjacencyCache:
+    """Thread-safe LRU of ``ThreadGraph`` objects bounded by ``max_bytes``."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._graphs: "OrderedDict[int, ThreadGraph]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a graph loaded concurrently with a
+        # write is not cached with stale contents.
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+    def __contains__(self, thread_id: int) -> bool:
+        return thread_id in self._graphs
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, thread_id: int) -> ThreadGraph:
+        with self._lock:
+            graph = self._graphs.get(thread_id)
+            if graph is not None:
+                self._graphs.move_to_end(thread_id)
+                return graph
+            generation = self._generation
+
+        graph = ThreadGraph.load(thread_id)
+        with self._lock:
+            self._pop(thread_id)
+            if generation == self._generation and graph.nbytes <= self.max_bytes:
+                self._graphs[thread_id] = graph
+                self._bytes += graph.nbytes
+                while self._bytes > self.max_bytes:
+                    self._pop(next(iter(self._graphs)))
+        return graph
+
+    def invalidate(self, thread_id: Optional[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            self._pop(thread_id)
+
+    def invalidate_statements(self, *statement_ids: int) -> None:
+        """Drop every cached graph that contains any of ``statement_ids``."""
+        with self._lock:
+            self._generation += 1
+            stale = [
+                thread_id
+                for thread_id, graph in self._graphs.items()
+                if any(pk in graph for pk in statement_ids)
+            ]
+            for thread_id in stale:
+                self._pop(thread_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._graphs.clear()
+            self._bytes = 0
+
+    def _pop(self, thread_id: Optional[int]) -> None:
+        graph = self._graphs.pop(thread_id, None)
+        if graph is not None:
+            self._bytes -= graph.nbytes
+
+
+adjacency_cache = AdjacencyCache(
+    getattr(settings, "STATEMENT_ADJACENCY_CACHE_BYTES", DEFAULT_CACHE_BYTES)
+)
+
+
+def invalidate_graphs(
+    thread_id: Optional[int] = None, statement_ids: Iterable[int] = ()
+) -> None:
+    """Drop cached graphs affected by a write to ``thread_id``/``statement_ids``.
+
+    Entries are dropped immediately so the writing transaction reads its own
+    writes, and again on commit in case another request cached the
+    pre-commit graph in the meantime.
+    """
+    statement_ids = tuple(statement_ids)
+
+    def invalidate() -> None:
+        adjacency_cache.invalidate(thread_id)
+        adjacency_cache.invalidate_statements(*statement_ids)
+
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -1,6 +1,46 @@
-from django.shortcuts import get_object_or_404
-from ninja import Router, ModelSchema, Schema
-from .models import Thread, Log, Statement
+from datetime import datetime
+from itertools import batched
+from typing import Dict, List, Literal, Optional
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Prefetch, prefetch_related_objects
+from django.db.models.lookups import Exact
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from ninja import Field, Query, Router, ModelSchema, Schema
+from ninja.errors import HttpError
+from rizoner.instrumentation import allow_batched_queries, query_budget
+from rizoner.renderers import raw_list_responses, schema_fields, values_response
+from rizoner.routers import replica_reads
+from .adjacency import adjacency_cache, invalidate_graphs
+from .conditional import collection_etag, make_etag, not_modified
+from .counters import record_activity
+from .dedupe import SIGN_BATCH_SIZE, find_duplicates, sign_statements, simhash
+from .embeddings import EMBED_BATCH_SIZE, embed_on_commit, similar_statements
+from .events import event_stream, publish_on_commit, publish_statements
+from .events import relationship_data, sse_response
+from .expressions import JSONKeyText
+from .graph import MAX_DEPTH, MAX_NODES, MAX_PATH_DEPTH, Direction
+from .graph import reachable, shortest_path
+from .logbuffer import log_event
+from .models import Thread, Log, Statement, StatementRelationship
+from .ndjson import (
+    dumps_line,
+    iter_ndjson,
+    ndjson_response,
+    parse_bulk_body,
+    STREAM_CHUNK_SIZE,
+)
+from .search import search_statements as full_text_search
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    keyset_page,
+    keyset_queryset,
+    row_value,
+)
 
 router = Router()
 
@@ -8,20 +48,73 @@ router = Router()
 class ThreadSchema(ModelSchema):
     class Meta:
         model = Thread
-        fields = ["id", "chat", "created_at", "updated_at"]
+        fields = [
+            "id",
+            "chat",
+            "created_at",
+            "updated_at",
+            "statement_count",
+            "relationship_count",
+            "last_activity_at",
+            "main_statement_preview",
+        ]
+
+
+ThreadOrder = Literal["created", "activity"]
+THREAD_ORDER_FIELDS = {"created": "created_at", "activity": "last_activity_at"}
 
 
 @router.get("/threads", response=list[ThreadSchema])
-def list_threads(request):
-    return Thread.objects.all()
+@query_budget(1)
+@replica_reads()
+def list_threads(
+    request,
+    response: HttpResponse,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    order: ThreadOrder = Query(
+        "created",
+        description="Oldest first (created) or most recently active first "
+        "(activity). Threads that become active while paging move to the front, "
+        "so later pages may skip or repeat them.",
+    ),
+):
+    field = THREAD_ORDER_FIELDS[order]
+    threads = keyset_queryset(
+        Thread.objects.all(), cursor, field, descending=order == "activity"
+    )
+    if stream:
+        # NDJSON mode ignores ``limit`` and streams every thread after ``cursor``.
+        # The stream is read after the view returns, so pin the database now.
+        return ndjson_response(iter_ndjson(ThreadSchema, threads.using(threads.db)))
+
+    raw = raw_list_responses()
+    if raw:
+        threads = threads.values(*schema_fields(ThreadSchema))
+    page, next_cursor = keyset_page(threads, limit, field)
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    etag = make_etag(
+        [(row_value(t, "id"), row_value(t, "updated_at")) for t in page], next_cursor
+    )
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return values_response(response, page) if raw else page
 
 
 @router.get("/threads/{thread_id}", response=ThreadSchema)
-def get_thread(request, thread_id: int):
-    return get_object_or_404(Thread, id=thread_id)
+@query_budget(1)
+def get_thread(request, response: HttpResponse, thread_id: int):
+    thread = get_object_or_404(Thread, id=thread_id)
+    etag = make_etag(thread.id, thread.updated_at)
+    return not_modified(request, response, etag, thread.updated_at) or thread
 
 
 @router.post("/threads", response=ThreadSchema)
+# Includes the queries django_llm_chat makes to create the chat
+@query_budget(5)
 def create_thread(request):
     from django_llm_chat.chat import Chat as ChatService
 
@@ -31,9 +124,9 @@ def create_thread(request):
     # Create a new thread linked to this chat session
     thread = Thread.objects.create(chat=chat_service.chat_db_model)
 
-    Log.objects.create(
-        thread=thread,
-        details={
+    log_event(
+        thread.id,
+        {
             "action": "Created",
             "entity_type": "New Thread",
             "entity_id": thread.id,
@@ -54,29 +147,593 @@ class StatementOutSchema(ModelSchema):
 
 
 @router.get("/threads/{thread_id}/statements", response=list[StatementOutSchema])
-def list_statements(request, thread_id: int):
+@query_budget(3)
+@replica_reads()
+def list_statements(request, response: HttpResponse, thread_id: int):
     thread = get_object_or_404(Thread, id=thread_id)
-    return thread.statements.all()
+    statements = thread.statements.all()
+    unchanged = not_modified(request, response, collection_etag(statements))
+    if unchanged:
+        return unchanged
+    # Evaluated here, inside replica_reads, rather than by the serializer
+    if raw_list_responses():
+        return values_response(
+            response, statements.values(*schema_fields(StatementOutSchema))
+        )
+    return list(statements)
 
 
-@router.post("/threads/{thread_id}/statements", response=StatementOutSchema)
-def create_statement(request, thread_id: int, payload: StatementInSchema):
-    thread = get_object_or_404(Thread, id=thread_id)
+class StatementCreatedSchema(StatementOutSchema):
+    duplicate_of: Optional[int] = None
 
-    statement = Statement.objects.create(
-        thread=thread,
-        content=payload.content,
-        is_main=payload.is_main,
-    )
+
+OnDuplicate = Literal["flag", "skip", "reject"]
+ON_DUPLICATE_HELP = (
+    "What to do with a statement that nearly repeats one already in the thread: "
+    "create it and report the original in duplicate_of (flag), return the "
+    "original instead (skip) or fail with 409 (reject)."
+)
+
+
+@router.post("/threads/{thread_id}/statements", response=StatementCreatedSchema)
+@query_budget(10)
+def create_statement(
+    request,
+    thread_id: int,
+    payload: StatementInSchema,
+    on_duplicate: OnDuplicate = Query("flag", description=ON_DUPLICATE_HELP),
+):
+    try:
+        with transaction.atomic():
+            # Locking the thread keeps a concurrent write from saving a
+            # duplicate between the lookup and the insert
+            thread = get_object_or_404(Thread.objects.select_for_update(), id=thread_id)
+            duplicate = find_duplicates(thread.id, [payload.content])[0]
+            if duplicate and on_duplicate == "reject":
+                raise HttpError(409, f"Duplicate of statement {duplicate.statement_id}")
+            if duplicate and on_duplicate == "skip":
+                original = get_object_or_404(Statement, id=duplicate.statement_id)
+                original.duplicate_of = original.id
+                return original
+
+            statement = Statement.objects.create(
+                thread=thread,
+                content=payload.content,
+                is_main=payload.is_main,
+            )
+    except IntegrityError:
+        raise HttpError(409, "This thread already has a main statement")
 
     if statement.is_main:
-        Log.objects.create(
-            thread=thread,
-            details={
+        log_event(
+            thread.id,
+            {
                 "action": "Created",
                 "entity_type": "Main Statement",
                 "entity_id": statement.id,
             },
         )
 
+    statement.duplicate_of = duplicate.statement_id if duplicate else None
     return statement
+
+
+BULK_BATCH_SIZE = 1000
+BULK_OPENAPI_EXTRA = {
+    "requestBody": {
+        "content": {
+            "application/json": {"schema": {"type": "array"}},
+            "application/x-ndjson": {"schema": {"type": "string"}},
+        }
+    }
+}
+
+
+class BulkStatementsOutSchema(Schema):
+    ids: List[int]
+    duplicate_of: List[Optional[int]]
+
+
+@router.post(
+    "/threads/{thread_id}/statements/bulk",
+    response=BulkStatementsOutSchema,
+    openapi_extra=BULK_OPENAPI_EXTRA,
+)
+@query_budget(11)
+def create_statements_bulk(
+    request,
+    thread_id: int,
+    on_duplicate: OnDuplicate = Query("flag", description=ON_DUPLICATE_HELP),
+):
+    """Create many statements in one transaction from a JSON array or NDJSON body.
+
+    Items are also checked against the earlier items of the same body, so
+    ``ids`` and ``duplicate_of`` always line up with the request items.
+    """
+    payloads = parse_bulk_body(request, StatementInSchema)
+    allow_batched_queries(len(payloads), SIGN_BATCH_SIZE)
+    try:
+        with transaction.atomic():
+            # Locking the thread keeps a concurrent write from saving a
+            # duplicate or a main statement between the checks and the insert
+            thread = get_object_or_404(Thread.objects.select_for_update(), id=thread_id)
+            contents = [payload.content for payload in payloads]
+            hashes = [simhash(content) for content in contents]
+            duplicates = find_duplicates(thread.id, contents, hashes)
+            if on_duplicate == "reject" and any(duplicates):
+                index, duplicate = next((i, d) for i, d in enumerate(duplicates) if d)
+                if duplicate.statement_id is not None:
+                    original = f"statement {duplicate.statement_id}"
+                else:
+                    original = f"item {duplicate.index}"
+                raise HttpError(409, f"Item {index} is a duplicate of {original}")
+            if on_duplicate == "skip":
+                payloads_to_create = [
+                    p for p, d in zip(payloads, duplicates) if d is None
+                ]
+                hashes = [h for h, d in zip(hashes, duplicates) if d is None]
+            else:
+                payloads_to_create = payloads
+
+            main_count = sum(payload.is_main for payload in payloads_to_create)
+            if main_count > 1:
+                raise HttpError(
+                    409, "Only one statement per thread can be the main statement"
+                )
+
+            statements = [
+                Statement(
+                    thread=thread, content=payload.content, is_main=payload.is_main
+                )
+                for payload in payloads_to_create
+            ]
+            allow_batched_queries(
+                len(statements), BULK_BATCH_SIZE, EMBED_BATCH_SIZE, SIGN_BATCH_SIZE
+            )
+            if main_count and thread.statements.filter(is_main=True).exists():
+                raise HttpError(409, "This thread already has a main statement")
+            Statement.objects.bulk_create(statements, batch_size=BULK_BATCH_SIZE)
+            # bulk_create() doesn't send post_save
+            invalidate_graphs(thread.id)
+            embed_on_commit(statements)
+            sign_statements(statements, hashes)
+            publish_statements(statements)
+            if statements:
+                record_activity(
+                    thread.id,
+                    max(statement.updated_at for statement in statements),
+                    statements=len(statements),
+                    refresh_preview=main_count > 0,
+                )
+            for statement in statements:
+                if statement.is_main:
+                    log_event(
+                        thread.id,
+                        {
+                            "action": "Created",
+                            "entity_type": "Main Statement",
+                            "entity_id": statement.id,
+                        },
+                    )
+    except IntegrityError:
+        # A main statement created concurrently, after the check
+        raise HttpError(409, "This thread already has a main statement")
+
+    created = iter(statements)
+    ids: List[int] = []
+    duplicate_of: List[Optional[int]] = []
+    for duplicate in duplicates:
+        original = None
+        if duplicate is not None:
+            original = duplicate.statement_id
+            if original is None:
+                original = ids[duplicate.index]
+        if on_duplicate == "skip" and original is not None:
+            ids.append(original)
+        else:
+            ids.append(next(created).id)
+        duplicate_of.append(original)
+    return {"ids": ids, "duplicate_of": duplicate_of}
+
+
+class ThreadDetailSchema(Schema):
+    thread: ThreadSchema
+    main_statement: Optional[StatementOutSchema] = None
+    statements: list[StatementOutSchema]
+    statement_count: int
+    next_cursor: Optional[str] = None
+    relationship_counts: Dict[str, int]
+
+
+@router.get("/threads/{thread_id}/detail", response=ThreadDetailSchema)
+@query_budget(7)
+def get_thread_detail(
+    request,
+    response: HttpResponse,
+    thread_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    thread = get_object_or_404(Thread, id=thread_id)
+    edges = StatementRelationship.objects.filter(source__thread=thread)
+    etag = collection_etag(
+        thread.statements.all(),
+        thread.updated_at,
+        edges.aggregate(count=Count("id"), latest=Max("id")),
+    )
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+
+    prefetch_related_objects(
+        [thread],
+        Prefetch(
+            "statements",
+            queryset=Statement.objects.filter(is_main=True),
+            to_attr="main_statements",
+        ),
+    )
+    other_statements = thread.statements.filter(is_main=False)
+    statements, next_cursor = keyset_page(
+        keyset_queryset(other_statements, cursor), limit
+    )
+    relationship_counts = (
+        edges.values("relationship_type").annotate(count=Count("id")).order_by()
+    )
+
+    return {
+        "thread": thread,
+        "main_statement": next(iter(thread.main_statements), None),
+        "statements": statements,
+        "statement_count": other_statements.count(),
+        "next_cursor": next_cursor,
+        "relationship_counts": {
+            row["relationship_type"]: row["count"] for row in relationship_counts
+        },
+    }
+
+
+@router.get("/threads/{thread_id}/events")
+@query_budget(1)
+async def thread_events(request, thread_id: int):
+    """Server-Sent Events stream of the thread's changes, from now on.
+
+    Every committed statement, relationship and log entry is sent as one
+    ``statement``, ``relationship`` or ``log`` event whose data has the same
+    fields as the matching list endpoint. Needs an ASGI server, e.g.
+    ``uvicorn rizoner.asgi:application``.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would buffer the endless stream instead of sending it
+        raise HttpError(501, "Event streams need the app to be served over ASGI")
+    await aget_object_or_404(Thread, id=thread_id)
+    return sse_response(event_stream(thread_id))
+
+
+class LogSchema(ModelSchema):
+    class Meta:
+        model = Log
+        fields = ["id", "thread", "details", "created_at"]
+
+
+@router.get("/threads/{thread_id}/logs", response=list[LogSchema])
+@query_budget(2)
+@replica_reads()
+def list_thread_logs(
+    request,
+    response: HttpResponse,
+    thread_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+):
+    """A thread's audit log, oldest first, one keyset page at a time.
+
+    ``action`` and ``entity_type`` match the keys of the same name in
+    ``details``; ``since`` skips entries created before that time.
+    """
+    thread = get_object_or_404(Thread, id=thread_id)
+    logs = thread.logs.all()
+    # Same expressions as the Log indexes, so the filters can use them
+    if action is not None:
+        logs = logs.filter(Exact(JSONKeyText("details", "action"), action))
+    if entity_type is not None:
+        logs = logs.filter(Exact(JSONKeyText("details", "entity_type"), entity_type))
+    if since is not None:
+        logs = logs.filter(created_at__gte=since)
+
+    raw = raw_list_responses()
+    if raw:
+        logs = logs.values(*schema_fields(LogSchema))
+    page, next_cursor = keyset_page(keyset_queryset(logs, cursor), limit)
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    return values_response(response, page) if raw else page
+
+
+class RelationshipInSchema(Schema):
+    source: int
+    target: int
+    relationship_type: str = Field("", max_length=255)
+
+
+class BulkRelationshipsOutSchema(Schema):
+    received: int
+    created: int
+
+
+@router.post(
+    "/threads/{thread_id}/relationships/bulk",
+    response=BulkRelationshipsOutSchema,
+    openapi_extra=BULK_OPENAPI_EXTRA,
+)
+@query_budget(8)
+def import_relationships(request, thread_id: int):
+    """Upsert relationship edges between statements of a thread.
+
+    Edges that already exist are left untouched, so re-importing the same
+    graph is a no-op.
+    """
+    payloads = parse_bulk_body(request, RelationshipInSchema)
+
+    referenced = {p.source for p in payloads} | {p.target for p in payloads}
+    sources = {p.source for p in payloads}
+    keys = {(p.source, p.target, p.relationship_type) for p in payloads}
+    allow_batched_queries(len(referenced), BULK_BATCH_SIZE)
+    allow_batched_queries(len(payloads), BULK_BATCH_SIZE)
+    # The edges out of the sources are read before and after the insert
+    allow_batched_queries(len(sources), BULK_BATCH_SIZE, BULK_BATCH_SIZE)
+
+    def edges_out_of_sources():
+        for ids in batched(sorted(sources), BULK_BATCH_SIZE):
+            yield StatementRelationship.objects.filter(source_id__in=ids)
+
+    with transaction.atomic():
+        # Locking the thread keeps concurrent imports from adding the same
+        # edges between the two reads, which would count them twice
+        thread = get_object_or_404(Thread.objects.select_for_update(), id=thread_id)
+        known = set()
+        for ids in batched(referenced, BULK_BATCH_SIZE):
+            known.update(
+                thread.statements.filter(id__in=ids).values_list("id", flat=True)
+            )
+        unknown = referenced - known
+        if unknown:
+            raise HttpError(
+                422, f"Statements not found in this thread: {sorted(unknown)[:20]}"
+            )
+
+        existed = {
+            key
+            for edges in edges_out_of_sources()
+            for key in edges.values_list("source_id", "target_id", "relationship_type")
+        }
+        StatementRelationship.objects.bulk_create(
+            [
+                StatementRelationship(
+                    source_id=payload.source,
+                    target_id=payload.target,
+                    relationship_type=payload.relationship_type,
+                )
+                for payload in payloads
+            ],
+            batch_size=BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        invalidate_graphs(thread.id, known)
+        # ignore_conflicts leaves IDs unset, so read back the edges that are
+        # in the body and weren't there before
+        new_keys = keys - existed
+        created = sorted(
+            (
+                relationship
+                for edges in edges_out_of_sources()
+                for relationship in edges
+                if (
+                    relationship.source_id,
+                    relationship.target_id,
+                    relationship.relationship_type,
+                )
+                in new_keys
+            ),
+            key=lambda relationship: relationship.id,
+        )
+        if created:
+            record_activity(
+                thread.id,
+                max(relationship.created_at for relationship in created),
+                relationships=len(created),
+            )
+        for relationship in created:
+            publish_on_commit(
+                thread.id, "relationship", relationship_data(relationship)
+            )
+
+    return {"received": len(payloads), "created": len(created)}
+
+
+class RelationshipGraphSchema(Schema):
+    source: List[int]
+    target: List[int]
+    relationship_type: List[str]
+
+
+@router.get("/threads/{thread_id}/relationships", response=RelationshipGraphSchema)
+@query_budget(2)
+def export_relationships(
+    request, thread_id: int, format: Literal["columnar", "ndjson"] = "columnar"
+):
+    """Export a thread's relationship graph as a compact edge list.
+
+    ``columnar`` returns one array per field; ``ndjson`` streams one
+    ``[source, target, relationship_type]`` array per line.
+    """
+    thread = get_object_or_404(Thread, id=thread_id)
+    edges = (
+        StatementRelationship.objects.filter(source__thread=thread)
+        .order_by("id")
+        .values_list("source_id", "target_id", "relationship_type")
+    )
+
+    if format == "ndjson":
+        return ndjson_response(
+            dumps_line(edge) for edge in edges.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        )
+
+    graph: Dict[str, List] = {"source": [], "target": [], "relationship_type": []}
+    for source, target, relationship_type in edges:
+        graph["source"].append(source)
+        graph["target"].append(target)
+        graph["relationship_type"].append(relationship_type)
+    return graph
+
+
+class StatementSearchResultSchema(Schema):
+    id: int
+    thread: Optional[int] = None
+    content: str
+    is_main: bool
+    snippet: str
+    rank: float
+
+
+@router.get("/statements/search", response=List[StatementSearchResultSchema])
+@query_budget(1)
+def search_statements(
+    request,
+    q: str,
+    thread_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Full-text search over statement content, best matches first."""
+    return full_text_search(q, thread_id, limit)
+
+
+MAX_SIMILAR = 100
+
+
+class SimilarStatementSchema(Schema):
+    id: int
+    thread: Optional[int] = None
+    content: str
+    is_main: bool
+    score: float
+
+
+@router.get("/statements/{statement_id}/similar", response=List[SimilarStatementSchema])
+@query_budget(4)
+def get_similar_statements(
+    request, statement_id: int, k: int = Query(10, ge=1, le=MAX_SIMILAR)
+):
+    """The ``k`` statements, from any thread, closest in meaning to this one.
+
+    ``score`` is the cosine similarity of the two embeddings, 1 for the same
+    wording and around 0 for unrelated content.
+    """
+    statement = get_object_or_404(Statement, id=statement_id)
+    return similar_statements(statement, k)
+
+
+class GraphNodeSchema(Schema):
+    id: int
+    content: str
+    is_main: bool
+    distance: int
+
+
+class GraphEdgeSchema(Schema):
+    source: int
+    target: int
+    relationship_type: str
+
+
+class StatementGraphSchema(Schema):
+    root: int
+    nodes: List[GraphNodeSchema]
+    edges: List[GraphEdgeSchema]
+    truncated: bool
+
+
+@router.get("/statements/{statement_id}/graph", response=StatementGraphSchema)
+# Four when served from the adjacency cache, six when the walk leaves the thread
+@query_budget(6)
+def get_statement_graph(
+    request,
+    statement_id: int,
+    depth: int = Query(2, ge=1, le=MAX_DEPTH),
+    types: List[str] = Query(None),
+    direction: Direction = "both",
+    limit: int = Query(MAX_NODES, ge=1, le=MAX_NODES),
+):
+    """Return the neighbourhood of a statement within ``depth`` hops.
+
+    ``direction=in`` collects the statements pointing at this one
+    (e.g. everything that transitively supports it), ``out`` the ones it
+    points at and ``both`` ignores edge direction.
+    """
+    statement = get_object_or_404(Statement, id=statement_id)
+
+    reached = None
+    if statement.thread_id is not None:
+        # Hot threads are served from the in-memory adjacency cache, unless
+        # the walk crosses into another thread
+        graph = adjacency_cache.get(statement.thread_id)
+        reached = graph.reachable(statement_id, depth, types, direction, limit + 1)
+    cached = reached is not None
+    if not cached:
+        reached = reachable(statement_id, depth, types, direction, limit + 1)
+    truncated = len(reached) > limit
+    distances = dict(reached[:limit])
+
+    statements = Statement.objects.in_bulk(list(distances))
+    if not cached:
+        edges = StatementRelationship.objects.filter(
+            source_id__in=list(distances), target_id__in=list(distances)
+        )
+        if types:
+            edges = edges.filter(relationship_type__in=types)
+        edge_rows = edges.order_by("id").values_list(
+            "source_id", "target_id", "relationship_type"
+        )
+    else:
+        edge_rows = graph.edges_between(distances, types)
+
+    return {
+        "root": statement_id,
+        "nodes": [
+            {
+                "id": pk,
+                "content": statements[pk].content,
+                "is_main": statements[pk].is_main,
+                "distance": distance,
+            }
+            for pk, distance in distances.items()
+        ],
+        "edges": [
+            {"source": source, "target": target, "relationship_type": relationship_type}
+            for source, target, relationship_type in edge_rows
+        ],
+        "truncated": truncated,
+    }
+
+
+class StatementPathSchema(Schema):
+    path: Optional[List[int]] = None
+
+
+@router.get("/statements/{statement_id}/path", response=StatementPathSchema)
+# The two lookups, then one query per level of the breadth-first search
+@query_budget(2 + MAX_PATH_DEPTH)
+def get_statement_path(
+    request,
+    statement_id: int,
+    to: int,
+    max_depth: int = Query(MAX_PATH_DEPTH, ge=1, le=MAX_PATH_DEPTH),
+    types: List[str] = Query(None),
+    direction: Direction = "out",
+):
+    get_object_or_404(Statement, id=statement_id)
+    get_object_or_404(Statement, id=to)
+    return {"path": shortest_path(statement_id, to, max_depth, types, direction)}
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class StatementConfig(AppConfig):
     name = "statement"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,66 @@
+"""Conditional GET support (``ETag``/``Last-Modified``) for read endpoints.
+
+Validators are derived from ``updated_at`` so clients can revalidate cached
+bodies with ``If-None-Match`` and get an empty 304 when nothing changed.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Optional
+
+from django.db.models import Count, Max, QuerySet
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over ``parts``, quoted for HTTP headers."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def collection_etag(queryset: QuerySet, *parts: Any) -> str:
+    """ETag of every row in ``queryset`` from one aggregate query.
+
+    The row count is part of the tag because deleting a row doesn't move
+    ``MAX(updated_at)``.
+    """
+    state = queryset.order_by().aggregate(count=Count("id"), latest=Max("updated_at"))
+    return make_etag(state["count"], state["latest"], *parts)
+
+
+def not_modified(
+    request,
+    response: HttpResponse,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[HttpResponseNotModified]:
+    """Set the validators on ``response``; return a 304 if the client is current.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since``, as in
+    RFC 9110. Only pass ``last_modified`` for single rows: deletes from a
+    collection don't change its newest ``updated_at``.
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    for name, value in headers.items():
+        response[name] = value
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if etag in etags or "*" in etags:
+            return HttpResponseNotModified(headers=headers)
+        return None
+
+    if_modified_since = parse_http_date_safe(
+        request.headers.get("If-Modified-Since", "")
+    )
+    if (
+        last_modified is not None
+        and if_modified_since is not None
+        and int(last_modified.timestamp()) <= if_modified_since
+    ):
+        return HttpResponseNotModified(headers=headers)
+    return None
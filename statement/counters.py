@@ -0,0 +1,184 @@
+"""Counters and summaries denormalized onto ``Thread``.
+
+Thread listings show how many statements and relationships a thread has,
+when it was last active and the start of its main statement. Computed per
+row, those take aggregate subqueries over three tables; stored on the thread
+they cost nothing to read and let ``GET /threads`` page by activity through
+an index.
+
+Writers keep them current with a single ``UPDATE`` of ``F()`` expressions, so
+concurrent writes never lose an increment. Model signals cover ``save()`` and
+``delete()``; code that bypasses them (``bulk_create``, ``QuerySet.update``,
+raw SQL) calls ``record_activity`` itself. Moving a statement to another
+thread is not tracked. ``reconcile_threads`` (the ``reconcile_thread_counters``
+command) recomputes everything from the source tables and repairs any drift.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from django.apps import apps as global_apps
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest, Substr
+from django.utils import timezone
+
+from .models import Statement, Thread
+
+PREVIEW_LENGTH = 200
+
+
+def _preview(statement_model: Any) -> Substr:
+    main = statement_model.objects.filter(thread=OuterRef("pk"), is_main=True)
+    return Substr(
+        Coalesce(Subquery(main.values("content")[:1]), Value("")), 1, PREVIEW_LENGTH
+    )
+
+
+def _adjust(field: str, delta: int) -> Any:
+    # Never below zero, even if the stored count has drifted low
+    return Greatest(F(field) + delta, 0) if delta < 0 else F(field) + delta
+
+
+def _record(
+    threads: QuerySet,
+    at: Optional[datetime],
+    statements: int,
+    relationships: int,
+    refresh_preview: bool,
+) -> None:
+    # updated_at moves too, so ETags and Last-Modified of the thread change
+    updates: Dict[str, Any] = {"updated_at": timezone.now()}
+    if at is not None:
+        updates["last_activity_at"] = Greatest("last_activity_at", Value(at))
+    if statements:
+        updates["statement_count"] = _adjust("statement_count", statements)
+    if relationships:
+        updates["relationship_count"] = _adjust("relationship_count", relationships)
+    if refresh_preview:
+        updates["main_statement_preview"] = _preview(Statement)
+    threads.update(**updates)
+
+
+def record_activity(
+    thread_id: Optional[int],
+    at: Optional[datetime] = None,
+    statements: int = 0,
+    relationships: int = 0,
+    refresh_preview: bool = False,
+) -> None:
+    """Add to a thread's counts and move its activity forward to ``at``.
+
+    ``refresh_preview`` re-reads the main statement, for writes that may have
+    created, changed or removed it.
+    """
+    if thread_id is not None:
+        _record(
+            Thread.objects.filter(id=thread_id),
+            at,
+            statements,
+            relationships,
+            refresh_preview,
+        )
+
+
+def record_latest_activity(latest: Dict[int, datetime]) -> None:
+    """Move the activity of many threads forward with one ``UPDATE``.
+
+    ``latest`` maps thread IDs to the time of their newest write.
+    """
+    if latest:
+        at = Case(
+            *(When(id=thread_id, then=Value(at)) for thread_id, at in latest.items())
+        )
+        Thread.objects.filter(id__in=list(latest)).update(
+            last_activity_at=Greatest("last_activity_at", at),
+            updated_at=timezone.now(),
+        )
+
+
+def record_relationship_activity(
+    source_id: int, at: Optional[datetime] = None, relationships: int = 0
+) -> None:
+    """Like ``record_activity``, for the thread of the statement ``source_id``."""
+    _record(Thread.objects.filter(statements=source_id), at, 0, relationships, False)
+
+
+def expected_values(apps: Any = global_apps) -> Dict[str, Any]:
+    """Expressions recomputing the maintained fields of each ``Thread`` row.
+
+    Activity only ever moves forward, so it is the latest of the stored value
+    and of the thread's rows: deleting rows does not make a thread older.
+    """
+    statement_model = apps.get_model("statement", "Statement")
+    relationship_model = apps.get_model("statement", "StatementRelationship")
+    log_model = apps.get_model("statement", "Log")
+
+    statements = statement_model.objects.filter(thread=OuterRef("pk")).values("thread")
+    relationships = relationship_model.objects.filter(
+        source__thread=OuterRef("pk")
+    ).values("source__thread")
+    logs = log_model.objects.filter(thread=OuterRef("pk")).values("thread")
+
+    def count(rows: QuerySet) -> Coalesce:
+        return Coalesce(Subquery(rows.annotate(n=Count("pk")).values("n")), 0)
+
+    def latest(rows: QuerySet, field: str) -> Coalesce:
+        # Greatest() is NULL on SQLite if any argument is
+        return Coalesce(
+            Subquery(rows.annotate(latest=Max(field)).values("latest")),
+            F("last_activity_at"),
+        )
+
+    return {
+        "statement_count": count(statements.order_by()),
+        "relationship_count": count(relationships.order_by()),
+        "last_activity_at": Greatest(
+            "last_activity_at",
+            latest(statements.order_by(), "updated_at"),
+            latest(relationships.order_by(), "created_at"),
+            latest(logs.order_by(), "created_at"),
+        ),
+        "main_statement_preview": _preview(statement_model),
+    }
+
+
+def reconcile_threads(
+    thread_ids: Optional[Iterable[int]] = None,
+    dry_run: bool = False,
+    apps: Any = global_apps,
+) -> int:
+    """Recompute the maintained fields and return how many threads had drifted.
+
+    Only drifted threads are written. Pass the historical ``apps`` when
+    calling from a migration.
+    """
+    thread_model = apps.get_model("statement", "Thread")
+    threads = thread_model.objects.all()
+    if thread_ids is not None:
+        threads = threads.filter(id__in=list(thread_ids))
+
+    expected = expected_values(apps)
+    in_sync = Q()
+    for field in expected:
+        in_sync &= Q(**{field: F(f"expected_{field}")})
+    drifted = threads.alias(
+        **{f"expected_{field}": value for field, value in expected.items()}
+    ).exclude(in_sync)
+
+    drifted_ids = list(drifted.values_list("id", flat=True))
+    if drifted_ids and not dry_run:
+        thread_model.objects.filter(id__in=drifted_ids).update(
+            **expected, updated_at=timezone.now()
+        )
+    return len(drifted_ids)
@@ -0,0 +1,373 @@
+"""Near-duplicate detection for statements within a thread.
+
+Every statement gets a 64-bit SimHash of its lower-cased character trigrams,
+ignoring punctuation and spacing. Re-wordings that change case, punctuation,
+an inflection or a small word land within ``MAX_DISTANCE`` bits of each
+other. Negations ("is" / "is not") weigh as much as all the trigrams
+together, so negating a statement moves its hash far from the original.
+Swapped or opposite words ("better" / "worse") barely change the trigrams,
+so such statements can still be reported as near-duplicates.
+
+The hash is stored in ``StatementSignature`` split into eight 8-bit bands.
+Two hashes at most seven bits apart agree on at least one whole band, and
+most hashes up to ``MAX_DISTANCE`` bits apart still do, so the candidates for
+a new statement come from indexed equality lookups rather than a scan of the
+thread, and are then confirmed on the full Hamming distance.
+"""
+
+import hashlib
+import re
+from itertools import batched
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .adjacency import invalidate_graphs
+from .counters import reconcile_threads
+from .logbuffer import log_event
+from .models import Statement, StatementRelationship, StatementSignature
+
+BANDS = 8
+BAND_BITS = 64 // BANDS
+# Most rewordings measured 0-12 bits apart. Up to seven differing bits are
+# sure to leave one of the eight bands untouched.
+MAX_DISTANCE = 12
+SIGN_BATCH_SIZE = 1000
+_MASK = 2**64 - 1
+
+_WORD = re.compile(r"\w+")
+_CONTRACTIONS = [
+    (re.compile(r"\bcan['’]?t\b|\bcannot\b"), "can not"),
+    (re.compile(r"\bwon['’]t\b"), "will not"),
+    (re.compile(r"n['’]t\b"), " not"),
+]
+_NEGATIONS = frozenset(
+    "not no never nor none neither nobody nothing nowhere without".split()
+)
+
+
+def _features(text: str) -> Dict[str, int]:
+    """Weighted SimHash features: the trigrams, and the negations if any."""
+    text = text.lower()
+    for contraction, expanded in _CONTRACTIONS:
+        text = contraction.sub(expanded, text)
+    words = _WORD.findall(text)
+    normalized = " ".join(words)
+    trigrams = zip(normalized, normalized[1:], normalized[2:])
+    features = dict.fromkeys({"".join(chars) for chars in trigrams} or {normalized}, 1)
+    negations = sorted(word for word in words if word in _NEGATIONS)
+    if negations:
+        features[f"\0{' '.join(negations)}"] = len(features)
+    return features
+
+
+def simhash(text: str) -> int:
+    """Unsigned 64-bit SimHash of ``text``'s weighted features."""
+    features = _features(text)
+    keys = sorted(features)
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+            for key in keys
+        ],
+        dtype="<u8",
+    )
+    weights = np.array([features[key] for key in keys], dtype=np.int64)
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(keys), 64)
+    votes = weights @ (2 * bits.astype(np.int64) - 1)
+    return int(np.packbits(votes > 0).view("<u8")[0])
+
+
+def distance(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+def bands(value: int) -> Tuple[int, ...]:
+    mask = 2**BAND_BITS - 1
+    return tuple((value >> (i * BAND_BITS)) & mask for i in range(BANDS))
+
+
+def _signed(value: int) -> int:
+    # BigIntegerField is signed 64-bit
+    return value - 2**64 if value >= 2**63 else value
+
+
+def signature_of(
+    statement: Statement, value: Optional[int] = None
+) -> StatementSignature:
+    """Signature of a saved statement, from its ``simhash`` if already known."""
+    if value is None:
+        value = simhash(statement.content)
+    return StatementSignature(
+        statement_id=statement.pk,
+        thread_id=statement.thread_id,
+        simhash=_signed(value),
+        **{f"band_{i}": band for i, band in enumerate(bands(value))},
+    )
+
+
+def sign_statements(
+    statements: Sequence[Statement], hashes: Optional[Sequence[int]] = None
+) -> None:
+    """Store (or replace) the signatures of saved ``statements``.
+
+    ``hashes`` are their SimHashes, when the caller has computed them already.
+    """
+    if hashes is None:
+        hashes = [None] * len(statements)
+    StatementSignature.objects.bulk_create(
+        [
+            signature_of(statement, value)
+            for statement, value in zip(statements, hashes)
+        ],
+        batch_size=SIGN_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["statement"],
+        update_fields=["thread", "simhash", *(f"band_{i}" for i in range(BANDS))],
+    )
+
+
+class _BandIndex:
+    """Hashes grouped by band, for finding the ones near a hash without a scan.
+
+    Each hash is added with a rank. A band's hashes and ranks are kept in
+    growable numpy arrays, so the distances to all of them are computed in
+    one vectorized step rather than one ``distance()`` call each: many
+    statements made from one template share a band.
+    """
+
+    def __init__(self) -> None:
+        self._groups: Dict[Tuple[int, int], List] = {}
+
+    def add(self, value: int, rank: int) -> None:
+        for key in enumerate(bands(value)):
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = [
+                    np.empty(4, dtype=np.uint64),
+                    np.empty(4, dtype=np.int64),
+                    0,
+                ]
+            values, ranks, size = group
+            if size == len(values):
+                values = group[0] = np.resize(values, 2 * size)
+                ranks = group[1] = np.resize(ranks, 2 * size)
+            values[size] = value
+            ranks[size] = rank
+            group[2] = size + 1
+
+    def near(self, value: int) -> np.ndarray:
+        """Ranks of the hashes at most ``MAX_DISTANCE`` bits from ``value``."""
+        found = []
+        target = np.uint64(value)
+        for key in enumerate(bands(value)):
+            group = self._groups.get(key)
+            if group is not None:
+                values, ranks, size = group
+                close = np.bitwise_count(values[:size] ^ target) <= MAX_DISTANCE
+                found.append(ranks[:size][close])
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+class Duplicate(NamedTuple):
+    """What a new statement duplicates: a saved statement or an earlier item."""
+
+    statement_id: Optional[int] = None
+    index: Optional[int] = None
+
+
+def find_duplicates(
+    thread_id: Optional[int],
+    contents: Sequence[str],
+    hashes: Optional[Sequence[int]] = None,
+) -> List[Optional[Duplicate]]:
+    """Check a batch of new statement contents for near-duplicates in a thread.
+
+    Each item is matched against the thread's saved statements, preferring
+    the oldest, and then against the earlier items of the batch. The
+    candidates are fetched with one query per ``SIGN_BATCH_SIZE`` items.
+    Pass ``hashes`` if the contents' SimHashes are already computed.
+    Callers that act on the result should hold the thread's write lock, so
+    that no duplicate is saved between the lookup and their write.
+    """
+    if thread_id is None or not contents:
+        return [None] * len(contents)
+
+    if hashes is None:
+        hashes = [simhash(content) for content in contents]
+    saved: Dict[int, int] = {}
+    for batch in batched(set(hashes), SIGN_BATCH_SIZE):
+        lookup = Q()
+        for i in range(BANDS):
+            lookup |= Q(**{f"band_{i}__in": {bands(value)[i] for value in batch}})
+        saved.update(
+            StatementSignature.objects.filter(lookup, thread_id=thread_id).values_list(
+                "statement_id", "simhash"
+            )
+        )
+
+    # Ranks order the matches oldest first: saved statements by ID, then the
+    # items of the batch. Identical hashes are indexed once, under the
+    # oldest, which is then also the oldest match of every later copy.
+    index = _BandIndex()
+    owners: List[Duplicate] = []
+    first: Dict[int, int] = {}
+    for statement_id, value in sorted(saved.items()):
+        value &= _MASK
+        if value not in first:
+            first[value] = len(owners)
+            index.add(value, len(owners))
+            owners.append(Duplicate(statement_id))
+
+    oldest: Dict[int, Optional[int]] = {}
+    duplicates: List[Optional[Duplicate]] = []
+    for position, value in enumerate(hashes):
+        if value in oldest:
+            rank = oldest[value]
+        else:
+            near = index.near(value)
+            rank = int(near.min()) if len(near) else None
+            if value not in first:
+                first[value] = len(owners)
+                index.add(value, len(owners))
+                owners.append(Duplicate(index=position))
+            oldest[value] = first[value] if rank is None else rank
+        duplicates.append(None if rank is None else owners[rank])
+    return duplicates
+
+
+def find_duplicate(thread_id: Optional[int], content: str) -> Optional[int]:
+    """ID of the oldest near-duplicate of ``content`` saved in the thread."""
+    match = find_duplicates(thread_id, [content])[0]
+    return match.statement_id if match else None
+
+
+def duplicate_groups(thread_id: int) -> List[List[int]]:
+    """Groups of mutually near-duplicate statements in a thread, oldest first.
+
+    Transitive: if a ~ b and b ~ c, all three are one group. Statements
+    saved without a signature are hashed here, and the hash is not stored.
+    """
+    parent: Dict[int, int] = {}
+
+    def root(statement_id: int) -> int:
+        while parent[statement_id] != statement_id:
+            parent[statement_id] = parent[parent[statement_id]]
+            statement_id = parent[statement_id]
+        return statement_id
+
+    hashes = list(
+        StatementSignature.objects.filter(thread_id=thread_id).values_list(
+            "statement_id", "simhash"
+        )
+    )
+    unsigned = Statement.objects.filter(thread_id=thread_id, signature__isnull=True)
+    hashes += [
+        (pk, simhash(content)) for pk, content in unsigned.values_list("id", "content")
+    ]
+
+    index = _BandIndex()
+    ids: List[int] = []
+    for statement_id, value in sorted(hashes):
+        parent[statement_id] = statement_id
+        value &= _MASK
+        for rank in np.unique(index.near(value)).tolist():
+            parent[root(statement_id)] = root(ids[rank])
+        index.add(value, len(ids))
+        ids.append(statement_id)
+
+    groups: Dict[int, List[int]] = {}
+    for statement_id in parent:
+        groups.setdefault(root(statement_id), []).append(statement_id)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+def merge_statements(keep: Statement, duplicate_ids: Iterable[int]) -> None:
+    """Move the relationships of ``duplicate_ids`` onto ``keep``, then delete them.
+
+    Edges that would become self-loops or already exist on ``keep`` are dropped.
+    """
+    duplicate_ids = [pk for pk in duplicate_ids if pk != keep.pk]
+    with transaction.atomic():
+        # Locking the statements keeps edges from being added to them before
+        # they are deleted; locking their edges keeps them from changing
+        list(
+            Statement.objects.select_for_update()
+            .filter(id__in=[keep.pk, *duplicate_ids])
+            .values_list("id", flat=True)
+        )
+        edges = (
+            StatementRelationship.objects.select_for_update()
+            .filter(Q(source_id__in=duplicate_ids) | Q(target_id__in=duplicate_ids))
+            .values_list("source_id", "target_id", "relationship_type")
+        )
+        merged = {
+            (
+                keep.pk if source in duplicate_ids else source,
+                keep.pk if target in duplicate_ids else target,
+                relationship_type,
+            )
+            for source, target, relationship_type in edges
+        }
+        StatementRelationship.objects.bulk_create(
+            [
+                StatementRelationship(
+                    source_id=source, target_id=target, relationship_type=kind
+                )
+                for source, target, kind in sorted(merged)
+                if source != target
+            ],
+            ignore_conflicts=True,
+        )
+        Statement.objects.filter(id__in=duplicate_ids).delete()
+        invalidate_graphs(keep.thread_id, [keep.pk, *duplicate_ids])
+        # bulk_create() skips the counter signals and, ignoring conflicts,
+        # doesn't say how many edges it added
+        if keep.thread_id is not None:
+            reconcile_threads([keep.thread_id])
+        for duplicate_id in duplicate_ids:
+            log_event(
+                keep.thread_id,
+                {
+                    "action": "Merged",
+                    "entity_type": "Duplicate Statement",
+                    "entity_id": duplicate_id,
+                    "merged_into": keep.pk,
+                },
+            )
+
+
+def sign_unsigned_statements(thread_id: Optional[int] = None) -> int:
+    """Store signatures for statements saved before signatures existed."""
+    statements = Statement.objects.filter(signature__isnull=True).order_by("id")
+    if thread_id is not None:
+        statements = statements.filter(thread_id=thread_id)
+    signed = 0
+    while batch := list(statements[:SIGN_BATCH_SIZE]):
+        sign_statements(batch)
+        signed += len(batch)
+    return signed
+
+
+def deduplicate_thread(thread_id: int, dry_run: bool = False) -> List[List[int]]:
+    """Merge every group of near-duplicates in a thread into one statement.
+
+    The main statement is kept if it is in a group, otherwise the oldest.
+    Returns the groups, each with the kept statement first.
+    """
+    groups = duplicate_groups(thread_id)
+    main_ids = set(
+        Statement.objects.filter(
+            thread_id=thread_id, is_main=True, id__in=[pk for g in groups for pk in g]
+        ).values_list("id", flat=True)
+    )
+    ordered = [
+        sorted(group, key=lambda pk: (pk not in main_ids, pk)) for group in groups
+    ]
+    if not dry_run:
+        statements = Statement.objects.in_bulk([group[0] for group in ordered])
+        for keep_id, *duplicate_ids in ordered:
+            merge_statements(statements[keep_id], duplicate_ids)
+    return ordered
@@ -0,0 +1,350 @@
+"""Vector embeddings of ``Statement.content`` for semantic similarity search.
+
+An embedder turns texts into unit-length float32 vectors, so the dot product
+of two vectors is their cosine similarity. ``STATEMENT_EMBEDDING_MODEL`` picks
+one:
+
+* ``hashing`` (or ``hashing-<dimensions>``) hashes words and word pairs into
+  a fixed number of buckets. It needs no model, corpus statistics or network
+  access, so it works offline and gives the same vector in every process.
+* Anything else is an LLM provider embedding model, e.g.
+  ``openai/text-embedding-3-small``, called through litellm.
+
+Vectors are stored packed in ``StatementEmbedding``. Writes only schedule
+them with ``embed_on_commit``: once the transaction commits, a small thread
+pool computes and stores them, so statement writes neither wait on a
+provider nor fail with it. Failed or lost (e.g. at shutdown) embeddings are
+logged and left to ``manage.py embed_statements``, which backfills every
+statement without a vector. Set ``EMBEDDINGS_EAGER = True`` to embed inline
+instead (e.g. in tests). Searches run against an in-memory
+``EmbeddingIndex``: one dense matrix scored with a single matrix-vector
+product, which stays in the low milliseconds up to a few hundred thousand
+statements without the recall loss of an approximate index.
+"""
+
+import logging
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import batched, pairwise
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Statement, StatementEmbedding
+
+HASHING_MODEL = "hashing"
+DEFAULT_HASHING_DIMENSIONS = 256
+EMBED_BATCH_SIZE = 256
+EMBEDDING_WORKERS = 2
+# Rows committed by other processes can carry an updated_at slightly older
+# than our last sync; re-read that much history on every sync
+SYNC_OVERLAP = timedelta(seconds=5)
+
+_TOKEN = re.compile(r"\w+")
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder(Protocol):
+    name: str
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray: ...
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length; all-zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32)
+
+
+class HashingEmbedder:
+    """Signed feature hashing of lower-cased words and adjacent word pairs."""
+
+    def __init__(self, dimensions: int = DEFAULT_HASHING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"{HASHING_MODEL}-{dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            for feature in [*words, *(f"{a} {b}" for a, b in pairwise(words))]:
+                # crc32 rather than hash(), which is salted per process
+                code = zlib.crc32(feature.encode())
+                sign = 1 if code & 0x80000000 else -1
+                vectors[row, code % self.dimensions] += sign
+        # Damp repeated words, like the sublinear tf of TF-IDF
+        return normalize(np.sign(vectors) * np.log1p(np.abs(vectors)))
+
+
+class LLMEmbedder:
+    """Embeddings from an LLM provider model, through litellm."""
+
+    def __init__(self, model_name: str):
+        self.name = model_name
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        import litellm
+
+        # Providers cap the number of inputs per request
+        vectors = []
+        for chunk in batched(texts, EMBED_BATCH_SIZE):
+            response = litellm.embedding(model=self.name, input=list(chunk))
+            vectors.extend(item["embedding"] for item in response.data)
+        return normalize(np.array(vectors, dtype=np.float32))
+
+
+@lru_cache
+def _embedder(model_name: str) -> Embedder:
+    if model_name == HASHING_MODEL:
+        return HashingEmbedder()
+    if model_name.startswith(f"{HASHING_MODEL}-"):
+        return HashingEmbedder(int(model_name.removeprefix(f"{HASHING_MODEL}-")))
+    return LLMEmbedder(model_name)
+
+
+def get_embedder() -> Embedder:
+    return _embedder(getattr(settings, "STATEMENT_EMBEDDING_MODEL", HASHING_MODEL))
+
+
+def to_blob(vector: np.ndarray) -> bytes:
+    return vector.astype("<f4").tobytes()
+
+
+def from_blob(blob: Any) -> np.ndarray:
+    # Postgres returns BinaryField values as memoryview, SQLite as bytes
+    return np.frombuffer(blob, dtype="<f4")
+
+
+class EmbeddingIndex:
+    """Thread-safe in-memory matrix of the stored vectors of one model.
+
+    Rows live in a preallocated matrix that doubles when full; removing a
+    row moves the last row into its slot, so the used rows stay contiguous.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, statement_id: int) -> bool:
+        return statement_id in self._rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self.model: Optional[str] = None
+            self._ids: List[int] = []
+            self._rows: Dict[int, int] = {}
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._synced_at: Optional[datetime] = None
+
+    def sync(self, model: str) -> None:
+        """Load the vectors of ``model`` written since the previous sync.
+
+        This picks up writes from other processes; writes in this process
+        are also applied directly by ``embed_statements``.
+        """
+        if model != self.model:
+            self.clear()
+        started_at = timezone.now()
+        rows = StatementEmbedding.objects.filter(model=model)
+        if self._synced_at is not None:
+            rows = rows.filter(updated_at__gte=self._synced_at - SYNC_OVERLAP)
+        ids, vectors = [], []
+        for statement_id, blob in rows.values_list("statement_id", "vector").iterator(
+            chunk_size=EMBED_BATCH_SIZE * 8
+        ):
+            ids.append(statement_id)
+            vectors.append(from_blob(blob))
+        with self._lock:
+            self.model = model
+            self._synced_at = started_at
+        if ids:
+            self.add(ids, np.vstack(vectors))
+
+    def add(self, statement_ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert or replace the vectors of ``statement_ids``."""
+        with self._lock:
+            needed = len(self._ids) + len(statement_ids)
+            if self._matrix.shape[1] != vectors.shape[1]:
+                self._matrix = np.zeros((needed, vectors.shape[1]), dtype=np.float32)
+                self._ids, self._rows = [], {}
+            elif needed > len(self._matrix):
+                grown = np.zeros(
+                    (max(needed, 2 * len(self._matrix)), vectors.shape[1]),
+                    dtype=np.float32,
+                )
+                grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+                self._matrix = grown
+            for statement_id, vector in zip(statement_ids, vectors):
+                row = self._rows.get(statement_id)
+                if row is None:
+                    row = self._rows[statement_id] = len(self._ids)
+                    self._ids.append(statement_id)
+                self._matrix[row] = vector
+
+    def remove(self, statement_ids: Iterable[int]) -> None:
+        with self._lock:
+            for statement_id in statement_ids:
+                row = self._rows.pop(statement_id, None)
+                if row is None:
+                    continue
+                last_id = self._ids.pop()
+                if last_id != statement_id:
+                    self._ids[row] = last_id
+                    self._rows[last_id] = row
+                    self._matrix[row] = self._matrix[len(self._ids)]
+
+    def vector(self, statement_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(statement_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def search(
+        self, vector: np.ndarray, k: int, exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """The ``k`` most similar statements as ``(id, cosine similarity)``."""
+        exclude = set(exclude)
+        with self._lock:
+            size = len(self._ids)
+            if not size or vector.shape[0] != self._matrix.shape[1]:
+                return []
+            scores = self._matrix[:size] @ vector
+            wanted = min(k + len(exclude), size)
+            # Partial selection of the top rows, then sort only those
+            top = np.argpartition(-scores, wanted - 1)[:wanted]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            matches = [(self._ids[row], float(scores[row])) for row in top]
+        return [match for match in matches if match[0] not in exclude][:k]
+
+
+embedding_index = EmbeddingIndex()
+
+
+def embed_statements(statements: Sequence[Statement]) -> np.ndarray:
+    """Compute and store the embeddings of ``statements``.
+
+    The in-memory index is updated once the transaction commits. Returns the
+    vectors in the order of ``statements``.
+    """
+    embedder = get_embedder()
+    if not statements:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = embedder.embed([statement.content for statement in statements])
+    StatementEmbedding.objects.bulk_create(
+        [
+            StatementEmbedding(
+                statement_id=statement.pk, model=embedder.name, vector=to_blob(vector)
+            )
+            for statement, vector in zip(statements, vectors)
+        ],
+        batch_size=EMBED_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["statement"],
+        update_fields=["model", "vector", "updated_at"],
+    )
+    ids = [statement.pk for statement in statements]
+
+    def add_to_index() -> None:
+        if embedding_index.model == embedder.name:
+            embedding_index.add(ids, vectors)
+
+    transaction.on_commit(add_to_index)
+    return vectors
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=EMBEDDING_WORKERS, thread_name_prefix="embedding"
+        )
+    return _executor
+
+
+def embed_on_commit(statements: Sequence[Statement]) -> None:
+    """Embed saved ``statements`` once the current transaction commits."""
+    if not statements:
+        return
+    if getattr(settings, "EMBEDDINGS_EAGER", False):
+        embed_statements(statements)
+        return
+    ids = [statement.pk for statement in statements]
+    transaction.on_commit(lambda: get_executor().submit(_embed_in_worker, ids))
+
+
+def embed_statement_ids(statement_ids: Sequence[int]) -> None:
+    """Embed the statements ``statement_ids`` that still exist, logging failures."""
+    for chunk in batched(statement_ids, EMBED_BATCH_SIZE):
+        try:
+            with transaction.atomic():
+                embed_statements(list(Statement.objects.filter(id__in=chunk)))
+        except Exception:
+            logger.exception("Failed to embed statements %s", list(chunk))
+
+
+def _embed_in_worker(statement_ids: Sequence[int]) -> None:
+    close_old_connections()
+    try:
+        embed_statement_ids(statement_ids)
+    finally:
+        close_old_connections()
+
+
+def backfill_embeddings(
+    batch_size: int = EMBED_BATCH_SIZE, recompute: bool = False
+) -> int:
+    """Embed every statement without a vector from the current model.
+
+    With ``recompute`` every statement is embedded again. Returns how many
+    statements were embedded.
+    """
+    statements = Statement.objects.order_by("id")
+    if not recompute:
+        statements = statements.exclude(embedding__model=get_embedder().name)
+    last_id, embedded = 0, 0
+    while batch := list(statements.filter(id__gt=last_id)[:batch_size]):
+        with transaction.atomic():
+            embed_statements(batch)
+        last_id = batch[-1].id
+        embedded += len(batch)
+    return embedded
+
+
+def similar_statements(statement: Statement, k: int) -> List[Dict[str, Any]]:
+    """The ``k`` statements closest in meaning to ``statement``, best first."""
+    model = get_embedder().name
+    embedding_index.sync(model)
+    vector = embedding_index.vector(statement.pk)
+    if vector is None:
+        vector = embed_statements([statement])[0]
+
+    # A few spare matches in case other processes deleted some of them
+    matches = embedding_index.search(vector, 2 * k, exclude=[statement.pk])
+    statements = Statement.objects.in_bulk([pk for pk, _ in matches])
+    embedding_index.remove(pk for pk, _ in matches if pk not in statements)
+    return [
+        {
+            "id": pk,
+            "thread": statements[pk].thread_id,
+            "content": statements[pk].content,
+            "is_main": statements[pk].is_main,
+            "score": score,
+        }
+        for pk, score in matches
+        if pk in statements
+    ][:k]
@@ -0,0 +1,170 @@
+"""In-process publish/subscribe of committed thread changes, served as SSE.
+
+Writers call ``publish_on_commit``, so subscribers only ever see rows that
+were committed. ``EventBus.publish`` may be called from any thread; each
+subscriber is an ``asyncio.Queue`` fed through its own event loop. Events only
+reach subscribers in the same process, so run a single ASGI worker (or put a
+shared broker behind ``EventBus``) when clients must see every write.
+
+A subscriber that falls more than ``MAX_QUEUED_EVENTS`` behind gets an
+``overflow`` event and is disconnected rather than slowing the writers down;
+clients should refetch the thread and reconnect.
+"""
+
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+from .ndjson import dumps_line
+
+SSE_CONTENT_TYPE = "text/event-stream"
+MAX_QUEUED_EVENTS = 1000
+HEARTBEAT_SECONDS = 15.0
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    thread_id: int
+    kind: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        # dumps_line escapes newlines inside strings, so data is one line
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {dumps_line(self.data)}\n"
+
+
+class Subscription:
+    def __init__(self, thread_id: int, max_queued: int = MAX_QUEUED_EVENTS) -> None:
+        self.thread_id = thread_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(max_queued)
+        self.overflowed = False
+
+    def push(self, event: Event) -> None:
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """The next event, or ``None`` if nothing arrived within ``timeout``."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+class EventBus:
+    def __init__(self, max_queued: int = MAX_QUEUED_EVENTS) -> None:
+        self.max_queued = max_queued
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def __bool__(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(self, thread_id: int) -> Subscription:
+        """Start receiving a thread's events; call from the consuming event loop."""
+        subscription = Subscription(thread_id, self.max_queued)
+        with self._lock:
+            self._subscriptions.setdefault(thread_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.thread_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.thread_id, None)
+
+    def publish(self, thread_id: int, kind: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(thread_id, ()))
+            event = Event(next(self._ids), thread_id, kind, data)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down without unsubscribing
+                self.unsubscribe(subscription)
+
+
+event_bus = EventBus()
+
+
+def publish_on_commit(
+    thread_id: Optional[int], kind: str, data: Dict[str, Any]
+) -> None:
+    if thread_id is not None:
+        transaction.on_commit(lambda: event_bus.publish(thread_id, kind, data))
+
+
+def statement_data(statement: Any) -> Dict[str, Any]:
+    return {
+        "id": statement.id,
+        "thread": statement.thread_id,
+        "content": statement.content,
+        "is_main": statement.is_main,
+        "created_at": statement.created_at,
+        "updated_at": statement.updated_at,
+    }
+
+
+def relationship_data(relationship: Any) -> Dict[str, Any]:
+    return {
+        "id": relationship.id,
+        "source": relationship.source_id,
+        "target": relationship.target_id,
+        "relationship_type": relationship.relationship_type,
+        "created_at": relationship.created_at,
+    }
+
+
+def log_data(log: Any) -> Dict[str, Any]:
+    return {
+        "id": log.id,
+        "thread": log.thread_id,
+        "details": log.details,
+        "created_at": log.created_at,
+    }
+
+
+def publish_statements(statements: List[Any]) -> None:
+    for statement in statements:
+        publish_on_commit(statement.thread_id, "statement", statement_data(statement))
+
+
+async def event_stream(
+    thread_id: int, heartbeat: float = HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """SSE lines for a thread's events, with a comment line when idle.
+
+    The heartbeat keeps proxies from closing an idle connection.
+    """
+    subscription = event_bus.subscribe(thread_id)
+    try:
+        yield ": connected\n\n"
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            event = await subscription.get(heartbeat)
+            yield event.to_sse() if event else ": keepalive\n\n"
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+def sse_response(lines: AsyncIterator[str]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(lines, content_type=SSE_CONTENT_TYPE)
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
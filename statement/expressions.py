@@ -0,0 +1,37 @@
+from typing import Any
+
+from django.db.models import F, Func, TextField
+
+
+class JSONKeyText(Func):
+    """Text value of a top-level key of a JSON field, e.g. ``details ->> 'action'``.
+
+    Unlike ``KT()``, the key is written into the SQL rather than passed as a
+    parameter. Databases only use an expression index for a query whose
+    expression is textually identical to the indexed one, so indexes and the
+    queries meant to use them must both be built with this class.
+    """
+
+    output_field = TextField()
+
+    def __init__(self, field: str, key: str, **extra: Any) -> None:
+        if not key.isidentifier():
+            raise ValueError(f"Invalid JSON key: {key!r}")
+        self.key = key
+        super().__init__(F(field), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template=f"JSON_EXTRACT(%(expressions)s, '$.{self.key}')",
+            **extra_context,
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template=f"(%(expressions)s ->> '{self.key}')",
+            **extra_context,
+        )
@@ -0,0 +1,148 @@
+"""Graph traversal over statement relationships.
+
+``reachable`` is a single recursive CTE that runs on both SQLite and
+Postgres. It is bounded by depth, so cycles in the graph can't make it loop
+forever, and it de-duplicates ``(statement, depth)`` pairs so each statement
+is expanded at most once per level.
+
+``shortest_path`` is a breadth-first search with one query per level: it
+has to stop at the first level that reaches the target and skip statements
+seen at earlier levels, and a recursive CTE can do neither.
+"""
+
+from itertools import batched
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+from django.db import connection
+
+from rizoner.instrumentation import allow_batched_queries
+
+from .models import StatementRelationship
+
+Direction = Literal["in", "out", "both"]
+
+MAX_DEPTH = 10
+MAX_PATH_DEPTH = 6
+MAX_NODES = 5000
+PATH_BATCH_SIZE = 500
+
+# How to step from the current statement ``w.id`` over an edge ``e``
+_JOIN = {
+    "out": ("e.source_id = w.id", "e.target_id"),
+    "in": ("e.target_id = w.id", "e.source_id"),
+    "both": (
+        "(e.source_id = w.id OR e.target_id = w.id)",
+        "CASE WHEN e.source_id = w.id THEN e.target_id ELSE e.source_id END",
+    ),
+}
+
+
+def _type_filter(types: Optional[Sequence[str]]) -> Tuple[str, List[str]]:
+    if not types:
+        return "", []
+    placeholders = ", ".join(["%s"] * len(types))
+    return f" AND e.relationship_type IN ({placeholders})", list(types)
+
+
+def reachable(
+    statement_id: int,
+    depth: int,
+    types: Optional[Sequence[str]] = None,
+    direction: Direction = "out",
+    limit: int = MAX_NODES,
+) -> List[Tuple[int, int]]:
+    """Return ``(statement_id, distance)`` for statements within ``depth`` hops.
+
+    ``direction="out"`` follows edges from source to target (descendants),
+    ``"in"`` follows them backwards (ancestors) and ``"both"`` ignores edge
+    direction. The start statement is included at distance 0. Results are
+    ordered by distance and capped at ``limit`` rows.
+    """
+    on, step = _JOIN[direction]
+    type_sql, type_params = _type_filter(types)
+    sql = f"""
+        WITH RECURSIVE walk(id, depth) AS (
+            SELECT CAST(%s AS BIGINT), 0
+            UNION
+            SELECT {step}, w.depth + 1
+            FROM walk w
+            JOIN {StatementRelationship._meta.db_table} e ON {on}{type_sql}
+            WHERE w.depth < %s
+        )
+        SELECT id, MIN(depth) AS distance
+        FROM walk
+        GROUP BY id
+        ORDER BY distance, id
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [statement_id, *type_params, depth, limit])
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _level_edges(
+    frontier: Sequence[int], types: Optional[Sequence[str]], direction: Direction
+) -> List[Tuple[int, int]]:
+    """Return ``(statement, neighbour)`` for every step out of ``frontier``."""
+    type_sql, type_params = _type_filter(types)
+    table = StatementRelationship._meta.db_table
+    steps = []
+    allow_batched_queries(len(frontier), PATH_BATCH_SIZE)
+    with connection.cursor() as cursor:
+        for batch in batched(frontier, PATH_BATCH_SIZE):
+            members = ", ".join(["%s"] * len(batch))
+            if direction == "both":
+                where, params = (
+                    f"(e.source_id IN ({members}) OR e.target_id IN ({members}))",
+                    [*batch, *batch],
+                )
+            else:
+                near = "e.source_id" if direction == "out" else "e.target_id"
+                where, params = f"{near} IN ({members})", list(batch)
+            cursor.execute(
+                f"SELECT e.source_id, e.target_id FROM {table} e"
+                f" WHERE {where}{type_sql}",
+                [*params, *type_params],
+            )
+            batch_ids = set(batch)
+            for source, target in cursor.fetchall():
+                if direction != "in" and source in batch_ids:
+                    steps.append((source, target))
+                if direction != "out" and target in batch_ids:
+                    steps.append((target, source))
+    return sorted(steps)
+
+
+def shortest_path(
+    source_id: int,
+    target_id: int,
+    max_depth: int = MAX_PATH_DEPTH,
+    types: Optional[Sequence[str]] = None,
+    direction: Direction = "out",
+) -> Optional[List[int]]:
+    """Return the statement IDs on a shortest path, or ``None`` if unreachable.
+
+    Runs at most ``max_depth`` queries (more for frontiers over
+    ``PATH_BATCH_SIZE`` statements) and reads every edge at most once. Ties
+    go to the path through the lowest statement IDs.
+    """
+    if source_id == target_id:
+        return [source_id]
+
+    parents: Dict[int, Optional[int]] = {source_id: None}
+    frontier = [source_id]
+    for _ in range(max_depth):
+        next_frontier = []
+        for node, other in _level_edges(frontier, types, direction):
+            if other not in parents:
+                parents[other] = node
+                next_frontier.append(other)
+        if target_id in parents:
+            path = [target_id]
+            while parents[path[-1]] is not None:
+                path.append(parents[path[-1]])
+            return path[::-1]
+        if not next_frontier:
+            return None
+        frontier = next_frontier
+    return None
@@ -0,0 +1,63 @@
+"""Move old ``Log`` rows out of the live table into compressed NDJSON files.
+
+Rows are archived by month of ``created_at``: every month gets its own
+``logs-YYYY-MM.ndjson.gz`` file, so the archive is partitioned by time and a
+month can be restored, shipped or deleted on its own. Each batch is appended
+to its files before it is deleted from the table, so an interrupted run loses
+nothing; re-running it may archive a batch twice, and readers can de-duplicate
+on ``id``.
+"""
+
+import gzip
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .models import Log
+from .ndjson import dumps_line
+
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def archive_path(directory: Path, created_at: datetime) -> Path:
+    return directory / f"logs-{created_at:%Y-%m}.ndjson.gz"
+
+
+def archive_logs(
+    before: datetime, directory: Path, batch_size: int = ARCHIVE_BATCH_SIZE
+) -> Dict[Path, int]:
+    """Archive and delete every log created before ``before``.
+
+    Returns how many rows went into each archive file.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    archived: Dict[Path, int] = {}
+    old_logs = Log.objects.filter(created_at__lt=before).order_by("created_at", "id")
+
+    while True:
+        batch = list(
+            old_logs.values("id", "thread_id", "details", "created_at")[:batch_size]
+        )
+        if not batch:
+            return archived
+
+        by_file: Dict[Path, List[str]] = {}
+        for row in batch:
+            path = archive_path(directory, row["created_at"])
+            by_file.setdefault(path, []).append(
+                dumps_line(
+                    {
+                        "id": row["id"],
+                        "thread": row["thread_id"],
+                        "details": row["details"],
+                        "created_at": row["created_at"],
+                    }
+                )
+            )
+        for path, lines in by_file.items():
+            # Appending adds a gzip member; readers see one continuous stream
+            with gzip.open(path, "at") as f:
+                f.writelines(lines)
+            archived[path] = archived.get(path, 0) + len(lines)
+
+        Log.objects.filter(id__in=[row["id"] for row in batch]).delete()
@@ -0,0 +1,133 @@
+"""Buffered, batched writes to the ``Log`` audit table.
+
+``log_event`` queues a row once the surrounding transaction commits and
+returns; a background thread writes queued rows with one ``bulk_create``
+every ``LOG_FLUSH_INTERVAL`` seconds, or as soon as ``LOG_BUFFER_SIZE`` rows
+are waiting. Pending rows are flushed when the process exits normally, so
+only a hard kill can lose the last interval's entries. Set
+``LOG_WRITES_EAGER = True`` to write each row immediately (e.g. in tests).
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .counters import record_activity, record_latest_activity
+from .events import event_bus, log_data, publish_on_commit
+from .models import Log, Thread
+
+DEFAULT_BUFFER_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class LogBuffer:
+    def __init__(
+        self,
+        max_size: int = DEFAULT_BUFFER_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._pending: List[Log] = []
+        self._lock = threading.Lock()
+        # Serializes flushes so rows are written in the order they were queued
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, log: Log) -> None:
+        with self._lock:
+            self._pending.append(log)
+            full = len(self._pending) >= self.max_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, name="log-buffer", daemon=True
+                )
+                self._flusher.start()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every queued row now and return how many were written.
+
+        If the write fails the rows go back to the front of the queue, to be
+        retried by the next flush, and the error is raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                batch = self._write(batch)
+            except Exception:
+                for log in batch:
+                    # Primary keys of a rolled back insert may be reused
+                    log.pk = None
+                    log._state.adding = True
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            for log in batch:
+                event_bus.publish(log.thread_id, "log", log_data(log))
+            return len(batch)
+
+    def _write(self, batch: List[Log]) -> List[Log]:
+        with transaction.atomic():
+            # Drop entries of threads deleted while they were queued; SQLite
+            # would only report the broken foreign key at commit
+            live = set(
+                Thread.objects.filter(
+                    id__in={log.thread_id for log in batch}
+                ).values_list("id", flat=True)
+            )
+            batch = [log for log in batch if log.thread_id in live]
+            Log.objects.bulk_create(batch, batch_size=self.max_size)
+            latest: Dict[int, datetime] = {}
+            for log in batch:
+                latest[log.thread_id] = max(
+                    log.created_at, latest.get(log.thread_id, log.created_at)
+                )
+            record_latest_activity(latest)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to write buffered log entries")
+            finally:
+                close_old_connections()
+
+
+log_buffer = LogBuffer(
+    getattr(settings, "LOG_BUFFER_SIZE", DEFAULT_BUFFER_SIZE),
+    getattr(settings, "LOG_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+)
+atexit.register(log_buffer.flush)
+
+
+def log_event(thread_id: int, details: Dict[str, Any]) -> None:
+    """Record an audit entry for ``thread_id`` once the current transaction commits."""
+    log = Log(thread_id=thread_id, details=details)
+    if getattr(settings, "LOG_WRITES_EAGER", False):
+        log.save()
+        record_activity(thread_id, log.created_at)
+        publish_on_commit(thread_id, "log", log_data(log))
+        return
+    # Rolled-back writes must not leave audit entries behind
+    transaction.on_commit(lambda: log_buffer.add(log))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+from pathlib import Path
+
+import djclick as click
+from django.conf import settings
+from django.utils import timezone
+
+from statement.log_archive import ARCHIVE_BATCH_SIZE, archive_logs
+from statement.logbuffer import log_buffer
+
+DEFAULT_RETENTION_DAYS = 90
+
+
+@click.command()
+@click.option(
+    "--older-than-days",
+    type=int,
+    default=lambda: getattr(settings, "LOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS),
+    help="Archive logs older than this many days (default: LOG_RETENTION_DAYS).",
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=lambda: getattr(settings, "LOG_ARCHIVE_DIR", "log_archive"),
+    help="Directory for the monthly logs-YYYY-MM.ndjson.gz files.",
+)
+@click.option("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+def command(older_than_days: int, output_dir: Path, batch_size: int) -> None:
+    """Move old Log rows into compressed monthly NDJSON archives."""
+    log_buffer.flush()
+    before = timezone.now() - timedelta(days=older_than_days)
+    archived = archive_logs(before, Path(output_dir), batch_size)
+
+    for path, count in sorted(archived.items()):
+        click.echo(f"{path}: {count} logs")
+    click.echo(f"Archived {sum(archived.values())} logs created before {before}")
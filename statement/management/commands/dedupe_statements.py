@@ -0,0 +1,39 @@
+import djclick as click
+
+from statement.dedupe import deduplicate_thread, sign_unsigned_statements
+from statement.models import Thread
+
+
+@click.command()
+@click.option(
+    "--thread", "thread_ids", type=int, multiple=True, help="Only these threads."
+)
+@click.option(
+    "--dry-run", is_flag=True, help="Report duplicates without changing anything."
+)
+def command(thread_ids: tuple, dry_run: bool) -> None:
+    """Merge near-duplicate statements into the oldest (or main) one per thread.
+
+    Relationships of merged statements are moved onto the kept statement.
+    Statements saved without a signature are signed first, except on a dry
+    run.
+    """
+    threads = Thread.objects.order_by("id")
+    if thread_ids:
+        threads = threads.filter(id__in=thread_ids)
+
+    if not dry_run:
+        if thread_ids:
+            signed = sum(sign_unsigned_statements(pk) for pk in thread_ids)
+        else:
+            signed = sign_unsigned_statements()
+        if signed:
+            click.echo(f"Signed {signed} statements")
+
+    merged = 0
+    for thread_id in threads.values_list("id", flat=True).iterator():
+        for keep_id, *duplicate_ids in deduplicate_thread(thread_id, dry_run):
+            click.echo(f"Thread {thread_id}: {duplicate_ids} -> {keep_id}")
+            merged += len(duplicate_ids)
+    verb = "Would merge" if dry_run else "Merged"
+    click.echo(f"{verb} {merged} duplicate statements")
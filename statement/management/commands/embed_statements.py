@@ -0,0 +1,16 @@
+import djclick as click
+
+from statement.embeddings import EMBED_BATCH_SIZE, backfill_embeddings, get_embedder
+
+
+@click.command()
+@click.option("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+@click.option(
+    "--recompute",
+    is_flag=True,
+    help="Also re-embed statements that already have a vector from this model.",
+)
+def command(batch_size: int, recompute: bool) -> None:
+    """Compute statement embeddings with STATEMENT_EMBEDDING_MODEL."""
+    embedded = backfill_embeddings(batch_size, recompute)
+    click.echo(f"Embedded {embedded} statements with {get_embedder().name}")
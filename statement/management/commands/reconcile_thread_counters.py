@@ -0,0 +1,20 @@
+import djclick as click
+
+from statement.counters import reconcile_threads
+
+
+@click.command()
+@click.option(
+    "--thread", "thread_ids", type=int, multiple=True, help="Only these threads."
+)
+@click.option("--dry-run", is_flag=True, help="Report drift without repairing it.")
+def command(thread_ids: tuple, dry_run: bool) -> None:
+    """Recompute the counters and previews stored on threads.
+
+    Repairs threads whose statement or relationship counts, last activity or
+    main statement preview no longer match their rows, e.g. after bulk
+    imports or manual SQL.
+    """
+    drifted = reconcile_threads(thread_ids or None, dry_run)
+    verb = "Would repair" if dry_run else "Repaired"
+    click.echo(f"{verb} {drifted} threads")
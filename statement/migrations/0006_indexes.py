@@ -0,0 +1,70 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def keep_oldest_main_statements(apps, schema_editor):
+    # The constraint below fails on threads that already have several mains
+    Statement = apps.get_model("statement", "Statement")
+    mains = Statement.objects.filter(is_main=True, thread__isnull=False)
+    crowded = (
+        mains.values("thread")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("thread", flat=True)
+    )
+    for thread_id in list(crowded):
+        in_thread = mains.filter(thread_id=thread_id)
+        oldest = in_thread.order_by("created_at", "id").values_list("id", flat=True)
+        in_thread.exclude(id=oldest[0]).update(is_main=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0005_statement_is_main"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["thread", "created_at"], name="log_thread_created_at_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="statement",
+            index=models.Index(
+                fields=["thread", "is_main"], name="statement_thread_is_main_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="statementrelationship",
+            index=models.Index(
+                fields=["source", "relationship_type"],
+                name="relationship_source_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="statementrelationship",
+            index=models.Index(
+                fields=["target", "relationship_type"],
+                name="relationship_target_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["created_at", "id"], name="thread_created_at_id_idx"
+            ),
+        ),
+        migrations.RunPython(keep_oldest_main_statements, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="statement",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_main", True)),
+                fields=("thread",),
+                name="unique_main_statement_per_thread",
+            ),
+        ),
+    ]
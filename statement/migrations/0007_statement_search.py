@@ -0,0 +1,78 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:02
+
+from django.db import migrations
+
+# The search index of statement.search as of this migration. It is copied so
+# that later changes to that module don't change what this migration creates.
+FTS_TABLE = "statement_statement_fts"
+PG_CONFIG = "english"
+PG_INDEX = "statement_content_search_idx"
+
+INSTALL = {
+    "sqlite": [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            content, content='statement_statement', content_rowid='id'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON statement_statement
+        BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON statement_statement
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF content ON statement_statement
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content)
+            VALUES ('delete', old.id, old.content);
+            INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ],
+    "postgresql": [
+        f"""
+        CREATE INDEX IF NOT EXISTS {PG_INDEX} ON statement_statement
+        USING GIN (to_tsvector('{PG_CONFIG}', content))
+        """,
+    ],
+}
+
+UNINSTALL = {
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ],
+    "postgresql": [f"DROP INDEX IF EXISTS {PG_INDEX}"],
+}
+
+
+def install_search_index(apps, schema_editor):
+    for sql in INSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall_search_index(apps, schema_editor):
+    for sql in UNINSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0006_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
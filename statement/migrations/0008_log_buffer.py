@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0007_statement_search"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="log",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["created_at"], name="log_created_at_idx"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:41
+
+import statement.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0008_log_buffer"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                models.F("thread"),
+                statement.expressions.JSONKeyText("details", "action"),
+                models.F("created_at"),
+                models.F("id"),
+                name="log_thread_action_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                models.F("thread"),
+                statement.expressions.JSONKeyText("details", "entity_type"),
+                models.F("created_at"),
+                models.F("id"),
+                name="log_thread_entity_type_idx",
+            ),
+        ),
+    ]
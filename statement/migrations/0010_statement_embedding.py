@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0009_log_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatementEmbedding",
+            fields=[
+                (
+                    "statement",
+                    models.OneToOneField(
+                        help_text="The statement this vector was computed from",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="embedding",
+                        serialize=False,
+                        to="statement.statement",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        help_text="The embedding model that produced the vector",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "vector",
+                    models.BinaryField(
+                        help_text="The embedding as packed float32 values"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["model", "updated_at"],
+                        name="embedding_model_updated_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0010_statement_embedding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatementSignature",
+            fields=[
+                (
+                    "statement",
+                    models.OneToOneField(
+                        help_text="The statement this signature was computed from",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="statement.statement",
+                    ),
+                ),
+                (
+                    "simhash",
+                    models.BigIntegerField(help_text="64-bit SimHash, stored signed"),
+                ),
+                ("band_0", models.IntegerField()),
+                ("band_1", models.IntegerField()),
+                ("band_2", models.IntegerField()),
+                ("band_3", models.IntegerField()),
+                (
+                    "thread",
+                    models.ForeignKey(
+                        help_text="Copy of the statement's thread; duplicates are found per thread",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="statement.thread",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["thread", "band_0"], name="signature_band_0_idx"
+                    ),
+                    models.Index(
+                        fields=["thread", "band_1"], name="signature_band_1_idx"
+                    ),
+                    models.Index(
+                        fields=["thread", "band_2"], name="signature_band_2_idx"
+                    ),
+                    models.Index(
+                        fields=["thread", "band_3"], name="signature_band_3_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:19
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Substr
+
+# The backfill of statement.counters as of this migration, copied so that
+# later changes to that module don't change what this migration computes.
+PREVIEW_LENGTH = 200
+
+
+def reconcile_existing_threads(apps, schema_editor):
+    # Rows were just given the migration time; activity only moves forward
+    Thread = apps.get_model("statement", "Thread")
+    Statement = apps.get_model("statement", "Statement")
+    StatementRelationship = apps.get_model("statement", "StatementRelationship")
+    Log = apps.get_model("statement", "Log")
+    Thread.objects.update(last_activity_at=F("created_at"))
+
+    statements = Statement.objects.filter(thread=OuterRef("pk")).values("thread")
+    relationships = StatementRelationship.objects.filter(
+        source__thread=OuterRef("pk")
+    ).values("source__thread")
+    logs = Log.objects.filter(thread=OuterRef("pk")).values("thread")
+    main = Statement.objects.filter(thread=OuterRef("pk"), is_main=True)
+
+    def count(rows):
+        return Coalesce(Subquery(rows.annotate(n=Count("pk")).values("n")), 0)
+
+    def latest(rows, field):
+        # Greatest() is NULL on SQLite if any argument is
+        return Coalesce(
+            Subquery(rows.annotate(latest=Max(field)).values("latest")),
+            F("last_activity_at"),
+        )
+
+    Thread.objects.update(
+        statement_count=count(statements.order_by()),
+        relationship_count=count(relationships.order_by()),
+        last_activity_at=Greatest(
+            "last_activity_at",
+            latest(statements.order_by(), "updated_at"),
+            latest(relationships.order_by(), "created_at"),
+            latest(logs.order_by(), "created_at"),
+        ),
+        main_statement_preview=Substr(
+            Coalesce(Subquery(main.values("content")[:1]), Value("")),
+            1,
+            PREVIEW_LENGTH,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0011_statement_signature"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="thread",
+            name="last_activity_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text="When a statement, relationship or log entry of this thread was last written",
+            ),
+        ),
+        migrations.AddField(
+            model_name="thread",
+            name="main_statement_preview",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="The start of the main statement's content",
+                max_length=200,
+            ),
+        ),
+        migrations.AddField(
+            model_name="thread",
+            name="relationship_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="thread",
+            name="statement_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(
+                fields=["last_activity_at", "id"], name="thread_activity_id_idx"
+            ),
+        ),
+        migrations.RunPython(reconcile_existing_threads, migrations.RunPython.noop),
+    ]
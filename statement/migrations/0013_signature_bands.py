@@ -0,0 +1,109 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:02
+
+import hashlib
+import re
+
+import numpy as np
+from django.db import migrations, models
+
+BANDS = 8
+BAND_BITS = 64 // BANDS
+BATCH_SIZE = 1000
+
+# The SimHash of statement.dedupe as of this migration. It is copied so that
+# later changes to that module don't change what this migration stores.
+_WORD = re.compile(r"\w+")
+_CONTRACTIONS = [
+    (re.compile(r"\bcan['’]?t\b|\bcannot\b"), "can not"),
+    (re.compile(r"\bwon['’]t\b"), "will not"),
+    (re.compile(r"n['’]t\b"), " not"),
+]
+_NEGATIONS = frozenset(
+    "not no never nor none neither nobody nothing nowhere without".split()
+)
+
+
+def simhash(text):
+    text = text.lower()
+    for contraction, expanded in _CONTRACTIONS:
+        text = contraction.sub(expanded, text)
+    words = _WORD.findall(text)
+    normalized = " ".join(words)
+    trigrams = zip(normalized, normalized[1:], normalized[2:])
+    features = dict.fromkeys({"".join(chars) for chars in trigrams} or {normalized}, 1)
+    negations = sorted(word for word in words if word in _NEGATIONS)
+    if negations:
+        features[f"\0{' '.join(negations)}"] = len(features)
+
+    keys = sorted(features)
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+            for key in keys
+        ],
+        dtype="<u8",
+    )
+    weights = np.array([features[key] for key in keys], dtype=np.int64)
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(keys), 64)
+    votes = weights @ (2 * bits.astype(np.int64) - 1)
+    return int(np.packbits(votes > 0).view("<u8")[0])
+
+
+def resign_statements(apps, schema_editor):
+    # Signatures from four 16-bit bands and the old hash match nothing now
+    Statement = apps.get_model("statement", "Statement")
+    StatementSignature = apps.get_model("statement", "StatementSignature")
+    fields = ["simhash", *(f"band_{i}" for i in range(BANDS))]
+    signed = Statement.objects.filter(signature__isnull=False).order_by("id")
+    mask = 2**BAND_BITS - 1
+    batch = []
+    for statement_id, content in signed.values_list("id", "content").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        value = simhash(content)
+        batch.append(
+            StatementSignature(
+                statement_id=statement_id,
+                simhash=value - 2**64 if value >= 2**63 else value,
+                **{
+                    f"band_{i}": (value >> (i * BAND_BITS)) & mask for i in range(BANDS)
+                },
+            )
+        )
+        if len(batch) == BATCH_SIZE:
+            StatementSignature.objects.bulk_update(batch, fields)
+            batch = []
+    StatementSignature.objects.bulk_update(batch, fields)
+
+
+def drop_signatures(apps, schema_editor):
+    # The old layout can't use these; dedupe_statements signs them again
+    apps.get_model("statement", "StatementSignature").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statement", "0012_thread_counters"),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name="statementsignature",
+                name=f"band_{i}",
+                field=models.IntegerField(default=0),
+                preserve_default=False,
+            )
+            for i in range(4, BANDS)
+        ),
+        migrations.RunPython(resign_statements, drop_signatures),
+        *(
+            migrations.AddIndex(
+                model_name="statementsignature",
+                index=models.Index(
+                    fields=["thread", f"band_{i}"], name=f"signature_band_{i}_idx"
+                ),
+            )
+            for i in range(4, BANDS)
+        ),
+    ]
@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+from .expressions import JSONKeyText
 
 
 class Thread(models.Model):
@@ -10,6 +14,29 @@ class Thread(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by statement.counters on every write, so listings need no
+    # aggregates; ``reconcile_thread_counters`` repairs any drift
+    statement_count = models.PositiveIntegerField(default=0)
+    relationship_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When a statement, relationship or log entry of this thread "
+        "was last written",
+    )
+    main_statement_preview = models.CharField(
+        max_length=200,
+        blank=True,
+        default="",
+        help_text="The start of the main statement's content",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="thread_created_at_id_idx"),
+            models.Index(
+                fields=["last_activity_at", "id"], name="thread_activity_id_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Thread {self.pk} for Chat {self.chat_id}"
@@ -31,6 +58,20 @@ class Statement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["thread", "is_main"], name="statement_thread_is_main_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["thread"],
+                condition=models.Q(is_main=True),
+                name="unique_main_statement_per_thread",
+            )
+        ]
+
     def __str__(self) -> str:
         return str(self.content[:50])
 
@@ -62,11 +103,89 @@ class StatementRelationship(models.Model):
                 name="unique_statement_relationship",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["source", "relationship_type"],
+                name="relationship_source_type_idx",
+            ),
+            models.Index(
+                fields=["target", "relationship_type"],
+                name="relationship_target_type_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.source} -[{self.relationship_type}]-> {self.target}"
 
 
+class StatementEmbedding(models.Model):
+    statement = models.OneToOneField(
+        Statement,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="embedding",
+        help_text="The statement this vector was computed from",
+    )
+    model = models.CharField(
+        max_length=255, help_text="The embedding model that produced the vector"
+    )
+    vector = models.BinaryField(help_text="The embedding as packed float32 values")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The in-memory index catches up on rows written by other processes
+            models.Index(
+                fields=["model", "updated_at"], name="embedding_model_updated_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Embedding of Statement {self.statement_id} ({self.model})"
+
+
+class StatementSignature(models.Model):
+    """SimHash of a statement, split into bands for near-duplicate lookups.
+
+    Statements a few differing bits apart share at least one whole band, so
+    candidates are found with equality lookups on the band indexes (see
+    ``statement.dedupe``).
+    """
+
+    statement = models.OneToOneField(
+        Statement,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature",
+        help_text="The statement this signature was computed from",
+    )
+    thread = models.ForeignKey(
+        Thread,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+        help_text="Copy of the statement's thread; duplicates are found per thread",
+    )
+    simhash = models.BigIntegerField(help_text="64-bit SimHash, stored signed")
+    band_0 = models.IntegerField()
+    band_1 = models.IntegerField()
+    band_2 = models.IntegerField()
+    band_3 = models.IntegerField()
+    band_4 = models.IntegerField()
+    band_5 = models.IntegerField()
+    band_6 = models.IntegerField()
+    band_7 = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["thread", f"band_{i}"], name=f"signature_band_{i}_idx")
+            for i in range(8)
+        ]
+
+    def __str__(self) -> str:
+        return f"Signature of Statement {self.statement_id}"
+
+
 class Log(models.Model):
     thread = models.ForeignKey(
         Thread,
@@ -75,10 +194,35 @@ class Log(models.Model):
         help_text="The thread this log belongs to",
     )
     details = models.JSONField(help_text="The details of the log")
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered entries keep the time of the event, not of
+    # the (later) bulk insert
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["thread", "created_at"], name="log_thread_created_at_idx"
+            ),
+            # Retention and archiving select by age across all threads
+            models.Index(fields=["created_at"], name="log_created_at_idx"),
+            # Activity feed filters; the expressions must match the ones in
+            # statement.api.list_thread_logs for the planner to use them
+            models.Index(
+                F("thread"),
+                JSONKeyText("details", "action"),
+                F("created_at"),
+                F("id"),
+                name="log_thread_action_idx",
+            ),
+            models.Index(
+                F("thread"),
+                JSONKeyText("details", "entity_type"),
+                F("created_at"),
+                F("id"),
+                name="log_thread_entity_type_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Log {self.pk} for Thread {self.thread_id}"
@@ -0,0 +1,92 @@
+import json
+from typing import Any, Iterable, Iterator, List, Type, TypeVar
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from ninja import Schema
+from ninja.errors import HttpError, ValidationError
+from pydantic import TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
+from rizoner.renderers import dumps
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 2000
+DEFAULT_BULK_MAX_ITEMS = 10000
+
+SchemaT = TypeVar("SchemaT", bound=Schema)
+
+
+def dumps_line(data: Any) -> str:
+    return dumps(data).decode() + "\n"
+
+
+def iter_ndjson(schema: Type[Schema], queryset: QuerySet) -> Iterator[str]:
+    """Serialize ``queryset`` row by row without loading it into memory."""
+    for obj in queryset.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield dumps_line(schema.from_orm(obj).model_dump())
+
+
+def ndjson_response(lines: Iterable[str]) -> StreamingHttpResponse:
+    return StreamingHttpResponse(lines, content_type=NDJSON_CONTENT_TYPE)
+
+
+def is_ndjson(request: Any) -> bool:
+    content_type = request.headers.get("Content-Type", "")
+    return content_type.split(";")[0].strip() == NDJSON_CONTENT_TYPE
+
+
+def _check_item_count(count: int) -> None:
+    max_items = getattr(settings, "BULK_MAX_ITEMS", DEFAULT_BULK_MAX_ITEMS)
+    if count > max_items:
+        raise HttpError(
+            413, f"Too many items: {count}, at most {max_items} per request"
+        )
+
+
+def parse_json_body(request: Any) -> List[Any]:
+    """Decode a JSON array or NDJSON request body into a list of items.
+
+    Bodies with more than ``BULK_MAX_ITEMS`` items are rejected with 413.
+    """
+    if is_ndjson(request):
+        try:
+            lines = request.body.decode().splitlines()
+        except UnicodeDecodeError:
+            raise HttpError(400, "Request body is not valid UTF-8")
+        numbered = [
+            (number, line) for number, line in enumerate(lines, start=1) if line.strip()
+        ]
+        _check_item_count(len(numbered))
+        items = []
+        for number, line in numbered:
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise HttpError(400, f"Invalid JSON on line {number}")
+        return items
+
+    try:
+        # Also catches bodies that are not UTF-8 (UnicodeDecodeError)
+        items = json.loads(request.body or b"[]")
+    except ValueError:
+        raise HttpError(400, "Invalid JSON body")
+    if not isinstance(items, list):
+        raise HttpError(400, "Expected a JSON array")
+    _check_item_count(len(items))
+    return items
+
+
+def parse_bulk_body(request: Any, schema: Type[SchemaT]) -> List[SchemaT]:
+    """Parse and validate every item of a bulk request body before any write."""
+    try:
+        return TypeAdapter(List[schema]).validate_python(parse_json_body(request))
+    except PydanticValidationError as e:
+        raise ValidationError(
+            [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(
+                    include_url=False, include_context=False, include_input=False
+                )
+            ]
+        )
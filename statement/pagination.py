@@ -0,0 +1,62 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+from ninja.errors import HttpError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    raw = f"{value.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        value, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(value), int(pk)
+    except ValueError:
+        raise HttpError(400, "Invalid cursor")
+
+
+def keyset_queryset(
+    queryset: QuerySet,
+    cursor: Optional[str] = None,
+    field: str = "created_at",
+    descending: bool = False,
+) -> QuerySet:
+    """Order ``queryset`` by ``(field, id)`` and skip rows up to ``cursor``.
+
+    ``field`` must be a datetime column with an index on ``(field, id)``.
+    """
+    sign, after = ("-", "lt") if descending else ("", "gt")
+    queryset = queryset.order_by(f"{sign}{field}", f"{sign}id")
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        # The redundant ``field >= ?`` lets the database seek the index
+        queryset = queryset.filter(**{f"{field}__{after}e": value}).filter(
+            Q(**{f"{field}__{after}": value}) | Q(**{f"id__{after}": pk})
+        )
+    return queryset
+
+
+def row_value(row: Any, field: str) -> Any:
+    """``field`` of a model instance or of a ``values()`` row."""
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def keyset_page(
+    queryset: QuerySet, limit: int, field: str = "created_at"
+) -> Tuple[List[Any], Optional[str]]:
+    """Return at most ``limit`` rows and the cursor of the next page, if any."""
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(row_value(last, field), row_value(last, "id"))
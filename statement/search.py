@@ -0,0 +1,178 @@
+"""Full-text search over ``Statement.content``.
+
+SQLite uses an external-content FTS5 table kept in sync by triggers, so
+``bulk_create`` and raw writes are indexed too. Postgres uses a GIN index on
+``to_tsvector(content)``. Other backends fall back to ``icontains``.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Statement
+
+FTS_TABLE = "statement_statement_fts"
+PG_CONFIG = "english"
+PG_INDEX = "statement_content_search_idx"
+SNIPPET_TOKENS = 12
+
+_SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content, content='statement_statement', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON statement_statement
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON statement_statement
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF content ON statement_statement
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+_SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+_POSTGRES_INSTALL = [
+    f"""
+    CREATE INDEX IF NOT EXISTS {PG_INDEX} ON statement_statement
+    USING GIN (to_tsvector('{PG_CONFIG}', content))
+    """,
+]
+
+_POSTGRES_UNINSTALL = [f"DROP INDEX IF EXISTS {PG_INDEX}"]
+
+
+def install_search_index(apps: Any, schema_editor: Any) -> None:
+    """Create the search index. Idempotent, so migrations that make SQLite
+    rebuild ``statement_statement`` (which drops its triggers) can re-run it.
+    """
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": _SQLITE_INSTALL, "postgresql": _POSTGRES_INSTALL}
+    for sql in statements.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall_search_index(apps: Any, schema_editor: Any) -> None:
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": _SQLITE_UNINSTALL, "postgresql": _POSTGRES_UNINSTALL}
+    for sql in statements.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def fts5_query(query: str) -> str:
+    """Quote every term so user input can't use (or break) FTS5 query syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def matching_ids(query: str) -> RawSQL:
+    """Subquery of statement IDs matching ``query``, for ``id__in`` filters."""
+    if connection.vendor == "sqlite":
+        return RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [fts5_query(query)],
+        )
+    if connection.vendor == "postgresql":
+        return RawSQL(
+            f"""
+            SELECT id FROM statement_statement
+            WHERE to_tsvector('{PG_CONFIG}', content)
+                @@ websearch_to_tsquery('{PG_CONFIG}', %s)
+            """,
+            [query],
+        )
+    return RawSQL(
+        "SELECT id FROM statement_statement WHERE content LIKE %s",
+        [f"%{query}%"],
+    )
+
+
+def search_statements(
+    query: str, thread_id: Optional[int] = None, limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Return the best matches for ``query`` with a rank and highlighted snippet.
+
+    Lower ``rank`` is better on every backend.
+    """
+    if not query.split():
+        return []
+
+    thread_sql = " AND s.thread_id = %s" if thread_id is not None else ""
+    thread_params = [thread_id] if thread_id is not None else []
+
+    if connection.vendor == "sqlite":
+        sql = f"""
+            SELECT s.id, s.thread_id, s.content, s.is_main,
+                   snippet({FTS_TABLE}, 0, '[', ']', '...', {SNIPPET_TOKENS}),
+                   bm25({FTS_TABLE}) AS rank
+            FROM {FTS_TABLE}
+            JOIN statement_statement s ON s.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s{thread_sql}
+            ORDER BY rank
+            LIMIT %s
+        """
+        params = [fts5_query(query), *thread_params, limit]
+    elif connection.vendor == "postgresql":
+        sql = f"""
+            SELECT s.id, s.thread_id, s.content, s.is_main,
+                   ts_headline('{PG_CONFIG}', s.content, q,
+                               'StartSel=[, StopSel=], MaxWords={SNIPPET_TOKENS}'),
+                   -ts_rank(to_tsvector('{PG_CONFIG}', s.content), q) AS rank
+            FROM statement_statement s,
+                 websearch_to_tsquery('{PG_CONFIG}', %s) q
+            WHERE to_tsvector('{PG_CONFIG}', s.content) @@ q{thread_sql}
+            ORDER BY rank
+            LIMIT %s
+        """
+        params = [query, *thread_params, limit]
+    else:
+        statements = Statement.objects.filter(content__icontains=query)
+        if thread_id is not None:
+            statements = statements.filter(thread_id=thread_id)
+        return [
+            {
+                "id": s.id,
+                "thread": s.thread_id,
+                "content": s.content,
+                "is_main": s.is_main,
+                "snippet": s.content[:200],
+                "rank": 0.0,
+            }
+            for s in statements[:limit]
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {
+                "id": row[0],
+                "thread": row[1],
+                "content": row[2],
+                "is_main": bool(row[3]),
+                "snippet": row[4],
+                "rank": row[5],
+            }
+            for row in cursor.fetchall()
+        ]
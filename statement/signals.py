@@ -0,0 +1,111 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .adjacency import invalidate_graphs
+from .counters import record_activity, record_relationship_activity
+from .dedupe import sign_statements
+from .embeddings import embed_on_commit, embedding_index
+from .events import event_bus, publish_on_commit, publish_statements, relationship_data
+from .models import Statement, StatementRelationship, Thread
+
+
+def _deleting_thread(origin) -> bool:
+    # Rows cascading from a thread's deletion need no counter updates
+    model = getattr(origin, "model", type(origin))
+    return model is Thread
+
+
+@receiver([post_save, post_delete], sender=Statement)
+def invalidate_statement_graph(sender, instance: Statement, **kwargs) -> None:
+    # The statement may have moved threads, so also drop graphs containing it
+    invalidate_graphs(instance.thread_id, [instance.pk])
+
+
+@receiver(post_save, sender=Statement)
+def embed_statement(
+    sender, instance: Statement, raw: bool = False, update_fields=None, **kwargs
+) -> None:
+    if raw or (update_fields is not None and "content" not in update_fields):
+        return
+    embed_on_commit([instance])
+
+
+@receiver(post_save, sender=Statement)
+def sign_statement(sender, instance: Statement, raw: bool = False, **kwargs) -> None:
+    # Also re-signed when only the thread changed, since lookups are per thread
+    if not raw:
+        sign_statements([instance])
+
+
+@receiver(post_delete, sender=Statement)
+def unindex_statement(sender, instance: Statement, **kwargs) -> None:
+    pk = instance.pk
+    transaction.on_commit(lambda: embedding_index.remove([pk]))
+
+
+@receiver(post_save, sender=Statement)
+def publish_statement(sender, instance: Statement, raw: bool = False, **kwargs) -> None:
+    if not raw:
+        publish_statements([instance])
+
+
+@receiver(post_save, sender=StatementRelationship)
+def publish_relationship(
+    sender, instance: StatementRelationship, created: bool, raw: bool = False, **kwargs
+) -> None:
+    # Finding the thread costs a query, so only when someone is listening
+    if created and not raw and event_bus:
+        thread_id = (
+            Statement.objects.filter(id=instance.source_id)
+            .values_list("thread_id", flat=True)
+            .first()
+        )
+        publish_on_commit(thread_id, "relationship", relationship_data(instance))
+
+
+@receiver([post_save, post_delete], sender=StatementRelationship)
+def invalidate_relationship_graph(
+    sender, instance: StatementRelationship, **kwargs
+) -> None:
+    invalidate_graphs(statement_ids=[instance.source_id, instance.target_id])
+
+
+@receiver(post_save, sender=Statement)
+def count_statement(
+    sender, instance: Statement, created: bool, raw: bool = False, **kwargs
+) -> None:
+    if not raw:
+        record_activity(
+            instance.thread_id,
+            instance.updated_at,
+            statements=int(created),
+            # A non-main statement may have just stopped being the main one
+            refresh_preview=instance.is_main or not created,
+        )
+
+
+@receiver(post_delete, sender=Statement)
+def uncount_statement(sender, instance: Statement, origin=None, **kwargs) -> None:
+    if not _deleting_thread(origin):
+        record_activity(
+            instance.thread_id, statements=-1, refresh_preview=instance.is_main
+        )
+
+
+@receiver(post_save, sender=StatementRelationship)
+def count_relationship(
+    sender, instance: StatementRelationship, created: bool, raw: bool = False, **kwargs
+) -> None:
+    if not raw:
+        record_relationship_activity(
+            instance.source_id, instance.created_at, relationships=int(created)
+        )
+
+
+@receiver(post_delete, sender=StatementRelationship)
+def uncount_relationship(
+    sender, instance: StatementRelationship, origin=None, **kwargs
+) -> None:
+    if not _deleting_thread(origin):
+        record_relationship_activity(instance.source_id, relationships=-1)
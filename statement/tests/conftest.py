@@ -0,0 +1,58 @@
+import pytest
+from model_bakery import baker
+
+from statement.adjacency import adjacency_cache
+from statement.embeddings import embedding_index
+from statement.models import Statement, StatementRelationship, Thread
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def api_client(test_client):
+    class Wrapper:
+        def get(self, path, **kwargs):
+            return test_client.get(f"/statement{path}", **kwargs)
+
+        def post(self, path, **kwargs):
+            return test_client.post(f"/statement{path}", **kwargs)
+
+        def delete(self, path, **kwargs):
+            return test_client.delete(f"/statement{path}", **kwargs)
+
+        def put(self, path, **kwargs):
+            return test_client.put(f"/statement{path}", **kwargs)
+
+    return Wrapper()
+
+
+@pytest.fixture(autouse=True)
+def empty_adjacency_cache():
+    # IDs are reused between tests, so cached graphs must not leak across them
+    adjacency_cache.clear()
+    yield
+    adjacency_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_embedding_index():
+    embedding_index.clear()
+    yield
+    embedding_index.clear()
+
+
+@pytest.fixture
+def chain(db):
+    """a <-supports- b <-supports- c <-contradicts- d, plus a cycle c -> e -> c."""
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    a, b, c, d, e = baker.make(Statement, thread=thread, is_main=False, _quantity=5)
+    for source, target, relationship_type in [
+        (b, a, "supports"),
+        (c, b, "supports"),
+        (d, c, "contradicts"),
+        (c, e, "supports"),
+        (e, c, "supports"),
+    ]:
+        StatementRelationship.objects.create(
+            source=source, target=target, relationship_type=relationship_type
+        )
+    return a, b, c, d, e
@@ -0,0 +1,163 @@
+import pytest
+from model_bakery import baker
+
+from statement.adjacency import AdjacencyCache, ThreadGraph, adjacency_cache
+from statement.graph import reachable
+from statement.models import Statement, StatementRelationship, Thread
+from django_llm_chat.models import Chat
+
+
+def test_thread_graph_csr():
+    graph = ThreadGraph(
+        [1, 2, 3, 4],
+        [(2, 1, "supports"), (3, 1, "contradicts"), (4, 2, "supports")],
+    )
+
+    assert graph.type_names == ["supports", "contradicts"]
+    assert graph.neighbors(2) == [(1, "supports")]
+    assert sorted(graph.neighbors(1, "in")) == [(2, "supports"), (3, "contradicts")]
+    assert graph.neighbors(1, "in", ["contradicts"]) == [(3, "contradicts")]
+    assert graph.neighbors(99) == []
+    assert graph.reachable(4, 5) == [(4, 0), (2, 1), (1, 2)]
+    assert graph.reachable(99, 5) is None
+    assert graph.edges_between([1, 2, 4]) == [(2, 1, "supports"), (4, 2, "supports")]
+
+
+@pytest.mark.parametrize("direction", ["in", "out", "both"])
+@pytest.mark.parametrize("types", [None, ["supports"]])
+def test_cached_reachable_matches_cte(chain, direction, types):
+    graph = adjacency_cache.get(chain[0].thread_id)
+    for statement in chain:
+        for depth in (1, 2, 5):
+            assert graph.reachable(statement.id, depth, types, direction) == reachable(
+                statement.id, depth, types, direction
+            )
+
+
+def test_cache_hit_does_not_query(chain, django_assert_num_queries):
+    thread_id = chain[0].thread_id
+    adjacency_cache.get(thread_id)
+
+    with django_assert_num_queries(0):
+        adjacency_cache.get(thread_id)
+
+
+def test_relationship_signals_invalidate(chain):
+    a, b, c, d, e = chain
+    assert adjacency_cache.get(a.thread_id).neighbors(a.id, "in") == [
+        (b.id, "supports")
+    ]
+
+    relationship = StatementRelationship.objects.create(
+        source=d, target=a, relationship_type="supports"
+    )
+    assert a.thread_id not in adjacency_cache
+    assert sorted(adjacency_cache.get(a.thread_id).neighbors(a.id, "in")) == sorted(
+        [(b.id, "supports"), (d.id, "supports")]
+    )
+
+    relationship.delete()
+    assert a.thread_id not in adjacency_cache
+
+
+def test_statement_signals_invalidate(chain):
+    a, *_ = chain
+    adjacency_cache.get(a.thread_id)
+
+    statement = Statement.objects.create(thread_id=a.thread_id, content="New")
+    assert a.thread_id not in adjacency_cache
+    assert statement.id in adjacency_cache.get(a.thread_id)
+
+
+def test_bulk_endpoints_invalidate(api_client, chain):
+    a, b, *_ = chain
+    adjacency_cache.get(a.thread_id)
+
+    api_client.post(
+        f"/threads/{a.thread_id}/relationships/bulk",
+        json=[{"source": a.id, "target": b.id, "relationship_type": "refines"}],
+    )
+
+    assert a.thread_id not in adjacency_cache
+    assert (b.id, "refines") in adjacency_cache.get(a.thread_id).neighbors(a.id)
+
+
+@pytest.mark.django_db
+def test_lru_eviction_respects_budget():
+    chat = baker.make(Chat)
+    threads = baker.make(Thread, chat=chat, _quantity=3)
+    for thread in threads:
+        baker.make(Statement, thread=thread, _quantity=10)
+
+    one_graph = ThreadGraph.load(threads[0].id).nbytes
+    cache = AdjacencyCache(max_bytes=2 * one_graph)
+    for thread in threads:
+        cache.get(thread.id)
+
+    assert len(cache) == 2
+    assert threads[0].id not in cache
+    assert cache.nbytes <= cache.max_bytes
+
+    cache.get(threads[1].id)
+    cache.get(threads[0].id)
+    assert threads[2].id not in cache
+    assert threads[1].id in cache
+
+
+def test_graph_endpoint_uses_cache(
+    api_client,
+    chain,
+    django_assert_num_queries,
+):
+    a, *_ = chain
+    adjacency_cache.get(a.thread_id)
+
+    # Statement lookup and node contents only; the traversal hits the cache
+    with django_assert_num_queries(2):
+        response = api_client.get(f"/statements/{a.id}/graph?direction=in")
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def cross_thread(chain):
+    """``a`` is supported by ``x`` in another thread, which ``y`` supports."""
+    a, *_ = chain
+    x, y = baker.make(
+        Statement, thread=baker.make(Thread, chat=baker.make(Chat)), _quantity=2
+    )
+    StatementRelationship.objects.create(
+        source=x, target=a, relationship_type="supports"
+    )
+    StatementRelationship.objects.create(
+        source=y, target=x, relationship_type="supports"
+    )
+    return a, x, y
+
+
+def test_cached_reachable_defers_walks_leaving_the_thread(chain, cross_thread):
+    a, x, y = cross_thread
+    graph = adjacency_cache.get(a.thread_id)
+
+    # x is in the graph, but its edge from y is not
+    assert x.id in graph
+    assert graph.reachable(a.id, 5, direction="in") is None
+    assert graph.reachable(x.id, 5, direction="in") is None
+    # Walks that stay in the thread are still answered from the cache
+    assert graph.reachable(a.id, 5, direction="out") == [(a.id, 0)]
+    assert graph.reachable(chain[3].id, 1, direction="out") == reachable(
+        chain[3].id, 1, direction="out"
+    )
+
+
+def test_graph_endpoint_follows_other_threads(api_client, cross_thread):
+    a, x, y = cross_thread
+    adjacency_cache.get(a.thread_id)
+
+    response = api_client.get(f"/statements/{a.id}/graph?direction=in&depth=5")
+
+    nodes = {node["id"]: node["distance"] for node in response.json()["nodes"]}
+    assert nodes == dict(reachable(a.id, 5, direction="in"))
+    assert nodes[x.id] == 1 and nodes[y.id] == 2
+    assert {"source": y.id, "target": x.id, "relationship_type": "supports"} in (
+        response.json()["edges"]
+    )
@@ -1,28 +1,12 @@
+import json
+
 import pytest
 from model_bakery import baker
 
-from statement.models import Thread, Log
+from statement.models import Log, Statement, Thread
 from django_llm_chat.models import Chat
 
 
-@pytest.fixture
-def api_client(test_client):
-    class Wrapper:
-        def get(self, path, **kwargs):
-            return test_client.get(f"/statement{path}", **kwargs)
-
-        def post(self, path, **kwargs):
-            return test_client.post(f"/statement{path}", **kwargs)
-
-        def delete(self, path, **kwargs):
-            return test_client.delete(f"/statement{path}", **kwargs)
-
-        def put(self, path, **kwargs):
-            return test_client.put(f"/statement{path}", **kwargs)
-
-    return Wrapper()
-
-
 @pytest.fixture
 def setup_data(db):
     chat = baker.make(Chat)
@@ -43,6 +27,76 @@ def test_list_threads(api_client, setup_data):
     assert "updated_at" in data[0]
 
 
+@pytest.mark.django_db
+def test_raw_list_responses_match_schema_responses(api_client, settings):
+    thread = baker.make(Thread, chat=baker.make(Chat), _quantity=3)[0]
+    Statement.objects.create(thread=thread, content="Cats rule", is_main=True)
+    Statement.objects.create(thread=thread, content="Dogs drool")
+    urls = [
+        "/threads?limit=2",
+        "/threads?order=activity",
+        f"/threads/{thread.id}/statements",
+        f"/threads/{thread.id}/logs?limit=1",
+    ]
+
+    def fetch(url):
+        response = api_client.get(url)
+        assert response.status_code == 200
+        return response.json(), response.headers.get("X-Next-Cursor")
+
+    expected = [fetch(url) for url in urls]
+    settings.RAW_LIST_RESPONSES = True
+    assert [fetch(url) for url in urls] == expected
+
+
+@pytest.mark.django_db
+def test_list_threads_cursor_pagination(api_client, setup_data):
+    expected = list(
+        Thread.objects.order_by("created_at", "id").values_list("id", flat=True)
+    )
+
+    response = api_client.get("/threads?limit=2")
+    assert response.status_code == 200
+    first_page = [thread["id"] for thread in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = api_client.get(f"/threads?limit=2&cursor={cursor}")
+    assert response.status_code == 200
+    second_page = [thread["id"] for thread in response.json()]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert first_page + second_page == expected
+
+
+@pytest.mark.django_db
+def test_list_threads_invalid_cursor(api_client, setup_data):
+    response = api_client.get("/threads?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_list_threads_stream(api_client, setup_data):
+    response = api_client.get("/threads?stream=true")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in response.content.decode().splitlines()]
+    assert [row["id"] for row in rows] == list(
+        Thread.objects.order_by("created_at", "id").values_list("id", flat=True)
+    )
+    assert set(rows[0]) == {
+        "id",
+        "chat",
+        "created_at",
+        "updated_at",
+        "statement_count",
+        "relationship_count",
+        "last_activity_at",
+        "main_statement_preview",
+    }
+
+
 @pytest.mark.django_db
 def test_get_thread(api_client, setup_data):
     thread = Thread.objects.first()
@@ -57,6 +111,29 @@ def test_get_thread(api_client, setup_data):
     assert "updated_at" in data
 
 
+@pytest.mark.django_db
+def test_get_thread_conditional(api_client, setup_data):
+    thread = Thread.objects.first()
+    response = api_client.get(f"/threads/{thread.id}")
+    etag = response["ETag"]
+    last_modified = response["Last-Modified"]
+
+    response = api_client.get(f"/threads/{thread.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert response.content == b""
+
+    response = api_client.get(
+        f"/threads/{thread.id}", headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+
+    thread.save()
+    response = api_client.get(f"/threads/{thread.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
 @pytest.mark.django_db
 def test_get_thread_not_found(api_client):
     response = api_client.get("/threads/999")
@@ -80,6 +157,47 @@ def test_list_statements(api_client, setup_data):
     assert data[0]["content"] in ["Test Statement 1", "Test Statement 2"]
 
 
+@pytest.mark.django_db
+def test_list_statements_conditional(api_client, setup_data):
+    from statement.models import Statement
+
+    thread = Thread.objects.first()
+    statement = Statement.objects.create(thread=thread, content="First")
+    other = Statement.objects.create(thread=thread, content="Second")
+
+    def get(etag):
+        return api_client.get(
+            f"/threads/{thread.id}/statements", headers={"If-None-Match": etag}
+        )
+
+    etag = api_client.get(f"/threads/{thread.id}/statements")["ETag"]
+    assert get(etag).status_code == 304
+
+    statement.content = "Edited"
+    statement.save()
+    response = get(etag)
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    # Deleting a row that isn't the newest still changes the ETag
+    Statement.objects.filter(id=statement.id).delete()
+    assert other.updated_at < statement.updated_at
+    assert get(etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_threads_conditional(api_client, setup_data):
+    response = api_client.get("/threads?limit=2")
+    etag = response["ETag"]
+
+    response = api_client.get("/threads?limit=2", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    Thread.objects.order_by("created_at", "id").first().save()
+    response = api_client.get("/threads?limit=2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
 @pytest.mark.django_db
 def test_create_thread(api_client):
     response = api_client.post("/threads")
@@ -109,6 +227,57 @@ def test_create_thread(api_client):
     assert log.details["entity_id"] == thread.id
 
 
+@pytest.mark.django_db
+def test_list_thread_logs(api_client, setup_data):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    thread = Thread.objects.first()
+    start = timezone.now() - timedelta(hours=1)
+    for i, (action, entity_type) in enumerate(
+        [
+            ("Created", "New Thread"),
+            ("Created", "Main Statement"),
+            ("Updated", "Main Statement"),
+            ("Created", "Statement"),
+        ]
+    ):
+        baker.make(
+            Log,
+            thread=thread,
+            details={"action": action, "entity_type": entity_type},
+            created_at=start + timedelta(minutes=i),
+        )
+    baker.make(Log, thread=Thread.objects.last(), details={"action": "Created"})
+
+    response = api_client.get(f"/threads/{thread.id}/logs?limit=3")
+    assert response.status_code == 200
+    assert [log["details"]["entity_type"] for log in response.json()] == [
+        "New Thread",
+        "Main Statement",
+        "Main Statement",
+    ]
+    cursor = response["X-Next-Cursor"]
+    response = api_client.get(f"/threads/{thread.id}/logs?limit=3&cursor={cursor}")
+    assert [log["details"]["entity_type"] for log in response.json()] == ["Statement"]
+    assert "X-Next-Cursor" not in response.headers
+
+    def entity_types(query):
+        response = api_client.get(f"/threads/{thread.id}/logs?{query}")
+        assert response.status_code == 200
+        return [log["details"]["entity_type"] for log in response.json()]
+
+    assert entity_types("action=Updated") == ["Main Statement"]
+    assert entity_types("entity_type=Main+Statement&action=Created") == [
+        "Main Statement"
+    ]
+    since = (start + timedelta(minutes=2)).isoformat().replace("+00:00", "Z")
+    assert entity_types(f"since={since}") == ["Main Statement", "Statement"]
+
+    assert api_client.get("/threads/999/logs").status_code == 404
+
+
 @pytest.mark.django_db
 def test_create_statement(api_client, setup_data):
     thread = Thread.objects.first()
@@ -137,3 +306,340 @@ def test_create_statement(api_client, setup_data):
     assert log.details["action"] == "Created"
     assert log.details["entity_type"] == "Main Statement"
     assert log.details["entity_id"] == statement.id
+
+
+@pytest.mark.django_db
+def test_create_second_main_statement_conflicts(api_client, setup_data):
+    thread = Thread.objects.first()
+    payload = {"content": "The main statement.", "is_main": True}
+    assert (
+        api_client.post(f"/threads/{thread.id}/statements", json=payload).status_code
+        == 200
+    )
+
+    response = api_client.post(f"/threads/{thread.id}/statements", json=payload)
+
+    assert response.status_code == 409
+    assert thread.statements.filter(is_main=True).count() == 1
+
+
+@pytest.mark.django_db
+def test_get_thread_detail(api_client, setup_data):
+    from statement.models import Statement, StatementRelationship
+
+    thread = Thread.objects.first()
+    main = Statement.objects.create(thread=thread, content="Main", is_main=True)
+    others = [
+        Statement.objects.create(thread=thread, content=f"Other {i}") for i in range(3)
+    ]
+    StatementRelationship.objects.create(
+        source=others[0], target=main, relationship_type="supports"
+    )
+    StatementRelationship.objects.create(
+        source=others[1], target=main, relationship_type="supports"
+    )
+    StatementRelationship.objects.create(
+        source=others[2], target=main, relationship_type="contradicts"
+    )
+
+    response = api_client.get(f"/threads/{thread.id}/detail?limit=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["thread"]["id"] == thread.id
+    assert data["main_statement"]["id"] == main.id
+    assert [s["id"] for s in data["statements"]] == [others[0].id, others[1].id]
+    assert data["statement_count"] == 3
+    assert data["relationship_counts"] == {"supports": 2, "contradicts": 1}
+
+    response = api_client.get(
+        f"/threads/{thread.id}/detail?limit=2&cursor={data['next_cursor']}"
+    )
+    data = response.json()
+    assert [s["id"] for s in data["statements"]] == [others[2].id]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_get_thread_detail_without_main_statement(api_client, setup_data):
+    thread = Thread.objects.first()
+
+    response = api_client.get(f"/threads/{thread.id}/detail")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["main_statement"] is None
+    assert data["statements"] == []
+    assert data["relationship_counts"] == {}
+
+
+@pytest.mark.django_db
+def test_get_thread_detail_not_found(api_client):
+    response = api_client.get("/threads/999/detail")
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [1, 50])
+def test_get_thread_detail_query_count(
+    api_client, setup_data, size, django_assert_max_num_queries
+):
+    from statement.models import Statement, StatementRelationship
+
+    thread = Thread.objects.first()
+    main = baker.make(Statement, thread=thread, is_main=True)
+    for other in baker.make(Statement, thread=thread, _quantity=size):
+        baker.make(StatementRelationship, source=other, target=main)
+
+    with django_assert_max_num_queries(7):
+        response = api_client.get(f"/threads/{thread.id}/detail")
+    assert response.status_code == 200
+
+    # Revalidating an unchanged thread only runs the validator queries
+    etag = response["ETag"]
+    with django_assert_max_num_queries(3):
+        response = api_client.get(
+            f"/threads/{thread.id}/detail", headers={"If-None-Match": etag}
+        )
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_json(api_client, setup_data):
+    from statement.models import Statement
+
+    thread = Thread.objects.first()
+    payload = [{"content": "Main", "is_main": True}] + [
+        {"content": f"Statement {i}"} for i in range(10)
+    ]
+
+    response = api_client.post(f"/threads/{thread.id}/statements/bulk", json=payload)
+
+    assert response.status_code == 200
+    ids = response.json()["ids"]
+    assert len(ids) == 11
+    assert list(
+        Statement.objects.filter(id__in=ids)
+        .order_by("id")
+        .values_list("content", flat=True)
+    ) == [item["content"] for item in payload]
+    assert Log.objects.filter(
+        thread=thread, details__entity_type="Main Statement"
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_ndjson(api_client, setup_data):
+    thread = Thread.objects.first()
+    body = "\n".join(json.dumps({"content": f"Statement {i}"}) for i in range(5))
+
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        data=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["ids"]) == 5
+    assert thread.statements.count() == 5
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_is_all_or_nothing(api_client, setup_data):
+    thread = Thread.objects.first()
+    payload = [{"content": "Valid"}, {"is_main": True}]
+
+    response = api_client.post(f"/threads/{thread.id}/statements/bulk", json=payload)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 1, "content"]
+    assert thread.statements.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_rejects_second_main(api_client, setup_data):
+    thread = Thread.objects.first()
+    payload = [{"content": "A", "is_main": True}, {"content": "B", "is_main": True}]
+
+    response = api_client.post(f"/threads/{thread.id}/statements/bulk", json=payload)
+
+    assert response.status_code == 409
+    assert thread.statements.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_invalid_ndjson(api_client, setup_data):
+    thread = Thread.objects.first()
+
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        data='{"content": "ok"}\nnot json',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 400
+    assert thread.statements.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_main_race_conflicts(api_client, setup_data):
+    from unittest.mock import patch
+
+    thread = Thread.objects.first()
+    baker.make(Statement, thread=thread, is_main=True)
+
+    # As if the other main statement was created just after the check
+    with patch("django.db.models.QuerySet.exists", return_value=False):
+        response = api_client.post(
+            f"/threads/{thread.id}/statements/bulk",
+            json=[{"content": "Another main", "is_main": True}],
+        )
+
+    assert response.status_code == 409
+    assert thread.statements.count() == 1
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_rejects_non_utf8(api_client, setup_data):
+    thread = Thread.objects.first()
+
+    for content_type in ("application/json", "application/x-ndjson"):
+        response = api_client.post(
+            f"/threads/{thread.id}/statements/bulk",
+            data=b'{"content": "\xff"}',
+            headers={"Content-Type": content_type},
+        )
+        assert response.status_code == 400
+    assert thread.statements.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk_caps_items(api_client, setup_data, settings):
+    settings.BULK_MAX_ITEMS = 3
+    thread = Thread.objects.first()
+    items = [{"content": f"Statement {i}"} for i in range(4)]
+
+    response = api_client.post(f"/threads/{thread.id}/statements/bulk", json=items)
+    assert response.status_code == 413
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        data="\n".join(json.dumps(item) for item in items),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 413
+    assert thread.statements.count() == 0
+
+    response = api_client.post(f"/threads/{thread.id}/statements/bulk", json=items[:3])
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def thread_statements(setup_data):
+    from statement.models import Statement
+
+    thread = Thread.objects.first()
+    statements = baker.make(Statement, thread=thread, is_main=False, _quantity=4)
+    return thread, statements
+
+
+@pytest.mark.django_db
+def test_import_relationships(api_client, thread_statements):
+    from statement.models import StatementRelationship
+
+    thread, (a, b, c, d) = thread_statements
+    payload = [
+        {"source": b.id, "target": a.id, "relationship_type": "supports"},
+        {"source": c.id, "target": a.id, "relationship_type": "contradicts"},
+        {"source": d.id, "target": b.id, "relationship_type": "supports"},
+    ]
+
+    response = api_client.post(f"/threads/{thread.id}/relationships/bulk", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"received": 3, "created": 3}
+
+    # Re-importing is idempotent; only the new edge is created
+    payload.append({"source": d.id, "target": c.id, "relationship_type": "supports"})
+    response = api_client.post(f"/threads/{thread.id}/relationships/bulk", json=payload)
+    assert response.json() == {"received": 4, "created": 1}
+    assert StatementRelationship.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_import_relationships_counts_only_its_own_edges(
+    api_client, thread_statements, settings
+):
+    from unittest.mock import patch
+
+    from statement.models import StatementRelationship
+
+    # The other writer's queries would count against the route's budget
+    settings.QUERY_BUDGETS_ENFORCED = False
+    thread, (a, b, c, d) = thread_statements
+    bulk_create = StatementRelationship.objects.bulk_create
+
+    def bulk_create_alongside_another_writer(*args, **kwargs):
+        # Another write lands among this import's rows: under Postgres its ID
+        # can fall anywhere relative to theirs
+        StatementRelationship.objects.create(
+            source=d, target=a, relationship_type="refines"
+        )
+        return bulk_create(*args, **kwargs)
+
+    payload = [
+        {"source": b.id, "target": a.id, "relationship_type": "supports"},
+        {"source": c.id, "target": a.id, "relationship_type": "contradicts"},
+    ]
+    with patch.object(
+        StatementRelationship.objects,
+        "bulk_create",
+        bulk_create_alongside_another_writer,
+    ):
+        response = api_client.post(
+            f"/threads/{thread.id}/relationships/bulk", json=payload
+        )
+
+    assert response.json() == {"received": 2, "created": 2}
+    assert StatementRelationship.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_import_relationships_rejects_foreign_statements(api_client, thread_statements):
+    from statement.models import Statement, StatementRelationship
+
+    thread, (a, *_) = thread_statements
+    other_thread = Thread.objects.exclude(id=thread.id).first()
+    foreign = baker.make(Statement, thread=other_thread)
+    payload = [{"source": foreign.id, "target": a.id, "relationship_type": "supports"}]
+
+    response = api_client.post(f"/threads/{thread.id}/relationships/bulk", json=payload)
+
+    assert response.status_code == 422
+    assert StatementRelationship.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_export_relationships(api_client, thread_statements):
+    from statement.models import StatementRelationship
+
+    thread, (a, b, c, _) = thread_statements
+    StatementRelationship.objects.create(
+        source=b, target=a, relationship_type="supports"
+    )
+    StatementRelationship.objects.create(
+        source=c, target=a, relationship_type="contradicts"
+    )
+
+    response = api_client.get(f"/threads/{thread.id}/relationships")
+    assert response.status_code == 200
+    assert response.json() == {
+        "source": [b.id, c.id],
+        "target": [a.id, a.id],
+        "relationship_type": ["supports", "contradicts"],
+    }
+
+    response = api_client.get(f"/threads/{thread.id}/relationships?format=ndjson")
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.content.decode().splitlines()] == [
+        [b.id, a.id, "supports"],
+        [c.id, a.id, "contradicts"],
+    ]
@@ -0,0 +1,127 @@
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from statement.counters import PREVIEW_LENGTH, reconcile_threads
+from statement.dedupe import deduplicate_thread
+from statement.models import Log, Statement, StatementRelationship, Thread
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def thread(db):
+    return baker.make(Thread, chat=baker.make(Chat))
+
+
+def counters(thread):
+    thread.refresh_from_db()
+    return thread.statement_count, thread.relationship_count
+
+
+def test_counters_follow_saves_and_deletes(thread):
+    main = Statement.objects.create(thread=thread, content="x" * 300, is_main=True)
+    other = Statement.objects.create(thread=thread, content="Dogs are loyal")
+    relationship = StatementRelationship.objects.create(
+        source=other, target=main, relationship_type="supports"
+    )
+    assert counters(thread) == (2, 1)
+    assert thread.main_statement_preview == "x" * PREVIEW_LENGTH
+    assert thread.last_activity_at == relationship.created_at
+
+    main.content = "Cats rule"
+    main.save()
+    thread.refresh_from_db()
+    assert thread.main_statement_preview == "Cats rule"
+    assert thread.last_activity_at == main.updated_at
+
+    main.is_main = False
+    main.save()
+    thread.refresh_from_db()
+    assert thread.main_statement_preview == ""
+
+    relationship.delete()
+    assert counters(thread) == (2, 0)
+    main.delete()
+    assert counters(thread) == (1, 0)
+    assert reconcile_threads() == 0
+
+
+def test_statement_delete_uncounts_its_relationships(thread):
+    a, b, c = baker.make(Statement, thread=thread, _quantity=3)
+    for source, target in [(a, b), (b, c), (c, a)]:
+        StatementRelationship.objects.create(source=source, target=target)
+    assert counters(thread) == (3, 3)
+
+    b.delete()
+    assert counters(thread) == (2, 1)
+    assert reconcile_threads() == 0
+
+
+def test_bulk_endpoints_update_counters(api_client, thread):
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        json=[
+            {"content": "Cats are better", "is_main": True},
+            {"content": "Dogs are loyal"},
+            {"content": "Birds can fly"},
+        ],
+    )
+    first, second, third = response.json()["ids"]
+    assert counters(thread) == (3, 0)
+    assert thread.main_statement_preview == "Cats are better"
+
+    api_client.post(
+        f"/threads/{thread.id}/relationships/bulk",
+        json=[
+            {"source": second, "target": first, "relationship_type": "supports"},
+            {"source": third, "target": first, "relationship_type": "supports"},
+        ],
+    )
+    assert counters(thread) == (3, 2)
+    assert reconcile_threads() == 0
+
+
+def test_merging_duplicates_keeps_counters(thread):
+    first = Statement.objects.create(thread=thread, content="Cats are better")
+    Statement.objects.create(thread=thread, content="cats are better!")
+    other = Statement.objects.create(thread=thread, content="Dogs are loyal")
+    StatementRelationship.objects.create(source=other, target=first)
+
+    deduplicate_thread(thread.id)
+    assert counters(thread) == (2, 1)
+    assert reconcile_threads() == 0
+
+
+def test_list_threads_by_activity(api_client, thread):
+    older, newer = baker.make(Thread, chat=thread.chat, _quantity=2)
+    Statement.objects.create(thread=older, content="Cats rule")
+
+    response = api_client.get("/threads?order=activity&limit=2")
+    assert [t["id"] for t in response.json()] == [older.id, newer.id]
+    assert response.json()[0]["statement_count"] == 1
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = api_client.get(f"/threads?order=activity&limit=2&cursor={cursor}")
+    assert [t["id"] for t in response.json()] == [thread.id]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_reconcile_command_repairs_drift(thread, capsys):
+    main = Statement.objects.create(thread=thread, content="Cats rule", is_main=True)
+    log = baker.make(Log, thread=thread, details={})
+    other = baker.make(Thread, chat=thread.chat)
+    Thread.objects.update(
+        statement_count=7, relationship_count=3, main_statement_preview="stale"
+    )
+
+    call_command("reconcile_thread_counters", "--dry-run")
+    assert "Would repair 2 threads" in capsys.readouterr().out
+    assert counters(thread) == (7, 3)
+
+    call_command("reconcile_thread_counters", "--thread", str(thread.id))
+    assert "Repaired 1 threads" in capsys.readouterr().out
+    assert counters(thread) == (1, 0)
+    assert thread.main_statement_preview == main.content
+    assert thread.last_activity_at == max(main.updated_at, log.created_at)
+    assert reconcile_threads([other.id]) == 1
+    assert reconcile_threads() == 0
@@ -0,0 +1,307 @@
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from statement.dedupe import (
+    MAX_DISTANCE,
+    distance,
+    duplicate_groups,
+    find_duplicate,
+    find_duplicates,
+    simhash,
+)
+from statement.models import (
+    Log,
+    Statement,
+    StatementRelationship,
+    StatementSignature,
+    Thread,
+)
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def thread(db):
+    return baker.make(Thread, chat=baker.make(Chat))
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("Cats are better than dogs", "cats are better than dogs!"),
+        ("Cats are better than dogs", "Cats  are better than dogs."),
+        (
+            "Global warming is caused by human activity",
+            "Global warming is caused by human activities",
+        ),
+        ("Cats are nice animals", "Cats are nice animal"),
+        (
+            "The price of energy rises because demand grows faster than the supply "
+            "of the grid",
+            "The price of energy rises because demand grows faster than supply of "
+            "the grid",
+        ),
+        (
+            "Climate change is caused by human activity",
+            "Climate change is mainly caused by human activity",
+        ),
+        (
+            "Remote work makes employees more productive",
+            "Remote working makes employees more productive",
+        ),
+        (
+            "Universal basic income would reduce poverty",
+            "A universal basic income would reduce poverty",
+        ),
+        (
+            "Nuclear power is the safest source of energy",
+            "Nuclear power is the safest energy source",
+        ),
+        (
+            "Organic food is healthier than conventional food",
+            "Organic foods are healthier than conventional foods",
+        ),
+        ("Vaccines do not cause autism", "Vaccines don't cause autism"),
+        (
+            "The government should ban single-use plastics",
+            "The government should ban single use plastics",
+        ),
+    ],
+)
+def test_rewordings_are_near_duplicates(a, b):
+    assert distance(simhash(a), simhash(b)) <= MAX_DISTANCE
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        (
+            "Global warming is caused by human activity",
+            "Global warming is not caused by human activity",
+        ),
+        ("Cats are nice animals", "Cats are not nice animals"),
+        ("Vaccines do not cause autism", "Vaccines cause autism"),
+        (
+            "The minimum wage should be raised",
+            "The minimum wage should never be raised",
+        ),
+        (
+            "Space exploration is worth the cost",
+            "Space exploration isn't worth the cost",
+        ),
+        ("Cats are better than dogs", "Cats are worse than dogs"),
+        ("Cats are better than dogs", "The stock market fell sharply today"),
+    ],
+)
+def test_different_claims_are_not_duplicates(a, b):
+    assert distance(simhash(a), simhash(b)) > MAX_DISTANCE
+
+
+def test_rewordings_are_found_through_the_bands(thread):
+    originals = [
+        "Cats are nice animals",
+        "Higher taxes reduce economic growth in the long run",
+        "Exercise improves mental health",
+    ]
+    saved = [Statement.objects.create(thread=thread, content=c) for c in originals]
+    rewordings = [
+        "Cats are nice animal",
+        "Higher taxes reduce the economic growth in the long run",
+        "Regular exercise improves mental health",
+    ]
+    assert [find_duplicate(thread.id, c) for c in rewordings] == [s.id for s in saved]
+    assert find_duplicate(thread.id, "Exercise doesn't improve mental health") is None
+
+
+def test_signatures_follow_saves(thread):
+    statement = Statement.objects.create(thread=thread, content="Cats rule")
+    signature = StatementSignature.objects.get(statement=statement)
+    assert signature.thread_id == thread.id
+
+    statement.content = "Dogs rule"
+    statement.save()
+    assert StatementSignature.objects.get(statement=statement).simhash != (
+        signature.simhash
+    )
+
+
+def test_find_duplicate_is_per_thread(thread):
+    original = Statement.objects.create(thread=thread, content="Cats are better")
+    Statement.objects.create(thread=thread, content="CATS are better!")
+    other_thread = baker.make(Thread, chat=thread.chat)
+
+    assert find_duplicate(thread.id, "cats are better.") == original.id
+    assert find_duplicate(other_thread.id, "cats are better.") is None
+    assert find_duplicate(thread.id, "Dogs are better") is None
+
+
+def test_create_statement_flags_skips_or_rejects(api_client, thread):
+    url = f"/threads/{thread.id}/statements"
+    original = api_client.post(url, json={"content": "Cats are better than dogs"})
+    assert original.json()["duplicate_of"] is None
+    original_id = original.json()["id"]
+
+    flagged = api_client.post(url, json={"content": "cats are better than dogs!"})
+    assert flagged.status_code == 200
+    assert flagged.json()["duplicate_of"] == original_id
+    assert flagged.json()["id"] != original_id
+
+    skipped = api_client.post(
+        f"{url}?on_duplicate=skip", json={"content": "Cats are better than dogs."}
+    )
+    assert skipped.json()["id"] == original_id
+    assert skipped.json()["duplicate_of"] == original_id
+
+    rejected = api_client.post(
+        f"{url}?on_duplicate=reject", json={"content": "CATS are better than dogs"}
+    )
+    assert rejected.status_code == 409
+    assert thread.statements.count() == 2
+
+
+def test_bulk_create_checks_the_thread_and_the_batch(api_client, thread):
+    existing = Statement.objects.create(thread=thread, content="Cats are better")
+    items = [
+        {"content": "Something new entirely"},
+        {"content": "cats are better!"},
+        {"content": "Something NEW, entirely."},
+    ]
+    url = f"/threads/{thread.id}/statements/bulk"
+
+    response = api_client.post(f"{url}?on_duplicate=skip", json=items)
+    data = response.json()
+    new_id = data["ids"][0]
+    assert data["ids"] == [new_id, existing.id, new_id]
+    assert data["duplicate_of"] == [None, existing.id, new_id]
+    assert thread.statements.count() == 2
+    assert StatementSignature.objects.filter(statement_id=new_id).exists()
+
+    response = api_client.post(url, json=items)
+    data = response.json()
+    assert data["duplicate_of"] == [new_id, existing.id, new_id]
+    assert len(set(data["ids"])) == 3
+    assert thread.statements.count() == 5
+
+    response = api_client.post(f"{url}?on_duplicate=reject", json=items)
+    assert response.status_code == 409
+    assert thread.statements.count() == 5
+
+
+def test_bulk_create_hashes_each_item_once(api_client, thread, monkeypatch):
+    import time
+
+    from statement import dedupe
+
+    hashed = []
+
+    def counting_simhash(text):
+        hashed.append(text)
+        return simhash(text)
+
+    monkeypatch.setattr(dedupe, "simhash", counting_simhash)
+    monkeypatch.setattr("statement.api.simhash", counting_simhash)
+    # Templated statements: distinct hashes, many of them sharing a band
+    contents = [f"Statement number {n} says that cats beat dogs" for n in range(10000)]
+
+    started = time.perf_counter()
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        json=[{"content": content} for content in contents],
+    )
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert len(hashed) == len(contents)
+    assert StatementSignature.objects.filter(thread=thread).count() == len(contents)
+    assert elapsed < 6
+
+
+def test_find_duplicates_looks_up_in_batches(
+    thread, monkeypatch, django_assert_num_queries
+):
+    contents = [
+        "Cats are better than dogs",
+        "Remote work makes employees more productive",
+        "Higher taxes reduce economic growth",
+        "Cities should invest in public transport",
+        "Nuclear power is the safest source of energy",
+    ]
+    saved = [Statement.objects.create(thread=thread, content=c) for c in contents]
+    expected = find_duplicates(thread.id, contents)
+    assert [match.statement_id for match in expected] == [s.id for s in saved]
+
+    monkeypatch.setattr("statement.dedupe.SIGN_BATCH_SIZE", 2)
+    with django_assert_num_queries(3):
+        assert find_duplicates(thread.id, contents) == expected
+
+
+@pytest.mark.parametrize("route", ["statements", "statements/bulk"])
+def test_duplicate_lookup_runs_in_the_write_transaction(api_client, thread, route):
+    from unittest.mock import patch
+
+    from django.db import connection
+
+    from statement import dedupe
+
+    savepoints = []
+
+    def find_duplicates(*args):
+        savepoints.append(list(connection.savepoint_ids))
+        return dedupe.find_duplicates(*args)
+
+    payload = {"content": "Cats are better"}
+    with patch("statement.api.find_duplicates", find_duplicates):
+        api_client.post(
+            f"/threads/{thread.id}/{route}?on_duplicate=skip",
+            json=[payload] if route.endswith("bulk") else payload,
+        )
+
+    # The test's own transaction has no savepoint; the view's atomic() adds one
+    assert len(savepoints) == 1 and savepoints[0]
+
+
+def test_dedupe_command_merges_groups(thread):
+    first = Statement.objects.create(thread=thread, content="Cats are better")
+    main = Statement.objects.create(
+        thread=thread, content="cats are better!", is_main=True
+    )
+    copy = Statement.objects.create(thread=thread, content="Cats are better.")
+    other = Statement.objects.create(thread=thread, content="Dogs are loyal")
+    StatementRelationship.objects.create(
+        source=other, target=first, relationship_type="contradicts"
+    )
+    StatementRelationship.objects.create(
+        source=copy, target=other, relationship_type="supports"
+    )
+    StatementRelationship.objects.create(
+        source=copy, target=first, relationship_type="supports"
+    )
+    StatementSignature.objects.filter(statement=copy).delete()
+    elsewhere = Statement.objects.create(
+        thread=baker.make(Thread, chat=thread.chat), content="Cats are better"
+    )
+    StatementSignature.objects.filter(statement=elsewhere).delete()
+
+    def snapshot():
+        return [
+            list(model.objects.order_by("pk").values())
+            for model in (Statement, StatementRelationship, StatementSignature, Log)
+        ]
+
+    before = snapshot()
+    call_command("dedupe_statements", "--dry-run")
+    assert snapshot() == before
+    # The unsigned copy is still found
+    assert duplicate_groups(thread.id) == [[first.id, main.id, copy.id]]
+
+    call_command("dedupe_statements", "--thread", str(thread.id))
+    # Only the requested thread is signed
+    assert not StatementSignature.objects.filter(statement=elsewhere).exists()
+    assert set(thread.statements.all()) == {main, other}
+    assert set(
+        StatementRelationship.objects.values_list(
+            "source_id", "target_id", "relationship_type"
+        )
+    ) == {(other.id, main.id, "contradicts"), (main.id, other.id, "supports")}
+    assert Log.objects.filter(details__action="Merged").count() == 2
+    assert duplicate_groups(thread.id) == []
@@ -0,0 +1,211 @@
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from statement import embeddings
+from statement.embeddings import (
+    EMBED_BATCH_SIZE,
+    EmbeddingIndex,
+    HashingEmbedder,
+    LLMEmbedder,
+    embed_statement_ids,
+    embedding_index,
+    from_blob,
+    to_blob,
+)
+from statement.models import Statement, StatementEmbedding, Thread
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def statements(db):
+    chat = baker.make(Chat)
+    first, second = baker.make(Thread, chat=chat, _quantity=2)
+    return [
+        Statement.objects.create(thread=first, content="Cats are better than dogs"),
+        Statement.objects.create(thread=second, content="Dogs are better than cats"),
+        Statement.objects.create(thread=second, content="The stock market fell today"),
+        Statement.objects.create(thread=first, content="Stock markets fell sharply"),
+    ]
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(64)
+    vectors = embedder.embed(["Cats and dogs", "cats AND dogs", ""])
+
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (3, 64)
+    assert np.allclose(vectors[0], vectors[1])
+    assert np.isclose(np.linalg.norm(vectors[0]), 1)
+    assert not vectors[2].any()
+
+
+def test_vectors_round_trip_through_blobs():
+    vector = HashingEmbedder(8).embed(["hello world"])[0]
+    blob = to_blob(vector)
+
+    assert len(blob) == 8 * 4
+    assert np.array_equal(from_blob(blob), vector)
+    assert np.array_equal(from_blob(memoryview(blob)), vector)
+
+
+def test_index_search_add_and_remove():
+    index = EmbeddingIndex()
+    vectors = np.eye(4, dtype=np.float32)
+    index.add([10, 11, 12], vectors[:3])
+    index.add([13], vectors[3:])
+    index.add([11], vectors[3:])
+
+    assert len(index) == 4
+    assert index.search(vectors[3], 2)[0] in [(11, 1.0), (13, 1.0)]
+    assert [pk for pk, _ in index.search(vectors[3], 2, exclude=[13])] == [11, 10]
+
+    index.remove([10, 99])
+    assert 10 not in index
+    assert {pk for pk, _ in index.search(vectors[0], 10)} == {11, 12, 13}
+    assert np.array_equal(index.vector(13), vectors[3])
+
+
+def test_saving_a_statement_stores_its_embedding(statements):
+    cats = statements[0]
+    stored = StatementEmbedding.objects.get(statement=cats)
+    assert stored.model == "hashing-256"
+
+    cats.is_main = True
+    cats.save(update_fields=["is_main"])
+    assert StatementEmbedding.objects.get(statement=cats).vector == stored.vector
+
+    cats.content = "Something else entirely"
+    cats.save()
+    assert StatementEmbedding.objects.get(statement=cats).vector != stored.vector
+
+
+def test_similar_endpoint_ranks_by_meaning(api_client, statements):
+    cats, dogs, market, markets = statements
+    response = api_client.get(f"/statements/{cats.id}/similar?k=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 2
+    assert data[0]["id"] == dogs.id
+    assert data[0]["thread"] == dogs.thread_id
+    assert data[0]["score"] > data[1]["score"]
+
+    data = api_client.get(f"/statements/{market.id}/similar?k=1").json()
+    assert [r["id"] for r in data] == [markets.id]
+
+
+def test_similar_endpoint_follows_writes(api_client, statements):
+    cats, dogs, *_ = statements
+    api_client.get(f"/statements/{cats.id}/similar")
+
+    dogs.delete()
+    newcomer = Statement.objects.create(
+        thread=cats.thread, content="Cats are better than dogs, surely"
+    )
+    api_client.post(
+        f"/threads/{cats.thread_id}/statements/bulk",
+        json=[{"content": "Dogs are worse than cats"}],
+    )
+
+    data = api_client.get(f"/statements/{cats.id}/similar?k=2").json()
+    assert data[0]["id"] == newcomer.id
+    assert dogs.id not in {r["id"] for r in data}
+    assert len(data) == 2
+
+
+def test_similar_endpoint_embeds_missing_vectors(api_client, statements):
+    StatementEmbedding.objects.all().delete()
+    embedding_index.clear()
+
+    data = api_client.get(f"/statements/{statements[0].id}/similar").json()
+    assert data == []
+    assert StatementEmbedding.objects.filter(statement=statements[0]).exists()
+
+    call_command("embed_statements")
+    assert StatementEmbedding.objects.count() == len(statements)
+    data = api_client.get(f"/statements/{statements[0].id}/similar").json()
+    assert len(data) == len(statements) - 1
+
+
+def test_similar_endpoint_404(api_client, db):
+    assert api_client.get("/statements/999/similar").status_code == 404
+
+
+class FailingEmbedder:
+    name = "failing"
+
+    def embed(self, texts):
+        raise ConnectionError("provider is down")
+
+
+@pytest.fixture
+def background_embeddings(settings, monkeypatch):
+    settings.EMBEDDINGS_EAGER = False
+    # Run the worker's job inline rather than in the thread pool
+    monkeypatch.setattr(
+        embeddings,
+        "get_executor",
+        lambda: SimpleNamespace(submit=lambda func, ids: embed_statement_ids(ids)),
+    )
+
+
+def test_writes_embed_after_commit(
+    api_client, db, background_embeddings, django_capture_on_commit_callbacks
+):
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    url = f"/threads/{thread.id}/statements"
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        statement_id = api_client.post(url, json={"content": "Cats"}).json()["id"]
+        bulk = api_client.post(f"{url}/bulk", json=[{"content": "Dogs"}] * 3)
+    assert not StatementEmbedding.objects.exists()
+
+    for callback in callbacks:
+        callback()
+    assert set(StatementEmbedding.objects.values_list("statement_id", flat=True)) == {
+        statement_id,
+        *bulk.json()["ids"],
+    }
+
+
+def test_embedding_failures_do_not_fail_writes(
+    api_client,
+    db,
+    background_embeddings,
+    monkeypatch,
+    caplog,
+    django_capture_on_commit_callbacks,
+):
+    monkeypatch.setattr(embeddings, "get_embedder", FailingEmbedder)
+    thread = baker.make(Thread, chat=baker.make(Chat))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(
+            f"/threads/{thread.id}/statements", json={"content": "Cats"}
+        )
+    assert response.status_code == 200
+    assert "Failed to embed statements" in caplog.text
+    assert not StatementEmbedding.objects.exists()
+
+    monkeypatch.undo()
+    call_command("embed_statements")
+    assert StatementEmbedding.objects.count() == 1
+
+
+def test_llm_embedder_sends_batches(monkeypatch):
+    sizes = []
+
+    def embedding(model, input):
+        sizes.append(len(input))
+        return SimpleNamespace(data=[{"embedding": [1.0, 0.0]} for _ in input])
+
+    monkeypatch.setitem(sys.modules, "litellm", SimpleNamespace(embedding=embedding))
+    vectors = LLMEmbedder("openai/small").embed(["text"] * (EMBED_BATCH_SIZE + 1))
+
+    assert sizes == [EMBED_BATCH_SIZE, 1]
+    assert vectors.shape == (EMBED_BATCH_SIZE + 1, 2)
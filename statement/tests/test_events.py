@@ -0,0 +1,171 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from django.db import transaction
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory
+from ninja.errors import HttpError
+from model_bakery import baker
+
+from statement.api import thread_events
+from statement.events import EventBus, event_bus, event_stream
+from statement.logbuffer import LogBuffer, log_event
+from statement.models import Log, Statement, StatementRelationship, Thread
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def thread(db):
+    return baker.make(Thread, chat=baker.make(Chat))
+
+
+@pytest.fixture
+def listen():
+    """Open event streams on a loop in another thread, like an ASGI server would."""
+    loop = asyncio.new_event_loop()
+    runner = threading.Thread(target=loop.run_forever, daemon=True)
+    runner.start()
+    streams = []
+
+    def run(coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout=5)
+
+    def open_stream(thread_id):
+        stream = event_stream(thread_id, heartbeat=0.05)
+        streams.append(stream)
+        assert run(anext(stream)) == ": connected\n\n"
+
+        async def take(count):
+            events = []
+            while len(events) < count:
+                chunk = await anext(stream)
+                if chunk.startswith(":"):
+                    continue
+                fields = dict(
+                    line.split(": ", 1) for line in chunk.splitlines() if line
+                )
+                events.append((fields["event"], json.loads(fields["data"])))
+            return events
+
+        return lambda count: run(take(count))
+
+    yield open_stream
+    for stream in streams:
+        run(stream.aclose())
+    loop.call_soon_threadsafe(loop.stop)
+    runner.join()
+    assert not event_bus
+
+
+def test_committed_statements_are_published(
+    listen, thread, api_client, django_capture_on_commit_callbacks
+):
+    events = listen(thread.id)
+    with django_capture_on_commit_callbacks(execute=True):
+        statement = Statement.objects.create(thread=thread, content="Live")
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(ValueError), transaction.atomic():
+            Statement.objects.create(thread=thread, content="Rolled back")
+            raise ValueError
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.post(
+            f"/threads/{thread.id}/statements/bulk",
+            json=[{"content": "One"}, {"content": "Two"}],
+        )
+
+    received = events(3)
+    assert [kind for kind, _ in received] == ["statement"] * 3
+    assert received[0][1]["id"] == statement.id
+    assert [data["content"] for _, data in received] == ["Live", "One", "Two"]
+
+
+def test_relationships_and_logs_are_published(
+    listen, thread, api_client, django_capture_on_commit_callbacks
+):
+    a, b, c = baker.make(Statement, thread=thread, _quantity=3)
+    other_thread = baker.make(Thread, chat=thread.chat)
+    events = listen(thread.id)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StatementRelationship.objects.create(
+            source=a, target=b, relationship_type="supports"
+        )
+        api_client.post(
+            f"/threads/{thread.id}/relationships/bulk",
+            json=[
+                {"source": a.id, "target": b.id, "relationship_type": "supports"},
+                {"source": b.id, "target": c.id, "relationship_type": "contradicts"},
+            ],
+        )
+        log_event(other_thread.id, {"action": "Ignored"})
+        log_event(thread.id, {"action": "Noticed"})
+
+    received = events(3)
+    assert received[0] == (
+        "relationship",
+        {
+            "id": received[0][1]["id"],
+            "source": a.id,
+            "target": b.id,
+            "relationship_type": "supports",
+            "created_at": received[0][1]["created_at"],
+        },
+    )
+    assert received[1][0] == "relationship"
+    assert (received[1][1]["source"], received[1][1]["target"]) == (b.id, c.id)
+    assert received[2][0] == "log"
+    assert received[2][1]["details"] == {"action": "Noticed"}
+
+
+def test_buffered_logs_are_published_when_written(listen, thread):
+    events = listen(thread.id)
+    buffer = LogBuffer(max_size=10, flush_interval=60)
+    buffer.add(Log(thread=thread, details={"action": "Buffered"}))
+    buffer.flush()
+
+    [(kind, data)] = events(1)
+    assert kind == "log"
+    assert data["id"] == Log.objects.get().id
+
+
+def test_slow_subscribers_are_disconnected():
+    bus = EventBus(max_queued=2)
+
+    async def main():
+        subscription = bus.subscribe(1)
+        for i in range(3):
+            bus.publish(1, "log", {"i": i})
+        await asyncio.sleep(0)
+        return subscription
+
+    subscription = asyncio.run(main())
+    assert subscription.overflowed
+    assert subscription.queue.qsize() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_endpoint():
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    request = AsyncRequestFactory().get(f"/threads/{thread.id}/events")
+
+    # Called directly: the test clients read streams to the end, which an
+    # event stream never reaches
+    async def main():
+        with pytest.raises(Http404):
+            await thread_events(request, 999)
+        response = await thread_events(request, thread.id)
+        first = await anext(aiter(response.streaming_content))
+        await response.streaming_content.aclose()
+        return response, first
+
+    response, first = asyncio.run(main())
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+    assert first == b": connected\n\n"
+    assert not event_bus
+
+    with pytest.raises(HttpError) as error:
+        asyncio.run(thread_events(RequestFactory().get("/"), thread.id))
+    assert error.value.status_code == 501
@@ -0,0 +1,130 @@
+import random
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from django_llm_chat.models import Chat
+from statement.graph import reachable, shortest_path
+from statement.models import Statement, StatementRelationship, Thread
+
+
+def test_reachable_ancestors(chain):
+    a, b, c, d, e = chain
+    assert reachable(a.id, 2, direction="in") == [(a.id, 0), (b.id, 1), (c.id, 2)]
+    assert dict(reachable(a.id, 5, direction="in")) == {
+        a.id: 0,
+        b.id: 1,
+        c.id: 2,
+        d.id: 3,
+        e.id: 3,
+    }
+
+
+def test_reachable_filters_types(chain):
+    a, b, c, d, e = chain
+    assert {pk for pk, _ in reachable(a.id, 5, ["supports"], "in")} == {
+        a.id,
+        b.id,
+        c.id,
+        e.id,
+    }
+
+
+def test_reachable_descendants_survive_cycles(chain):
+    a, b, c, d, e = chain
+    assert dict(reachable(d.id, 10, direction="out")) == {
+        d.id: 0,
+        c.id: 1,
+        b.id: 2,
+        e.id: 2,
+        a.id: 3,
+    }
+
+
+def test_reachable_limit(chain):
+    a, *_ = chain
+    assert len(reachable(a.id, 5, direction="both", limit=2)) == 2
+
+
+def test_shortest_path(chain):
+    a, b, c, d, e = chain
+    assert shortest_path(d.id, a.id) == [d.id, c.id, b.id, a.id]
+    assert shortest_path(a.id, d.id) is None
+    assert shortest_path(a.id, d.id, direction="in") == [a.id, b.id, c.id, d.id]
+    assert shortest_path(d.id, a.id, types=["supports"]) is None
+    assert shortest_path(d.id, a.id, max_depth=2) is None
+
+
+@pytest.mark.django_db
+def test_shortest_path_on_dense_graphs():
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    nodes = baker.make(Statement, thread=thread, is_main=False, _quantity=231)
+    nodes, unreachable, clique = nodes[:200], nodes[200], nodes[201:]
+    rng = random.Random(0)
+    StatementRelationship.objects.bulk_create(
+        StatementRelationship(source=node, target=target)
+        for node in nodes
+        for target in rng.sample([other for other in nodes if other != node], 12)
+    )
+    StatementRelationship.objects.bulk_create(
+        StatementRelationship(source=a, target=b)
+        for a in clique
+        for b in clique
+        if a != b
+    )
+
+    started = time.monotonic()
+    with CaptureQueriesContext(connection) as captured:
+        assert shortest_path(nodes[0].id, unreachable.id) is None
+    # One query per level, and each statement is expanded once
+    assert len(captured) <= 6
+    with CaptureQueriesContext(connection) as captured:
+        path = shortest_path(clique[0].id, clique[1].id, max_depth=4)
+    assert path == [clique[0].id, clique[1].id]
+    assert len(captured) == 1
+    assert time.monotonic() - started < 1
+
+
+def test_statement_graph_endpoint(api_client, chain):
+    a, b, c, d, e = chain
+
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(
+            f"/statements/{a.id}/graph?depth=2&direction=in&types=supports"
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["root"] == a.id
+    assert [(n["id"], n["distance"]) for n in data["nodes"]] == [
+        (a.id, 0),
+        (b.id, 1),
+        (c.id, 2),
+    ]
+    assert {(edge["source"], edge["target"]) for edge in data["edges"]} == {
+        (b.id, a.id),
+        (c.id, b.id),
+    }
+    assert data["truncated"] is False
+    assert len(captured) == 4
+
+
+def test_statement_graph_truncated(api_client, chain):
+    a, *_ = chain
+    response = api_client.get(f"/statements/{a.id}/graph?depth=5&limit=2")
+    assert response.json()["truncated"] is True
+    assert len(response.json()["nodes"]) == 2
+
+
+def test_statement_graph_not_found(api_client, db):
+    assert api_client.get("/statements/999/graph").status_code == 404
+
+
+def test_statement_path_endpoint(api_client, chain):
+    a, b, c, d, e = chain
+    response = api_client.get(f"/statements/{d.id}/path?to={a.id}")
+    assert response.status_code == 200
+    assert response.json() == {"path": [d.id, c.id, b.id, a.id]}
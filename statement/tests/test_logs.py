@@ -0,0 +1,124 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.utils import timezone
+from model_bakery import baker
+
+from statement.log_archive import archive_logs
+from statement.logbuffer import LogBuffer, log_buffer, log_event
+from statement.models import Log, Thread
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def thread(db):
+    return baker.make(Thread, chat=baker.make(Chat))
+
+
+def test_log_buffer_batches_writes(thread, django_assert_num_queries):
+    buffer = LogBuffer(max_size=100, flush_interval=3600)
+    for i in range(10):
+        buffer.add(Log(thread=thread, details={"n": i}))
+
+    assert len(buffer) == 10
+    assert not Log.objects.exists()
+
+    # Live threads, the insert and the threads' last activity, in a
+    # savepoint of the test's transaction
+    with django_assert_num_queries(5):
+        assert buffer.flush() == 10
+    assert len(buffer) == 0
+    logs = Log.objects.order_by("id")
+    assert [log.details["n"] for log in logs] == list(range(10))
+    thread.refresh_from_db()
+    assert thread.last_activity_at == logs.last().created_at
+
+
+def test_log_buffer_keeps_rows_when_the_write_fails(thread, monkeypatch):
+    buffer = LogBuffer(max_size=100, flush_interval=3600)
+    for i in range(3):
+        buffer.add(Log(thread=thread, details={"n": i}))
+
+    def fail(*args, **kwargs):
+        raise DatabaseError("disk I/O error")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(Log.objects, "bulk_create", fail)
+        with pytest.raises(DatabaseError):
+            buffer.flush()
+    assert len(buffer) == 3
+    assert not Log.objects.exists()
+
+    buffer.add(Log(thread=thread, details={"n": 3}))
+    assert buffer.flush() == 4
+    assert [log.details["n"] for log in Log.objects.order_by("id")] == [0, 1, 2, 3]
+
+
+def test_log_buffer_skips_deleted_threads(thread):
+    gone = baker.make(Thread, chat=thread.chat)
+    buffer = LogBuffer(flush_interval=3600)
+    buffer.add(Log(thread=thread, details={}))
+    buffer.add(Log(thread_id=gone.id, details={}))
+    gone.delete()
+
+    assert buffer.flush() == 1
+    assert list(Log.objects.values_list("thread_id", flat=True)) == [thread.id]
+
+
+def test_log_event_waits_for_commit(
+    thread, settings, django_capture_on_commit_callbacks
+):
+    settings.LOG_WRITES_EAGER = False
+    before = timezone.now()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        log_event(thread.id, {"action": "Created"})
+        assert len(log_buffer) == 0
+    assert len(log_buffer) == 1
+
+    log_buffer.flush()
+    log = Log.objects.get()
+    # The entry keeps the time of the event, not of the flush
+    assert before <= log.created_at <= timezone.now()
+
+
+def test_archive_logs(thread, tmp_path):
+    now = timezone.now()
+    old = [
+        baker.make(Log, thread=thread, details={"n": i}, created_at=created_at)
+        for i, created_at in enumerate(
+            [now - timedelta(days=400), now - timedelta(days=200)] * 2
+        )
+    ]
+    recent = baker.make(Log, thread=thread, details={}, created_at=now)
+
+    archived = archive_logs(now - timedelta(days=90), tmp_path, batch_size=3)
+
+    assert sum(archived.values()) == 4
+    assert len(archived) == 2
+    assert list(Log.objects.all()) == [recent]
+
+    rows = []
+    for path in archived:
+        assert path.name.startswith("logs-") and path.name.endswith(".ndjson.gz")
+        with gzip.open(path, "rt") as f:
+            rows.extend(json.loads(line) for line in f)
+    assert sorted(row["id"] for row in rows) == sorted(log.id for log in old)
+    assert {row["thread"] for row in rows} == {thread.id}
+
+
+def test_archive_logs_command(thread, tmp_path):
+    baker.make(
+        Log, thread=thread, details={}, created_at=timezone.now() - timedelta(days=30)
+    )
+
+    call_command(
+        "archive_logs", "--older-than-days", "7", "--output-dir", str(tmp_path)
+    )
+
+    assert not Log.objects.exists()
+    assert len(list(tmp_path.glob("logs-*.ndjson.gz"))) == 1
@@ -0,0 +1,102 @@
+"""Every route runs within its ``query_budget`` however much data it returns."""
+
+import pytest
+from model_bakery import baker
+
+from statement.api import BULK_BATCH_SIZE
+from statement.graph import MAX_PATH_DEPTH
+from statement.models import Log, Statement, StatementRelationship, Thread
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture(params=[1, 25], ids=lambda size: f"{size} rows")
+def populated(request, db):
+    """``size`` threads, statements, relationships and logs."""
+    size = request.param
+    thread, *_ = baker.make(Thread, chat=baker.make(Chat), _quantity=size)
+    statements = [
+        Statement.objects.create(
+            thread=thread, content=f"Claim {i} about cats {'!' * i}", is_main=i == 0
+        )
+        for i in range(size + 1)
+    ]
+    for source, target in zip(statements[1:], statements):
+        StatementRelationship.objects.create(
+            source=source, target=target, relationship_type="supports"
+        )
+    baker.make(Log, thread=thread, details={"action": "Created"}, _quantity=size)
+    return thread, statements
+
+
+def test_thread_routes(api_client, populated):
+    thread, statements = populated
+    size = len(statements) - 1
+
+    assert len(api_client.get("/threads").json()) == size
+    assert api_client.get(f"/threads/{thread.id}").status_code == 200
+    assert api_client.post("/threads").status_code == 200
+    assert len(api_client.get(f"/threads/{thread.id}/statements").json()) == size + 1
+    detail = api_client.get(f"/threads/{thread.id}/detail").json()
+    assert detail["statement_count"] == size
+    assert len(api_client.get(f"/threads/{thread.id}/logs").json()) >= size
+    relationships = api_client.get(f"/threads/{thread.id}/relationships").json()
+    assert len(relationships["source"]) == size
+
+
+def test_write_routes(api_client, populated):
+    thread, statements = populated
+    size = len(statements) - 1
+
+    response = api_client.post(
+        f"/threads/{thread.id}/statements", json={"content": "Dogs can swim"}
+    )
+    assert response.status_code == 200
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        json=[{"content": f"Dogs bark {'?' * i}"} for i in range(size)],
+    )
+    assert len(response.json()["ids"]) == size
+    response = api_client.post(
+        f"/threads/{thread.id}/relationships/bulk",
+        json=[
+            {"source": source.id, "target": target.id, "relationship_type": "refines"}
+            for source, target in zip(statements, statements[1:])
+        ],
+    )
+    assert response.json()["created"] == size
+
+
+@pytest.mark.parametrize(
+    "size", [2, 2 * BULK_BATCH_SIZE + 1], ids=lambda size: f"{size} items"
+)
+def test_bulk_routes_budget_per_batch(api_client, db, size):
+    thread = baker.make(Thread, chat=baker.make(Chat))
+
+    response = api_client.post(
+        f"/threads/{thread.id}/statements/bulk",
+        json=[{"content": f"Claim {i}: {'cats ' * (i % 7)}"} for i in range(size)],
+    )
+    ids = response.json()["ids"]
+    assert len(ids) == size
+    response = api_client.post(
+        f"/threads/{thread.id}/relationships/bulk",
+        json=[
+            {"source": source, "target": target} for source, target in zip(ids, ids[1:])
+        ],
+    )
+    assert response.json()["created"] == size - 1
+
+
+def test_statement_routes(api_client, populated):
+    _, statements = populated
+    first, last = statements[0], statements[-1]
+
+    assert api_client.get("/statements/search?q=cats").status_code == 200
+    assert api_client.get(f"/statements/{first.id}/similar").status_code == 200
+    graph = api_client.get(f"/statements/{last.id}/graph?depth=10").json()
+    assert len(graph["nodes"]) == min(len(statements), 11)
+    # The statement MAX_PATH_DEPTH hops back along the chain, or the first
+    start = max(0, len(statements) - 1 - MAX_PATH_DEPTH)
+    on_path = statements[start:]
+    path = api_client.get(f"/statements/{last.id}/path?to={on_path[0].id}").json()
+    assert path["path"] == [statement.id for statement in reversed(on_path)]
@@ -0,0 +1,147 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from statement.models import Log, Statement, StatementRelationship, Thread
+from django_llm_chat.models import Chat
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite specific"
+)
+
+# "SCAN <table>" without "USING ... INDEX" means SQLite reads the whole table.
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)\S+$")
+
+
+def full_scans(sql: str, params=()) -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall() if FULL_SCAN.match(row[-1])]
+
+
+def assert_no_full_scans(captured: CaptureQueriesContext) -> None:
+    selects = [
+        q["sql"] for q in captured.captured_queries if q["sql"].startswith("SELECT")
+    ]
+    assert selects, "No SELECT queries were captured"
+    for sql in selects:
+        assert not full_scans(sql), f"Full table scan in: {sql}"
+
+
+def assert_queryset_uses_index(queryset) -> None:
+    sql, params = queryset.query.sql_with_params()
+    assert not full_scans(sql, params), f"Full table scan in: {sql}"
+
+
+@pytest.fixture
+def graph(db):
+    chat = baker.make(Chat)
+    threads = baker.make(Thread, chat=chat, _quantity=20)
+    for thread in threads:
+        main = baker.make(Statement, thread=thread, is_main=True)
+        others = baker.make(Statement, thread=thread, is_main=False, _quantity=5)
+        for other in others:
+            baker.make(
+                StatementRelationship,
+                source=other,
+                target=main,
+                relationship_type="supports",
+            )
+        baker.make(Log, thread=thread, details={"action": "Created"}, _quantity=5)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return threads
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("order", ["created", "activity"])
+def test_list_threads_plan(api_client, graph, order):
+    url = f"/threads?limit=5&order={order}"
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    assert_no_full_scans(captured)
+
+    cursor = response.headers["X-Next-Cursor"]
+    with CaptureQueriesContext(connection) as captured:
+        assert api_client.get(f"{url}&cursor={cursor}").status_code == 200
+    assert_no_full_scans(captured)
+
+
+@pytest.mark.django_db
+def test_get_thread_plan(api_client, graph):
+    with CaptureQueriesContext(connection) as captured:
+        assert api_client.get(f"/threads/{graph[0].id}").status_code == 200
+    assert_no_full_scans(captured)
+
+
+@pytest.mark.django_db
+def test_list_statements_plan(api_client, graph):
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(f"/threads/{graph[0].id}/statements")
+    assert response.status_code == 200
+    assert_no_full_scans(captured)
+
+
+@pytest.mark.django_db
+def test_main_statement_lookup_plan(graph):
+    assert_queryset_uses_index(Statement.objects.filter(thread=graph[0], is_main=True))
+
+
+@pytest.mark.django_db
+def test_thread_logs_plan(graph):
+    assert_queryset_uses_index(graph[0].logs.all())
+
+
+@pytest.mark.django_db
+def test_relationship_lookup_plans(graph):
+    statement = graph[0].statements.get(is_main=True)
+    assert_queryset_uses_index(
+        StatementRelationship.objects.filter(
+            target=statement, relationship_type="supports"
+        )
+    )
+    assert_queryset_uses_index(
+        StatementRelationship.objects.filter(
+            source=statement, relationship_type="supports"
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_export_relationships_plan(api_client, graph):
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.get(f"/threads/{graph[0].id}/relationships")
+    assert response.status_code == 200
+    assert_no_full_scans(captured)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query, index",
+    [
+        ("action=Created", "log_thread_action_idx"),
+        ("entity_type=Note", "log_thread_entity_type_idx"),
+    ],
+)
+def test_list_thread_logs_plan(api_client, graph, query, index):
+    # Explain the SQL with its real parameters, not the captured string
+    executed = []
+
+    def record(execute, sql, params, many, context):
+        executed.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        response = api_client.get(f"/threads/{graph[0].id}/logs?limit=2&{query}")
+    assert response.status_code == 200
+
+    sql, params = executed[-1]
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        steps = [row[-1] for row in cursor.fetchall()]
+    assert any(index in step for step in steps), steps
+    assert not any(FULL_SCAN.match(step) for step in steps), steps
@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from model_bakery import baker
+
+from statement.models import Statement, Thread
+from statement.search import search_statements
+from django_llm_chat.models import Chat
+
+
+@pytest.fixture
+def statements(db):
+    chat = baker.make(Chat)
+    first, second = baker.make(Thread, chat=chat, _quantity=2)
+    return [
+        Statement.objects.create(thread=first, content="Cats are better than dogs"),
+        Statement.objects.create(thread=first, content="Dogs are loyal companions"),
+        Statement.objects.create(thread=second, content="Dogs dogs dogs everywhere"),
+        Statement.objects.create(thread=second, content="Nothing to see here"),
+    ]
+
+
+def test_search_ranks_matches(statements):
+    results = search_statements("dogs")
+
+    assert {r["id"] for r in results} == {s.id for s in statements[:3]}
+    assert results[0]["id"] == statements[2].id
+    assert "[dogs]" in results[0]["snippet"].lower()
+
+
+def test_search_filters_by_thread(statements):
+    results = search_statements("dogs", thread_id=statements[0].thread_id)
+    assert {r["id"] for r in results} == {statements[0].id, statements[1].id}
+
+
+def test_search_index_follows_updates_and_deletes(statements):
+    cats, loyal, *_ = statements
+    cats.content = "Birds are better than fish"
+    cats.save()
+    loyal.delete()
+
+    assert {r["id"] for r in search_statements("cats")} == set()
+    assert [r["id"] for r in search_statements("birds")] == [cats.id]
+    assert loyal.id not in {r["id"] for r in search_statements("loyal")}
+
+
+def test_search_indexes_bulk_created_statements(statements):
+    thread = statements[0].thread
+    Statement.objects.bulk_create(
+        [Statement(thread=thread, content=f"Bulk zebra {i}") for i in range(3)]
+    )
+    assert len(search_statements("zebra")) == 3
+
+
+def test_search_tolerates_query_syntax(statements):
+    assert search_statements('dogs" OR (') == []
+    assert search_statements("   ") == []
+
+
+def test_search_endpoint(api_client, statements):
+    response = api_client.get("/statements/search?q=loyal+dogs")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["id"] for r in data] == [statements[1].id]
+    assert set(data[0]) == {"id", "thread", "content", "is_main", "snippet", "rank"}
+
+
+def test_admin_search_uses_index(statements):
+    model_admin = site._registry[Statement]
+    request = RequestFactory().get("/admin/statement/statement/", {"q": "dogs"})
+    queryset, may_have_duplicates = model_admin.get_search_results(
+        request, Statement.objects.all(), "dogs"
+    )
+
+    assert set(queryset) == set(statements[:3])
+    assert may_have_duplicates is False
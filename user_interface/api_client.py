@@ -0,0 +1,138 @@
+"""HTTP clients for the backend API with pooled keep-alive connections.
+
+``BackendClient`` wraps a ``requests.Session`` so consecutive calls reuse TCP
+connections, and adds default timeouts and retries of idempotent requests on
+connection errors and 502/503/504 answers. ``AsyncBackendClient`` exposes the
+same calls as coroutines so independent requests can be fanned out with
+``asyncio.gather``; it runs the pooled session in worker threads, so no extra
+HTTP library is needed. Given a ``ResponseCache``, GET requests are sent as
+conditional requests and 304 answers are served from the cache.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from user_interface.response_cache import ResponseCache
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = (3.05, 60)
+DEFAULT_RETRIES = 3
+DEFAULT_POOL_SIZE = 10
+
+
+class BackendClient:
+    def __init__(
+        self,
+        api_url: str,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.api_url = api_url.rstrip("/")
+        self.cache = cache
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                # POSTs create rows, so they are never retried
+                allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.api_url}{path}"
+        cache = self.cache if method == "GET" else None
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None:
+            kwargs["headers"] = {**cached.validators, **(kwargs.get("headers") or {})}
+
+        response = self.session.request(method, url, **kwargs)
+        if cached is not None and response.status_code == 304:
+            return cached.to_response(response)
+        if cache is not None:
+            cache.store(url, response)
+        return response
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def stream(
+        self, path: str, method: str = "GET", **kwargs: Any
+    ) -> requests.Response:
+        """Send a request whose response is read as it arrives, never cached."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(
+            method, f"{self.api_url}{path}", stream=True, **kwargs
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "BackendClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncBackendClient:
+    def __init__(self, api_url: str, **kwargs: Any) -> None:
+        self.client = BackendClient(api_url, **kwargs)
+        # More in-flight requests than pooled connections would just queue
+        self._semaphore = asyncio.Semaphore(self.client.pool_size)
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        async with self._semaphore:
+            return await asyncio.to_thread(self.client.request, method, path, **kwargs)
+
+    async def get(self, path: str, **kwargs: Any) -> requests.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> requests.Response:
+        return await self.request("POST", path, **kwargs)
+
+    @staticmethod
+    async def gather(*calls: Awaitable[T]) -> List[T]:
+        return list(await asyncio.gather(*calls))
+
+    def close(self) -> None:
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncBackendClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_clients: Dict[str, BackendClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_url: str) -> BackendClient:
+    """Shared ``BackendClient`` per base URL, so connections are reused."""
+    with _clients_lock:
+        client = _clients.get(api_url)
+        if client is None:
+            client = _clients[api_url] = BackendClient(api_url, cache=ResponseCache())
+        return client
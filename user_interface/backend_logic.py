@@ -1,15 +1,56 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from itertools import batched
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+from urllib.parse import urlencode
+
 import requests
-from typing import Optional, Dict, Any, List, Tuple
 
+from user_interface.api_client import AsyncBackendClient, get_client
+from user_interface.response_cache import ResponseCache
 
-def fetch_threads(api_url: str) -> List[Dict[str, Any]]:
-    response = requests.get(f"{api_url}/api/statement/threads")
+THREADS_PAGE_SIZE = 100
+LOGS_PAGE_SIZE = 100
+STATEMENTS_BULK_BATCH_SIZE = 5000
+RELATIONSHIPS_BULK_BATCH_SIZE = 5000
+
+
+def use_disk_cache(api_url: str, directory: str) -> None:
+    """Keep cached GET responses for ``api_url`` in ``directory`` across runs."""
+    get_client(api_url).cache = ResponseCache(directory)
+
+
+def fetch_threads_page(
+    api_url: str, cursor: Optional[str] = None, limit: int = THREADS_PAGE_SIZE
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    query: Dict[str, Any] = {"limit": limit}
+    if cursor:
+        query["cursor"] = cursor
+    response = get_client(api_url).get(f"/api/statement/threads?{urlencode(query)}")
     response.raise_for_status()
-    return response.json()
+    return response.json(), response.headers.get("X-Next-Cursor")
+
+
+def iter_thread_pages(
+    api_url: str, limit: int = THREADS_PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    cursor = None
+    while True:
+        threads, cursor = fetch_threads_page(api_url, cursor, limit)
+        yield threads
+        if not cursor:
+            return
+
+
+def fetch_threads(api_url: str) -> List[Dict[str, Any]]:
+    return [thread for page in iter_thread_pages(api_url) for thread in page]
 
 
 def create_thread(api_url: str) -> Dict[str, Any]:
-    response = requests.post(f"{api_url}/api/statement/threads")
+    response = get_client(api_url).post("/api/statement/threads")
     response.raise_for_status()
     return response.json()
 
@@ -17,16 +58,64 @@ def create_thread(api_url: str) -> Dict[str, Any]:
 def create_statement(
     api_url: str, thread_id: str, content: str, is_main: bool
 ) -> Dict[str, Any]:
-    response = requests.post(
-        f"{api_url}/api/statement/threads/{thread_id}/statements",
+    response = get_client(api_url).post(
+        f"/api/statement/threads/{thread_id}/statements",
         json={"content": content, "is_main": is_main},
     )
     response.raise_for_status()
     return response.json()
 
 
+def create_statements_bulk(
+    api_url: str,
+    thread_id: str,
+    statements: Iterable[Dict[str, Any]],
+    batch_size: int = STATEMENTS_BULK_BATCH_SIZE,
+) -> List[int]:
+    """Create statements in batches of ``batch_size``, one request per batch.
+
+    Each batch is written atomically by the backend; earlier batches stay
+    committed if a later one fails.
+    """
+    ids: List[int] = []
+    for batch in batched(statements, batch_size):
+        response = get_client(api_url).post(
+            f"/api/statement/threads/{thread_id}/statements/bulk",
+            json=list(batch),
+        )
+        response.raise_for_status()
+        ids.extend(response.json()["ids"])
+    return ids
+
+
+def import_relationships(
+    api_url: str,
+    thread_id: str,
+    relationships: Iterable[Dict[str, Any]],
+    batch_size: int = RELATIONSHIPS_BULK_BATCH_SIZE,
+) -> int:
+    """Upsert relationship edges in batches and return how many were new."""
+    created = 0
+    for batch in batched(relationships, batch_size):
+        response = get_client(api_url).post(
+            f"/api/statement/threads/{thread_id}/relationships/bulk",
+            json=list(batch),
+        )
+        response.raise_for_status()
+        created += response.json()["created"]
+    return created
+
+
+def export_relationships(api_url: str, thread_id: str) -> Dict[str, List[Any]]:
+    response = get_client(api_url).get(
+        f"/api/statement/threads/{thread_id}/relationships"
+    )
+    response.raise_for_status()
+    return response.json()
+
+
 def fetch_thread(api_url: str, thread_id: str) -> Optional[Dict[str, Any]]:
-    response = requests.get(f"{api_url}/api/statement/threads/{thread_id}")
+    response = get_client(api_url).get(f"/api/statement/threads/{thread_id}")
     if response.status_code == 404:
         return None
     response.raise_for_status()
@@ -34,27 +123,241 @@ def fetch_thread(api_url: str, thread_id: str) -> Optional[Dict[str, Any]]:
 
 
 def fetch_statements(api_url: str, thread_id: str) -> List[Dict[str, Any]]:
-    response = requests.get(f"{api_url}/api/statement/threads/{thread_id}/statements")
+    response = get_client(api_url).get(f"/api/statement/threads/{thread_id}/statements")
     response.raise_for_status()
     return response.json()
 
 
+def fetch_thread_detail(api_url: str, thread_id: str) -> Optional[Dict[str, Any]]:
+    response = get_client(api_url).get(f"/api/statement/threads/{thread_id}/detail")
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_thread_logs_page(
+    api_url: str,
+    thread_id: str,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = LOGS_PAGE_SIZE,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    query: Dict[str, Any] = {"limit": limit}
+    if cursor:
+        query["cursor"] = cursor
+    if since:
+        query["since"] = since.isoformat()
+    response = get_client(api_url).get(
+        f"/api/statement/threads/{thread_id}/logs?{urlencode(query)}"
+    )
+    response.raise_for_status()
+    return response.json(), response.headers.get("X-Next-Cursor")
+
+
+def tail_thread_logs(
+    api_url: str,
+    thread_id: str,
+    since: datetime,
+    poll_interval: float = 2.0,
+    lag: float = 5.0,
+) -> Iterator[Dict[str, Any]]:
+    """Yield a thread's logs from ``since`` on, then poll for new ones forever.
+
+    Log entries are written in batches and can land a few seconds after their
+    ``created_at``, so every poll re-reads the last ``lag`` seconds and skips
+    the entries it already yielded.
+    """
+    seen: Dict[int, datetime] = {}
+    while True:
+        cursor = None
+        while True:
+            logs, cursor = fetch_thread_logs_page(api_url, thread_id, cursor, since)
+            for log in logs:
+                if log["id"] not in seen:
+                    seen[log["id"]] = datetime.fromisoformat(log["created_at"])
+                    yield log
+            if not cursor:
+                break
+
+        if seen:
+            since = max(since, max(seen.values()) - timedelta(seconds=lag))
+            seen = {pk: at for pk, at in seen.items() if at >= since}
+        time.sleep(poll_interval)
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse Server-Sent Events lines into ``(event, data)`` pairs.
+
+    Comments (heartbeats) and event IDs are skipped.
+    """
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line.removeprefix("event:").strip()
+        elif line.startswith("data:"):
+            data.append(line.removeprefix("data:").removeprefix(" "))
+
+
+def watch_thread_events(
+    api_url: str, thread_id: str, retry_interval: float = 2.0
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(kind, data)`` for every change pushed to a thread, forever.
+
+    Kinds are ``statement``, ``relationship`` and ``log``, or ``overflow`` when
+    the server dropped events because they came in faster than they were read.
+    Dropped connections are re-opened; changes made in between are missed.
+
+    Servers that cannot stream (the events endpoint answers 501 outside ASGI)
+    are polled with ``tail_thread_logs`` instead: a single ``polling`` event is
+    yielded, followed by a ``log`` event for every new log entry.
+    """
+    client = get_client(api_url)
+    started_at = datetime.now(timezone.utc)
+    while True:
+        with client.stream(f"/api/statement/threads/{thread_id}/events") as response:
+            if response.status_code == 501:
+                break
+            response.raise_for_status()
+            try:
+                yield from iter_sse(
+                    response.iter_lines(chunk_size=None, decode_unicode=True)
+                )
+            except requests.RequestException:
+                pass
+        time.sleep(retry_interval)
+
+    yield "polling", {}
+    for log in tail_thread_logs(api_url, thread_id, started_at, retry_interval):
+        yield "log", log
+
+
+def fetch_thread_details(
+    api_url: str, thread_ids: Iterable[str]
+) -> List[Optional[Dict[str, Any]]]:
+    """Fetch several thread details concurrently, in the order given."""
+
+    async def fetch_all() -> List[Any]:
+        async with AsyncBackendClient(api_url) as client:
+            return await client.gather(
+                *(
+                    client.get(f"/api/statement/threads/{thread_id}/detail")
+                    for thread_id in thread_ids
+                )
+            )
+
+    details = []
+    for response in asyncio.run(fetch_all()):
+        if response.status_code == 404:
+            details.append(None)
+            continue
+        response.raise_for_status()
+        details.append(response.json())
+    return details
+
+
 def verify_llm_auth_connection(api_url: str) -> Dict[str, Any]:
-    response = requests.post(f"{api_url}/api/configuration/test-llm-auth")
+    response = get_client(api_url).post("/api/configuration/test-llm-auth")
     response.raise_for_status()
     return response.json()
 
 
+def create_llm_job(api_url: str, prompt: Optional[str] = None) -> Dict[str, Any]:
+    payload = {"prompt": prompt} if prompt is not None else {}
+    response = get_client(api_url).post("/api/configuration/llm-jobs", json=payload)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_llm_job(api_url: str, job_id: int) -> Dict[str, Any]:
+    response = get_client(api_url).get(f"/api/configuration/llm-jobs/{job_id}")
+    response.raise_for_status()
+    return response.json()
+
+
+def wait_for_llm_job(
+    api_url: str, job_id: int, poll_interval: float = 0.5, timeout: float = 120
+) -> Dict[str, Any]:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = fetch_llm_job(api_url, job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"LLM job {job_id} did not finish in {timeout}s")
+        time.sleep(poll_interval)
+
+
+def stream_llm_answer(
+    api_url: str, prompt: Optional[str] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Queue an LLM job and yield its answer as the model produces it.
+
+    Yields a ``token`` event with ``{"text": ...}`` for every piece of the
+    answer, then either ``done`` with ``{"answer": ...}`` or ``error`` with
+    ``{"error": ...}``. Servers that cannot stream (the events endpoint
+    answers 501 outside ASGI) are polled with ``wait_for_llm_job`` instead,
+    as are streams that drop before the job finishes; the answer then only
+    comes with ``done``.
+    """
+    payload = {"prompt": prompt} if prompt is not None else {}
+    response = get_client(api_url).post("/api/configuration/llm-jobs", json=payload)
+    if response.status_code == 400:
+        yield "error", {"error": response.json()["detail"]}
+        return
+    response.raise_for_status()
+    job_id = response.json()["id"]
+
+    job = None
+    path = f"/api/configuration/llm-jobs/{job_id}/events"
+    with get_client(api_url).stream(path) as events:
+        if events.status_code != 501:
+            events.raise_for_status()
+            try:
+                lines = events.iter_lines(chunk_size=None, decode_unicode=True)
+                for kind, data in iter_sse(lines):
+                    if kind == "token":
+                        yield kind, data
+                    elif kind in ("succeeded", "failed"):
+                        job = data
+                        break
+            except requests.RequestException:
+                pass
+    if job is None:
+        job = wait_for_llm_job(api_url, job_id)
+
+    if job["status"] == "failed":
+        yield "error", {"error": job["error"]}
+    else:
+        yield "done", {"answer": job["answer"]}
+
+
+def run_llm_auth_test(api_url: str) -> Dict[str, Any]:
+    """Like ``verify_llm_auth_connection`` but queued as a backend LLM job."""
+    for kind, data in stream_llm_answer(api_url):
+        if kind == "error":
+            return data
+        if kind == "done":
+            return {"message": "Success", "answer": data["answer"]}
+    raise RuntimeError("The LLM job stream ended without an answer")
+
+
 def check_llm_config(api_url: str) -> List[Dict[str, Any]]:
-    response = requests.get(f"{api_url}/api/configuration/llm-config")
+    response = get_client(api_url).get("/api/configuration/llm-config")
     response.raise_for_status()
     return response.json()
 
 
 def save_llm_configs(api_url: str, configs: List[Tuple[str, str]]) -> None:
+    # Sequential on purpose: the writes serialize in the database anyway, and
+    # the shared session already keeps one connection open for all of them.
     for name, value in configs:
-        resp = requests.post(
-            f"{api_url}/api/configuration/llm-config",
+        resp = get_client(api_url).post(
+            "/api/configuration/llm-config",
             json={"name": name, "value": value},
         )
         resp.raise_for_status()
@@ -1,19 +1,28 @@
 import sys
+from datetime import datetime
+from typing import Any, Dict, Optional
 
 import djclick as click
 from rich.console import Console
+from rich.live import Live
+from rich.markup import escape
 from rich.prompt import Prompt
+from rich.spinner import Spinner
 from rich.table import Table
+from rich.text import Text
 
 from user_interface.backend_logic import (
     check_llm_config,
     create_statement,
     create_thread,
-    fetch_statements,
     fetch_thread,
-    fetch_threads,
+    fetch_thread_detail,
+    fetch_thread_logs_page,
+    fetch_threads_page,
     save_llm_configs,
-    verify_llm_auth_connection,
+    stream_llm_answer,
+    use_disk_cache,
+    watch_thread_events,
 )
 
 console = Console()
@@ -23,6 +32,8 @@ COMMANDS = {
     "/threads": "Show a list of all available threads.",
     "/add-thread": "Create a new thread with a main statement.",
     "/show-thread": "Show details of a specific thread, including its main statement. Alias: /st",
+    "/logs": "Show a thread's activity log, optionally only from a given time. Usage: /logs <ID> \\[--since <ISO time>]",
+    "/watch": "Show new statements, relationships and log entries of a thread as they are added. Usage: /watch <ID>",
     "/test-llm-auth": "Test functionality of the underlying LLM auth using configured API key/URL.",
     "/quit": "Exit the application.",
 }
@@ -42,29 +53,38 @@ def show_help():
 
 
 def show_threads(api_url: str) -> None:
-    try:
-        threads = fetch_threads(api_url)
-    except Exception as e:
-        console.print(f"[bold red]Failed to fetch threads from API: {e}[/bold red]")
-        return
+    cursor = None
+    index = 0
+    while True:
+        try:
+            threads, cursor = fetch_threads_page(api_url, cursor)
+        except Exception as e:
+            console.print(f"[bold red]Failed to fetch threads from API: {e}[/bold red]")
+            return
 
-    if not threads:
-        console.print("[yellow]No threads found.[/yellow]")
-        return
+        if not threads and not index:
+            console.print("[yellow]No threads found.[/yellow]")
+            return
 
-    table = Table(title="Available Threads")
-    table.add_column("Index", justify="right", style="cyan", no_wrap=True)
-    table.add_column("Thread ID", style="magenta")
-    table.add_column("Created At", style="yellow")
+        table = Table(title="Available Threads")
+        table.add_column("Index", justify="right", style="cyan", no_wrap=True)
+        table.add_column("Thread ID", style="magenta")
+        table.add_column("Created At", style="yellow")
 
-    for idx, thread in enumerate(threads, start=1):
-        table.add_row(
-            str(idx),
-            str(thread.get("id")),
-            str(thread.get("created_at")),
-        )
+        for index, thread in enumerate(threads, start=index + 1):
+            table.add_row(
+                str(index),
+                str(thread.get("id")),
+                str(thread.get("created_at")),
+            )
 
-    console.print(table)
+        console.print(table)
+
+        if not cursor:
+            return
+        more = Prompt.ask("Show more threads?", choices=["y", "n"], default="y")
+        if more.lower() != "y":
+            return
 
 
 def create_thread_interaction(api_url: str) -> None:
@@ -90,17 +110,17 @@ def create_thread_interaction(api_url: str) -> None:
 
 def show_thread(api_url: str, thread_id: str) -> None:
     try:
-        thread_data = fetch_thread(api_url, thread_id)
-        if not thread_data:
-            console.print(f"[red]Thread {thread_id} not found.[/red]")
-            return
-
-        statements = fetch_statements(api_url, thread_id)
+        detail = fetch_thread_detail(api_url, thread_id)
     except Exception as e:
         console.print(f"[bold red]Failed to fetch thread details: {e}[/bold red]")
         return
 
-    main_statement = next((s for s in statements if s.get("is_main")), None)
+    if not detail:
+        console.print(f"[red]Thread {thread_id} not found.[/red]")
+        return
+
+    thread_data = detail["thread"]
+    main_statement = detail.get("main_statement")
 
     table = Table(title=f"Thread {thread_data.get('id')} Details", show_header=False)
     table.add_column("Key", style="cyan", justify="right")
@@ -108,6 +128,8 @@ def show_thread(api_url: str, thread_id: str) -> None:
 
     table.add_row("Chat ID", str(thread_data.get("chat")))
     table.add_row("Created At", str(thread_data.get("created_at")))
+    for relationship_type, count in detail.get("relationship_counts", {}).items():
+        table.add_row(f"{relationship_type or 'related'} relationships", str(count))
     console.print(table)
 
     if main_statement:
@@ -118,7 +140,7 @@ def show_thread(api_url: str, thread_id: str) -> None:
     else:
         console.print("\n[yellow]No main statement found for this thread.[/yellow]")
 
-    other_statements = [s for s in statements if not s.get("is_main")]
+    other_statements = detail.get("statements", [])
     if other_statements:
         console.print("\n[bold]Other Statements:[/bold]")
         for stmt in other_statements:
@@ -126,13 +148,112 @@ def show_thread(api_url: str, thread_id: str) -> None:
             if len(content) > 60:
                 content = content[:57] + "..."
             console.print(f" - {content} [dim](ID: {stmt.get('id')})[/dim]")
+        hidden = detail.get("statement_count", 0) - len(other_statements)
+        if hidden > 0:
+            console.print(f"[dim] ... and {hidden} more[/dim]")
     console.print()
 
 
+def format_log(log: Dict[str, Any]) -> str:
+    details = dict(log.get("details") or {})
+    action = details.pop("action", "")
+    entity_type = details.pop("entity_type", "")
+    extra = " ".join(f"{key}={value}" for key, value in details.items())
+    return f"[dim]{log.get('created_at')}[/dim] [cyan]{action}[/cyan] {entity_type} {extra}"
+
+
+def show_logs(api_url: str, thread_id: str, since: Optional[datetime] = None) -> None:
+    cursor = None
+    while True:
+        try:
+            logs, cursor = fetch_thread_logs_page(api_url, thread_id, cursor, since)
+        except Exception as e:
+            console.print(f"[bold red]Failed to fetch logs: {e}[/bold red]")
+            return
+
+        for log in logs:
+            console.print(format_log(log))
+        if not cursor:
+            return
+        more = Prompt.ask("Show more logs?", choices=["y", "n"], default="y")
+        if more.lower() != "y":
+            return
+
+
+def logs_interaction(api_url: str, args: str) -> None:
+    parts = args.split()
+    if len(parts) == 1:
+        show_logs(api_url, parts[0])
+    elif len(parts) == 3 and parts[1] == "--since":
+        try:
+            # Times without an offset are taken as local time
+            since = datetime.fromisoformat(parts[2]).astimezone()
+        except ValueError:
+            console.print(f"[red]Invalid time: {parts[2]}[/red]")
+            return
+        show_logs(api_url, parts[0], since)
+    else:
+        console.print("[yellow]Usage: /logs <ID> \\[--since <ISO time>][/yellow]")
+
+
+def format_event(kind: str, data: Dict[str, Any]) -> str:
+    if kind == "statement":
+        return (
+            f"[bold]Statement:[/bold] {escape(data.get('content', ''))} "
+            f"[dim](ID: {data.get('id')})[/dim]"
+        )
+    if kind == "relationship":
+        relationship_type = data.get("relationship_type") or "related"
+        return (
+            f"[bold]Relationship:[/bold] {data.get('source')} "
+            f"[cyan]{escape(relationship_type)}[/cyan] {data.get('target')}"
+        )
+    if kind == "polling":
+        return (
+            "[dim]The server cannot stream changes (it is not running under ASGI), "
+            "following the thread's log instead.[/dim]"
+        )
+    if kind == "overflow":
+        return (
+            "[yellow]Some updates were skipped because they came in too fast. "
+            "Use /show-thread to catch up.[/yellow]"
+        )
+    return format_log(data)
+
+
+def watch_thread(api_url: str, thread_id: str) -> None:
+    try:
+        if fetch_thread(api_url, thread_id) is None:
+            console.print(f"[red]Thread {thread_id} not found.[/red]")
+            return
+        console.print(
+            f"[dim]Watching thread {thread_id} for changes, press Ctrl+C to stop.[/dim]"
+        )
+        for kind, data in watch_thread_events(api_url, thread_id):
+            console.print(format_event(kind, data))
+    except KeyboardInterrupt:
+        console.print()
+    except Exception as e:
+        console.print(f"[bold red]Failed to watch thread: {e}[/bold red]")
+
+
 def test_llm_auth_interaction(api_url: str) -> None:
-    console.print("[yellow]Testing LLM Authentication...[/yellow]")
+    data: Dict[str, Any] = {"error": "The answer ended unexpectedly."}
     try:
-        data = verify_llm_auth_connection(api_url)
+        spinner = Spinner("dots", "[yellow]Testing LLM Authentication...[/yellow]")
+        # The answer is shown as it streams in, then printed in full below
+        with Live(spinner, console=console, transient=True) as live:
+            answer = Text()
+            for kind, event in stream_llm_answer(api_url):
+                if kind == "token":
+                    if not answer:
+                        answer.append("LLM Answer: ", style="bold cyan")
+                    answer.append(event["text"])
+                    live.update(answer)
+                elif kind == "done":
+                    data = {"message": "Success", "answer": event["answer"]}
+                elif kind == "error":
+                    data = event
         if data.get("error"):
             console.print(f"[bold red]LLM Auth Test Failed:[/bold red] {data['error']}")
         else:
@@ -219,8 +340,17 @@ def configure_llms_on_startup(api_url: str) -> None:
     default="http://127.0.0.1:8000",
     help="Base URL of the backend API.",
 )
-def command(api_url: str) -> None:
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    envvar="RIZUI_CACHE_DIR",
+    default=None,
+    help="Directory to keep cached API responses in between runs.",
+)
+def command(api_url: str, cache_dir: Optional[str]) -> None:
     """A sample CLI command for rizui."""
+    if cache_dir:
+        use_disk_cache(api_url, cache_dir)
     configure_llms_on_startup(api_url)
 
     console.print(
@@ -247,6 +377,16 @@ def command(api_url: str) -> None:
                         console.print(
                             "[yellow]Please provide a Thread ID. Usage: /show-thread <ID>[/yellow]"
                         )
+                elif cmd.startswith("/logs"):
+                    logs_interaction(api_url, cmd[len("/logs") :])
+                elif cmd.startswith("/watch"):
+                    thread_id = cmd[len("/watch") :].strip()
+                    if thread_id:
+                        watch_thread(api_url, thread_id)
+                    else:
+                        console.print(
+                            "[yellow]Please provide a Thread ID. Usage: /watch <ID>[/yellow]"
+                        )
                 elif cmd == "/test-llm-auth":
                     test_llm_auth_interaction(api_url)
                 elif cmd in ("/quit", "/exit"):
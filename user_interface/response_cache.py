@@ -0,0 +1,124 @@
+"""Cache of GET response bodies revalidated with conditional requests.
+
+Entries are keyed by URL and kept only for responses that carry an ``ETag`` or
+``Last-Modified`` header. ``BackendClient`` sends those validators back as
+``If-None-Match``/``If-Modified-Since`` and, on a 304, serves the cached body,
+so an unchanged resource costs one small round trip instead of a full
+download. Entries live in a bounded in-memory LRU and, if ``directory`` is
+given, also as JSON files there so they survive restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+DEFAULT_MAX_ENTRIES = 256
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "X-Next-Cursor")
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: str
+    headers: Dict[str, str]
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        validators = {}
+        if "ETag" in self.headers:
+            validators["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            validators["If-Modified-Since"] = self.headers["Last-Modified"]
+        return validators
+
+    def to_response(self, revalidated: requests.Response) -> requests.Response:
+        """Rebuild a 200 response from this entry for a 304 ``revalidated``."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response.encoding = "utf-8"
+        response._content = self.body.encode()
+        response.headers.update(self.headers)
+        for name in ("ETag", "Last-Modified"):
+            if revalidated.headers.get(name):
+                response.headers[name] = revalidated.headers[name]
+        return response
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        directory: Optional[os.PathLike] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                return entry
+        if not self.directory:
+            return None
+
+        try:
+            entry = CachedResponse(**json.loads(self._path(url).read_text()))
+        except Exception:
+            # Missing or unreadable file: treat it as a cache miss
+            return None
+        self._remember(entry)
+        return entry
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """Keep ``response`` to ``url`` if it's a 200 the server can revalidate."""
+        headers = {
+            name: response.headers[name]
+            for name in CACHED_HEADERS
+            if response.headers.get(name)
+        }
+        if response.status_code != 200 or not (
+            "ETag" in headers or "Last-Modified" in headers
+        ):
+            return
+
+        entry = CachedResponse(url, response.content.decode(), headers)
+        self._remember(entry)
+        if self.directory:
+            # Write then rename so a concurrent reader never sees half a file
+            path = self._path(entry.url)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(asdict(entry)))
+            tmp.replace(path)
+
+    def _remember(self, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[entry.url] = entry
+            self._entries.move_to_end(entry.url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
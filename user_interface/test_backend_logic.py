@@ -1,16 +1,35 @@
 import pytest
 from unittest.mock import patch
-from statement.models import Thread
+from statement.models import Log, Thread
 from django_llm_chat.models import Chat
 from model_bakery import baker
 
+import requests
+
+from user_interface.api_client import BackendClient, get_client
+from user_interface.response_cache import ResponseCache
 from user_interface.backend_logic import (
     fetch_threads,
+    fetch_threads_page,
+    iter_thread_pages,
     create_thread,
     create_statement,
+    create_statements_bulk,
+    export_relationships,
+    import_relationships,
     fetch_thread,
+    fetch_thread_detail,
+    fetch_thread_details,
+    fetch_thread_logs_page,
+    tail_thread_logs,
+    iter_sse,
+    watch_thread_events,
     fetch_statements,
     verify_llm_auth_connection,
+    create_llm_job,
+    run_llm_auth_test,
+    stream_llm_answer,
+    wait_for_llm_job,
     check_llm_config,
     save_llm_configs,
 )
@@ -19,6 +38,8 @@ from user_interface.backend_logic import (
 class DummyResponse:
     def __init__(self, ninja_response):
         self.status_code = ninja_response.status_code
+        self.headers = ninja_response.headers
+        self.content = ninja_response.content
         try:
             self.json_data = ninja_response.json()
         except Exception:
@@ -31,12 +52,33 @@ class DummyResponse:
         if self.status_code >= 400:
             raise Exception(f"HTTP Error: {self.status_code}")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class StreamedResponse(DummyResponse):
+    def __init__(self, lines, ninja_response=None):
+        if ninja_response is not None:
+            super().__init__(ninja_response)
+        else:
+            self.status_code = 200
+        self.lines = lines
+
+    def iter_lines(self, **kwargs):
+        for line in self.lines:
+            if isinstance(line, Exception):
+                raise line
+            yield line
+
 
 @pytest.fixture
 def mock_requests(test_client):
     def mock_get(url, *args, **kwargs):
         path = url.split("/api", 1)[1] if "/api" in url else url
-        response = test_client.get(path)
+        response = test_client.get(path, headers=kwargs.get("headers") or {})
         return DummyResponse(response)
 
     def mock_post(url, json=None, *args, **kwargs):
@@ -47,10 +89,13 @@ def mock_requests(test_client):
             response = test_client.post(path)
         return DummyResponse(response)
 
-    with (
-        patch("user_interface.backend_logic.requests.get", side_effect=mock_get),
-        patch("user_interface.backend_logic.requests.post", side_effect=mock_post),
-    ):
+    def mock_request(method, url, *args, **kwargs):
+        kwargs.pop("timeout", None)
+        if method == "GET":
+            return mock_get(url, *args, **kwargs)
+        return mock_post(url, *args, **kwargs)
+
+    with patch("requests.Session.request", side_effect=mock_request):
         yield
 
 
@@ -64,6 +109,22 @@ def test_fetch_threads(mock_requests):
     assert threads[0]["id"] == thread.id
 
 
+@pytest.mark.django_db
+def test_fetch_threads_follows_cursor(mock_requests):
+    chat = baker.make(Chat)
+    threads = baker.make(Thread, chat=chat, _quantity=5)
+
+    first_page, cursor = fetch_threads_page("http://testserver", limit=2)
+    assert len(first_page) == 2
+    assert cursor is not None
+
+    all_threads = list(iter_thread_pages("http://testserver", limit=2))
+    assert [len(page) for page in all_threads] == [2, 2, 1]
+    assert sorted(t["id"] for t in fetch_threads("http://testserver")) == sorted(
+        t.id for t in threads
+    )
+
+
 @pytest.mark.django_db
 def test_create_thread(mock_requests):
     data = create_thread("http://testserver")
@@ -132,3 +193,309 @@ def test_test_llm_auth(mock_requests):
         data = verify_llm_auth_connection("http://testserver")
         assert data["message"] == "Success"
         assert data["answer"] == "Mock LLM response"
+
+
+@pytest.mark.django_db
+def test_fetch_thread_detail(mock_requests):
+    chat = baker.make(Chat)
+    thread = baker.make(Thread, chat=chat)
+    create_statement("http://testserver", str(thread.id), "Main", True)
+    create_statement("http://testserver", str(thread.id), "Other", False)
+
+    detail = fetch_thread_detail("http://testserver", str(thread.id))
+    assert detail["thread"]["id"] == thread.id
+    assert detail["main_statement"]["content"] == "Main"
+    assert [s["content"] for s in detail["statements"]] == ["Other"]
+
+    assert fetch_thread_detail("http://testserver", "999999") is None
+
+
+@pytest.mark.django_db
+def test_create_statements_bulk(mock_requests):
+    chat = baker.make(Chat)
+    thread = baker.make(Thread, chat=chat)
+    statements = [{"content": "Main", "is_main": True}] + [
+        {"content": f"Statement {i}"} for i in range(6)
+    ]
+
+    ids = create_statements_bulk(
+        "http://testserver", str(thread.id), statements, batch_size=3
+    )
+
+    assert len(ids) == 7
+    assert thread.statements.count() == 7
+    assert thread.statements.get(is_main=True).id == ids[0]
+
+
+@pytest.mark.django_db
+def test_import_and_export_relationships(mock_requests):
+    chat = baker.make(Chat)
+    thread = baker.make(Thread, chat=chat)
+    a, b, c = create_statements_bulk(
+        "http://testserver",
+        str(thread.id),
+        [{"content": "A"}, {"content": "B"}, {"content": "C"}],
+    )
+    edges = [
+        {"source": b, "target": a, "relationship_type": "supports"},
+        {"source": c, "target": a, "relationship_type": "contradicts"},
+    ]
+
+    assert import_relationships("http://testserver", str(thread.id), edges, 1) == 2
+    assert import_relationships("http://testserver", str(thread.id), edges) == 0
+
+    graph = export_relationships("http://testserver", str(thread.id))
+    assert graph == {
+        "source": [b, c],
+        "target": [a, a],
+        "relationship_type": ["supports", "contradicts"],
+    }
+
+
+@pytest.mark.django_db
+def test_run_llm_auth_test(mock_requests, settings):
+    settings.LLM_JOBS_EAGER = True
+
+    assert "not configured" in run_llm_auth_test("http://testserver")["error"]
+
+    save_llm_configs("http://testserver", [("reasoning_llm_model", "fake/echo")])
+    # What the events endpoint answers under WSGI: the job is polled instead
+    not_implemented = StreamedResponse([])
+    not_implemented.status_code = 501
+    with patch.object(BackendClient, "stream", return_value=not_implemented):
+        data = run_llm_auth_test("http://testserver")
+    assert data == {"message": "Success", "answer": "Fake answer to: Hi, how are you?"}
+
+    job = create_llm_job("http://testserver", "Ping")
+    assert wait_for_llm_job("http://testserver", job["id"])["answer"] == (
+        "Fake answer to: Ping"
+    )
+
+
+@pytest.mark.django_db
+def test_stream_llm_answer(mock_requests, settings):
+    save_llm_configs("http://testserver", [("reasoning_llm_model", "fake/echo")])
+    streamed = StreamedResponse(
+        [
+            "event: pending",
+            'data: {"status": "pending"}',
+            "",
+            "event: token",
+            'data: {"text": "Fake "}',
+            "",
+            "event: running",
+            'data: {"status": "running"}',
+            "",
+            "event: token",
+            'data: {"text": "answer"}',
+            "",
+            "event: succeeded",
+            'data: {"status": "succeeded", "answer": "Fake answer"}',
+            "",
+        ]
+    )
+    with patch.object(BackendClient, "stream", return_value=streamed) as stream:
+        events = list(stream_llm_answer("http://testserver", "Ping"))
+
+    job_id = stream.call_args.args[0].split("/")[-2]
+    assert stream.call_args.args[0] == f"/api/configuration/llm-jobs/{job_id}/events"
+    assert events == [
+        ("token", {"text": "Fake "}),
+        ("token", {"text": "answer"}),
+        ("done", {"answer": "Fake answer"}),
+    ]
+
+    failed = StreamedResponse(
+        [
+            "event: failed",
+            'data: {"status": "failed", "error": "API Key not valid"}',
+            "",
+        ]
+    )
+    with patch.object(BackendClient, "stream", return_value=failed):
+        events = list(stream_llm_answer("http://testserver"))
+    assert events == [("error", {"error": "API Key not valid"})]
+
+
+def test_backend_client_reuses_session():
+    client = get_client("http://testserver")
+    assert get_client("http://testserver") is client
+    assert get_client("http://otherserver") is not client
+
+    adapter = client.session.get_adapter("http://testserver/api")
+    assert adapter.max_retries.total == 3
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+    with patch("requests.Session.request") as request:
+        BackendClient("http://testserver/", timeout=(1, 2)).get("/api/x")
+    request.assert_called_once_with("GET", "http://testserver/api/x", timeout=(1, 2))
+
+
+# Concurrent requests run in worker threads, which need committed data
+@pytest.mark.django_db(transaction=True)
+def test_fetch_thread_details(mock_requests):
+    threads = [baker.make(Thread, chat=baker.make(Chat)) for _ in range(5)]
+    for thread in threads:
+        create_statement("http://testserver", str(thread.id), f"Main {thread.id}", True)
+
+    ids = [str(thread.id) for thread in threads] + ["999999"]
+    details = fetch_thread_details("http://testserver", ids)
+
+    assert [d["main_statement"]["content"] for d in details[:-1]] == [
+        f"Main {thread.id}" for thread in threads
+    ]
+    assert details[-1] is None
+
+
+@pytest.mark.django_db
+def test_backend_client_revalidates_cached_responses(mock_requests, tmp_path):
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    create_statement("http://testserver", str(thread.id), "Main", True)
+    path = f"/api/statement/threads/{thread.id}/detail"
+
+    client = BackendClient("http://testserver", cache=ResponseCache(tmp_path))
+    first = client.get(path)
+    assert isinstance(first, DummyResponse)
+
+    # A 304 comes back as a regular response rebuilt from the cached body
+    second = client.get(path)
+    assert isinstance(second, requests.Response)
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+    # The on-disk copy is used by a fresh client too
+    restarted = BackendClient("http://testserver", cache=ResponseCache(tmp_path))
+    assert isinstance(restarted.get(path), requests.Response)
+
+    create_statement("http://testserver", str(thread.id), "Other", False)
+    third = client.get(path)
+    assert isinstance(third, DummyResponse)
+    assert [s["content"] for s in third.json()["statements"]] == ["Other"]
+
+
+@pytest.mark.django_db
+def test_fetch_thread_logs_page(mock_requests):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    start = timezone.now() - timedelta(minutes=10)
+    for minutes in range(3):
+        baker.make(
+            Log,
+            thread=thread,
+            details={"n": minutes},
+            created_at=start + timedelta(minutes=minutes),
+        )
+
+    logs, cursor = fetch_thread_logs_page("http://testserver", str(thread.id), limit=2)
+    assert [log["details"]["n"] for log in logs] == [0, 1]
+    logs, cursor = fetch_thread_logs_page("http://testserver", str(thread.id), cursor)
+    assert [log["details"]["n"] for log in logs] == [2]
+    assert cursor is None
+
+    since = start + timedelta(minutes=1)
+    logs, _ = fetch_thread_logs_page("http://testserver", str(thread.id), since=since)
+    assert [log["details"]["n"] for log in logs] == [1, 2]
+
+
+@pytest.mark.django_db
+def test_tail_thread_logs(mock_requests):
+    from datetime import timedelta
+    from itertools import islice
+
+    from django.utils import timezone
+
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    start = timezone.now() - timedelta(minutes=10)
+    for minutes in range(3):
+        baker.make(
+            Log,
+            thread=thread,
+            details={"n": minutes},
+            created_at=start + timedelta(minutes=minutes),
+        )
+
+    tail = tail_thread_logs(
+        "http://testserver",
+        str(thread.id),
+        since=start + timedelta(minutes=1),
+        poll_interval=0,
+    )
+    assert [log["details"]["n"] for log in islice(tail, 2)] == [1, 2]
+
+    # A late entry with an older timestamp is still picked up, exactly once
+    baker.make(Log, thread=thread, details={"n": 3}, created_at=timezone.now())
+    baker.make(
+        Log,
+        thread=thread,
+        details={"n": 4},
+        created_at=start + timedelta(minutes=2, seconds=-1),
+    )
+    assert sorted(log["details"]["n"] for log in islice(tail, 2)) == [3, 4]
+
+
+@pytest.mark.django_db
+def test_watch_thread_events_polls_logs_without_asgi(mock_requests):
+    from datetime import timedelta
+    from itertools import islice
+
+    from django.utils import timezone
+
+    thread = baker.make(Thread, chat=baker.make(Chat))
+    baker.make(
+        Log,
+        thread=thread,
+        details={"n": 0},
+        created_at=timezone.now() - timedelta(minutes=1),
+    )
+
+    # What the events endpoint answers under WSGI
+    not_implemented = StreamedResponse([])
+    not_implemented.status_code = 501
+    with patch.object(BackendClient, "stream", return_value=not_implemented):
+        events = watch_thread_events(
+            "http://testserver", str(thread.id), retry_interval=0
+        )
+        assert next(events) == ("polling", {})
+
+        baker.make(Log, thread=thread, details={"n": 1}, created_at=timezone.now())
+        [(kind, log)] = islice(events, 1)
+    assert kind == "log"
+    assert log["details"] == {"n": 1}
+
+
+def test_iter_sse():
+    lines = [
+        ": connected",
+        "",
+        "id: 1",
+        "event: statement",
+        'data: {"id": 5}',
+        "",
+        ": keepalive",
+        "",
+        'data: {"multi":',
+        "data: 1}",
+        "",
+    ]
+    assert list(iter_sse(lines)) == [
+        ("statement", {"id": 5}),
+        ("message", {"multi": 1}),
+    ]
+
+
+def test_watch_thread_events_reconnects():
+    from itertools import islice
+
+    responses = [
+        StreamedResponse(
+            ["event: log", 'data: {"id": 1}', "", requests.ConnectionError()]
+        ),
+        StreamedResponse(["event: statement", 'data: {"id": 2}', ""]),
+    ]
+    with patch.object(BackendClient, "stream", side_effect=responses) as stream:
+        events = watch_thread_events("http://testserver", "7", retry_interval=0)
+        assert list(islice(events, 2)) == [("log", {"id": 1}), ("statement", {"id": 2})]
+    stream.assert_called_with("/api/statement/threads/7/events")
@@ -10,6 +10,8 @@ from user_interface.management.commands.rizui import command as rizui_command
 class DummyResponse:
     def __init__(self, ninja_response):
         self.status_code = ninja_response.status_code
+        self.headers = ninja_response.headers
+        self.content = ninja_response.content
         self.json_data = ninja_response.json()
 
     def json(self):
@@ -36,7 +38,10 @@ def test_rizui_cli_lists_threads(test_client):
         return DummyResponse(response)
 
     with (
-        patch("requests.get", side_effect=mock_requests_get),
+        patch(
+            "requests.Session.request",
+            side_effect=lambda method, url, **kwargs: mock_requests_get(url, **kwargs),
+        ),
         patch("user_interface.management.commands.rizui.configure_llms_on_startup"),
     ):
         runner = CliRunner()
@@ -58,7 +63,10 @@ def test_rizui_cli_no_threads(test_client):
         return DummyResponse(response)
 
     with (
-        patch("requests.get", side_effect=mock_requests_get),
+        patch(
+            "requests.Session.request",
+            side_effect=lambda method, url, **kwargs: mock_requests_get(url, **kwargs),
+        ),
         patch("user_interface.management.commands.rizui.configure_llms_on_startup"),
     ):
         runner = CliRunner()
@@ -81,7 +89,10 @@ def test_rizui_cli_add_thread(test_client):
         return DummyResponse(response)
 
     with (
-        patch("requests.post", side_effect=mock_requests_post),
+        patch(
+            "requests.Session.request",
+            side_effect=lambda method, url, **kwargs: mock_requests_post(url, **kwargs),
+        ),
         patch("user_interface.management.commands.rizui.configure_llms_on_startup"),
     ):
         runner = CliRunner()